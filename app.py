@@ -1,19 +1,41 @@
-from pythonosc import udp_client, osc_server, dispatcher
+import copy
+import os
+import tempfile
 import time
 import threading
-from config import message_config, load_app_config, save_app_config, reload_message_config
+from config import (
+    message_config, reload_message_config, config_store, diff_config, set_config_dir,
+)
 from placeholders import get_placeholder_value, data_cache
 from bpm import bpm_monitor
 from boop_counter import BoopCounter
+from clock import clock
 from shockosc import ShockOSCController
 from slide import SlideController
 from shock_panel import ShockPanelController
 from whisper_stt import WhisperSTTController
+from replay import input_recorder
+from osc_decode import ScalarDispatcher
+from osc_router import OSCRouter, CHANGES, RISING, AVATAR_PARAM_PREFIX
+from osc_listener import OSCListener, WorkerPool
+from osc_output import OSCOutput
+from osc_relay import OSCRelay
+from osc_stats import OSCStats
+from oscquery import OSCQueryService
+from avatar_profiles import build_profiles, find_vrchat_avatar_file, load_vrchat_avatar_file
 
 
 class VRChatMessenger:
-    def __init__(self, ip="127.0.0.1", port=9000, listen_port=9001):
-        self.client = udp_client.SimpleUDPClient(ip, port)
+    def __init__(self, ip="127.0.0.1", port=9000, listen_port=9001, client=None, offline=False):
+        """
+        Args:
+            client: outbound OSC client (defaults to an OSCOutput on ip:port,
+                shared with every controller)
+            offline: don't bind the listener, open network connections, start
+                speech-to-text or persist anything. Used by the replayer.
+        """
+        self.client = client or OSCOutput(ip, port, offline=offline)
+        self.offline = offline
         self.active_messages = {}
 
         # Rate limiting variables
@@ -31,8 +53,12 @@ class VRChatMessenger:
         self._boop_hide_timer = None
         self._last_bpm_connected = False
 
-        # Load app configuration
-        self.app_config = load_app_config()
+        # Live read-only view of the shared config; changes go through
+        # _save_section so the store stays the only copy of the whole thing
+        self.app_config = config_store.view()
+        self.config_apply_ms = {}  # section -> last hot-reload apply time
+        if not offline and hasattr(self.client, "set_mirrors"):
+            self.client.set_mirrors(self.app_config.get("osc_output", {}).get("mirrors", []))
         self.show_music = self.app_config.get("show_music", True)
         self.show_time = self.app_config.get("show_time", True)
 
@@ -45,15 +71,16 @@ class VRChatMessenger:
         self.current_artist = None
 
         # Initialize ShockOSC controller with callback
-        self.shock_controller = ShockOSCController(ip, port, self._on_shock_triggered)
-        shock_config = self.app_config.get("shockosc", {})
-        self.shock_controller.update_config(shock_config)
+        self.shock_controller = ShockOSCController(
+            ip, port, self._on_shock_triggered, client=self.client, offline=offline
+        )
+        self.shock_controller.update_config(self._section("shockosc"))
 
         # Set internet shock callback
         self.shock_controller.set_internet_shock_callback(self._on_internet_shock)
 
         # Start SignalR connection if token is available
-        if shock_config.get("openshock_token"):
+        if self.app_config["shockosc"].get("openshock_token"):
             print("OpenShock token found, starting SignalR connection for real-time events...")
             self.shock_controller.start_signalr_connection()
 
@@ -73,49 +100,60 @@ class VRChatMessenger:
         self.stt_final_linger = 4.0  # seconds a finalized line stays before clearing
         self._stt_hide_timer = None
         
-        # Contact hold tracking
-        self.contact_start_times = {}  # Track when contact started for each group
+        # Contact hold tracking (contact state itself lives in router.params)
         self.hold_timers = {}  # Track hold timers for each group
 
         # Initialize the boop counter and share it with data_cache
-        self.boop_counter = BoopCounter()
+        if offline:
+            # Keep replayed boops out of the real counter file.
+            self.boop_counter = BoopCounter(os.path.join(tempfile.mkdtemp(), "boops.json"))
+        else:
+            self.boop_counter = BoopCounter()
         data_cache.boop_counter = self.boop_counter  # Share the same instance
 
         # Start SSE listener for JoinMyMusic
         jmm_config = self.app_config.get("joinmymusic", {})
         sse_url = jmm_config.get("sse_url", "https://joinmymusic.com/api/events")
-        data_cache.start_sse(sse_url)
+        if not offline:
+            data_cache.start_sse(sse_url)
 
         # Initialize messages AFTER boop_counter is set up
         self._initialize_messages()
 
-        # Setup OSC dispatcher for listening
-        self._monitor_callback = None
-        self.dispatcher = dispatcher.Dispatcher()
-        self.dispatcher.map("*", self._forward_to_monitor)
-        self.dispatcher.map("/avatar/parameters/OSCBoop", self._handle_boop)
-
-        # Add ShockOSC parameter listeners
-        self.dispatcher.map("/avatar/parameters/ShockOsc/leftleg", self._handle_shock_trigger)
-        self.dispatcher.map("/avatar/parameters/ShockOsc/rightleg", self._handle_shock_trigger)
-
-        # Initialize Slide controller (after dispatcher is created)
+        # Setup OSC routing. pythonosc only decodes packets; our router owns
+        # address lookup and swaps in a per-avatar table on /avatar/change.
+        self.router = OSCRouter()
+        self.dispatcher = ScalarDispatcher()
+        if input_recorder.active:
+            self.dispatcher.capture = input_recorder.record_osc
+        self.dispatcher.set_default_handler(self.router.dispatch)
+        # Per-address rates and handler timings (OSC monitor page, --osc-stats)
+        self.osc_stats = OSCStats()
+        self.router.set_stats(self.osc_stats)
+        self.avatar_names = {}  # avatar_id -> display name from its profile
+        self._avatar_lock = threading.Lock()  # avatar switch vs. late profile load
+        self.router.map("/avatar/change", self._handle_avatar_change)
+        self.router.map("/avatar/parameters/OSCBoop", self._handle_boop, mode=RISING)
+
+        # Add ShockOSC parameter listeners for every configured group
+        self._shockosc_routes = {}  # address -> handler mapped on the router
+        self._update_shockosc_routes()
+
+        # Initialize Slide controller (after the router is created)
         self.slide_controller = SlideController(
-            dispatcher=self.dispatcher,
+            dispatcher=self.router,
             shock_controller=self.shock_controller
         )
-        slide_config = self.app_config.get("slide", {})
-        self.slide_controller.update_config(slide_config)
+        self.slide_controller.update_config(self._section("slide"))
 
         # Initialize Shock Panel controller
         self.shock_panel_controller = ShockPanelController(
             osc_client=self.client,
             shock_controller=self.shock_controller,
-            dispatcher=self.dispatcher,
+            dispatcher=self.router,
         )
         self.shock_panel_controller.on_state_change = self._on_shock_panel_state_change
-        panel_config = self.app_config.get("shock_panel", {})
-        self.shock_panel_controller.update_config(panel_config)
+        self.shock_panel_controller.update_config(self._section("shock_panel"))
 
         # Speech-to-text controller (display state set up earlier in __init__)
         self.stt_controller = WhisperSTTController(
@@ -123,16 +161,33 @@ class VRChatMessenger:
             on_final=self._on_stt_final,
             on_state=self._on_stt_state,
         )
-        self.stt_controller.update_config(self.app_config.get("whisper", {}))
+        if not offline:
+            self.stt_controller.update_config(self._section("whisper"))
+
+        # Prebuild per-avatar routing tables now that every handler is mapped
+        self._load_avatar_profiles()
+
+        # Setup OSC listener: one asyncio loop receives and routes inline,
+        # handlers that call OpenShock go to a small worker pool. Offline
+        # (replay) leaves the pool unset so every handler runs inline.
+        self.oscquery = None
+        self.relay = None
+        oscquery_config = self.app_config.get("oscquery", {})
+        if not offline:
+            self.router.pool = WorkerPool(workers=2, max_pending=64)
+            if oscquery_config.get("enabled", False):
+                # VRChat sends every parameter to 9001 regardless; an OSCQuery
+                # service gets its own port and only what it advertises.
+                listen_port = oscquery_config.get("osc_port", 0)
+            self.server = OSCListener(
+                ip, listen_port, self.dispatcher.call_handlers_for_packet,
+                receive_buffer=self.app_config.get("osc_input", {}).get("receive_buffer"),
+            )
 
-        # Setup OSC server for listening
-        self.server = osc_server.ThreadingOSCUDPServer(
-            (ip, listen_port), self.dispatcher
-        )
-        print(f"OSC Server initialized on {ip}:{listen_port}")
-        self.server_thread = threading.Thread(
-            target=self.server.serve_forever, daemon=True
-        )
+        # Pick up edits made to app_config.json while we're running
+        if not offline:
+            config_store.add_listener(self._on_config_file_changed)
+            config_store.start_watching()
 
         # Add a thread just for checking song changes
         self.song_check_thread = threading.Thread(
@@ -145,36 +200,168 @@ class VRChatMessenger:
         )
 
         # Start threads
-        print(f"Starting OSC listener thread on port {listen_port}...")
-        self.server_thread.start()
         self.song_check_thread.start()
         self.update_thread.start()
-        print(
-            f"OSC listener thread started. Waiting for messages on {ip}:{listen_port}"
+        if not offline:
+            try:
+                self.server.start()
+            except OSError as e:
+                e.osc_port = self.server.port  # for main()'s port-conflict message
+                raise
+            print(f"OSC listener started. Waiting for messages on {ip}:{self.server.port}")
+            self._update_relay(self.app_config.get("osc_relay", {}))
+            if oscquery_config.get("enabled", False):
+                self._start_oscquery(ip, oscquery_config)
+
+    def _update_relay(self, relay_config):
+        """Start, retarget or stop relaying inbound OSC to other apps."""
+        targets = []
+        if relay_config.get("enabled", False):
+            for target in relay_config.get("targets", []):
+                if (target.get("host", "127.0.0.1") in ("127.0.0.1", "localhost")
+                        and target.get("port") == self.server.port):
+                    print(f"OSC relay target {target['port']} is our own port, skipped")
+                    continue
+                targets.append(target)
+        if not targets:
+            self.server.relay = None
+            if self.relay:
+                self.relay.close()
+                self.relay = None
+            return
+        if self.relay is None:
+            self.relay = OSCRelay(targets)
+        else:
+            self.relay.set_targets(targets)
+        self.server.relay = self.relay
+
+    def get_input_health(self):
+        """Inbound OSC loss indicators: socket drops and gaps in parameter streams."""
+        params = self.router.params
+        server = getattr(self, "server", None)
+        return {
+            "packets": server.packets if server else 0,
+            "packet_errors": server.errors if server else 0,
+            "kernel_drops": server.kernel_drops() if server else None,
+            "receive_buffer": server.receive_buffer_actual if server else None,
+            "pool_dropped": self.router.pool.dropped if self.router.pool else 0,
+            "stream_gaps": params.gaps_total,
+            "gaps_by_address": params.gaps(),
+            "recent_gaps": list(params.recent_gaps),
+            "relay": self.relay.get_stats() if self.relay else [],
+        }
+
+    def _start_oscquery(self, ip, oscquery_config):
+        service = OSCQueryService(
+            oscquery_config.get("name", "VRCChatbox"), ip, self.server.port,
+            http_port=oscquery_config.get("http_port", 0),
         )
+        try:
+            service.start()
+        except OSError as e:
+            print(f"Could not start OSCQuery service: {e}")
+            return
+        self.oscquery = service
+        self._refresh_oscquery()
 
-    def _forward_to_monitor(self, address, *args):
-        if self._monitor_callback:
-            self._monitor_callback(address, args)
-
-    def set_monitor_callback(self, cb):
-        self._monitor_callback = cb
+    def _refresh_oscquery(self):
+        """Advertise exactly the addresses the active routing table and Slide need."""
+        if getattr(self, "oscquery", None) is None:
+            return
+        paths = set(self.router.routed_addresses())
+        active = self.router.active_params
+        for path in self.slide_controller.watched_paths():
+            if active is None or not path.startswith(AVATAR_PARAM_PREFIX) or path in active:
+                paths.add(path)
+        self.oscquery.set_paths(paths)
+
+    def _load_avatar_profiles(self):
+        """(Re)build every known avatar's routing table from config + VRChat files."""
+        avatars_config = self.app_config.get("avatars", {})
+        if not avatars_config.get("enabled", True):
+            self.router.set_profiles({})
+            self.avatar_names = {}
+            return
+        profiles = build_profiles(avatars_config)
+        self.avatar_names = {aid: name for aid, (name, _) in profiles.items()}
+        self.router.set_profiles({aid: params for aid, (_, params) in profiles.items()})
+        print(f"Loaded {len(profiles)} avatar profile(s)")
+        self._refresh_oscquery()
+
+    def _handle_avatar_change(self, address, *args):
+        """Swap routing and controller state over to the newly worn avatar.
+
+        An avatar we have no profile for routes on the default table (every
+        handler) while its VRChat OSC file is read on the worker pool; the
+        router switches to its own table when that finishes."""
+        avatar_id = str(args[0]) if args else ""
+        t0 = time.perf_counter()
+        avatars_config = self.app_config.get("avatars", {})
+        load = (avatars_config.get("enabled", True)
+                and avatars_config.get("use_vrchat_osc_configs", True)
+                and not self.router.has_profile(avatar_id))
+        self.router.activate(avatar_id)
+        params = self._apply_avatar_params(avatar_id)
+        dt = (time.perf_counter() - t0) * 1000
+        name = self.avatar_names.get(avatar_id) or avatar_id
+        routed = f"{len(params)} parameters" if params is not None else "no profile, all parameters"
+        print(f"Avatar changed: {name} ({routed}) in {dt:.2f}ms")
+        if load:
+            pool = self.router.pool
+            if pool is None:
+                # Offline (replay): load inline so outputs stay deterministic
+                self._load_avatar_file(avatar_id)
+            elif not pool.submit(address, self._load_avatar_file, avatar_id):
+                print(f"Avatar file load for {avatar_id} dropped, routing on all parameters")
+
+    def _load_avatar_file(self, avatar_id):
+        """Read avatar_id's VRChat OSC file and switch to its table if still worn."""
+        if self.router.has_profile(avatar_id):
+            return
+        # First time we've seen this avatar — VRChat writes its file on load.
+        path = find_vrchat_avatar_file(avatar_id)
+        if not path:
+            return
+        try:
+            _, name, params = load_vrchat_avatar_file(path)
+        except (OSError, ValueError) as e:
+            print(f"Could not read avatar OSC config {path}: {e}")
+            return
+        self.avatar_names[avatar_id] = name
+        # add_profile swaps the table in itself if avatar_id is still active
+        self.router.add_profile(avatar_id, params)
+        params = self._apply_avatar_params(avatar_id)
+        if params is not None:
+            print(f"Avatar profile loaded: {name} ({len(params)} parameters)")
+
+    def _apply_avatar_params(self, avatar_id):
+        """Push the router's active parameter set to the controllers.
+
+        Returns the set, or None if avatar_id is no longer the active avatar."""
+        with self._avatar_lock:
+            if self.router.avatar_id != avatar_id:
+                return None
+            params = self.router.active_params
+            self._refresh_oscquery()
+            self.slide_controller.set_active_params(params)
+            self.shock_panel_controller.set_active_params(params)
+        return params
 
     def _rate_limited_updates(self):
         """Thread that handles sending updates at a rate-limited pace"""
         while True:
             if self.update_needed and not self.update_pending:
-                current_time = time.time()
+                current_time = clock.time()
                 time_since_last = current_time - self.last_message_time
 
                 if time_since_last >= self.rate_limit:
                     self.update_pending = True
                     self.update_needed = False
                     self._send_display_update()
-                    self.last_message_time = time.time()
+                    self.last_message_time = clock.time()
                     self.update_pending = False
 
-            time.sleep(0.1)  # Small sleep to avoid CPU spinning
+            clock.sleep(0.1)  # Small sleep to avoid CPU spinning
 
     def _send_display_update(self):
         """Send the actual display update to VRChat"""
@@ -257,7 +444,7 @@ class VRChatMessenger:
                     "message": formatted_message,
                 }
         self._send_display_update()
-        self.last_message_time = time.time()
+        self.last_message_time = clock.time()
 
     def _check_song_changes(self):
         """Periodically check for song changes and date changes"""
@@ -296,7 +483,7 @@ class VRChatMessenger:
                 self._last_bpm_connected = bpm_connected
                 self.request_display_update()
 
-            time.sleep(5)  # Check every 5 seconds
+            clock.sleep(5)  # Check every 5 seconds
 
     def check_for_song_change(self):
         """Check if song has changed and update display if needed"""
@@ -369,7 +556,7 @@ class VRChatMessenger:
             # change comes along to reset it.
             if self._boop_hide_timer:
                 self._boop_hide_timer.cancel()
-            self._boop_hide_timer = threading.Timer(self.boop_linger, self._hide_boops)
+            self._boop_hide_timer = clock.timer(self.boop_linger, self._hide_boops)
             self._boop_hide_timer.daemon = True
             self._boop_hide_timer.start()
 
@@ -391,12 +578,10 @@ class VRChatMessenger:
         # Extract group name from address (e.g., "/avatar/parameters/ShockOsc/leftleg" -> "leftleg")
         group = address.split("/")[-1]
         
-        if args and args[0]:  # Contact started/maintained
-            current_time = time.time()
-            
-            # If this is a new contact, start tracking
-            if group not in self.contact_start_times:
-                self.contact_start_times[group] = current_time
+        # Mapped with CHANGES, so each call is a contact starting or ending
+        if args and args[0]:  # Contact started
+            started = self.router.params.changed_at(address)
+            if group not in self.hold_timers:
                 print(f"Contact started for group: {group}")
                 
                 # Get hold time from config
@@ -409,29 +594,73 @@ class VRChatMessenger:
                 else:
                     # Schedule shock after hold time
                     print(f"Starting {hold_time}s hold timer for group: {group}")
-                    hold_timer = threading.Timer(hold_time, self._trigger_held_shock, [group])
+                    hold_timer = clock.timer(hold_time, self._trigger_held_shock,
+                                             [group, address, started])
                     self.hold_timers[group] = hold_timer
                     hold_timer.start()
         else:  # Contact ended
-            if group in self.contact_start_times:
-                contact_duration = time.time() - self.contact_start_times[group]
-                print(f"Contact ended for group: {group} after {contact_duration:.2f}s")
-                
-                # Cancel any pending shock timer
-                if group in self.hold_timers:
-                    self.hold_timers[group].cancel()
-                    del self.hold_timers[group]
-                    print(f"Cancelled hold timer for group: {group}")
-                
-                # Clear contact tracking
-                del self.contact_start_times[group]
+            print(f"Contact ended for group: {group}")
+
+            # Cancel any pending shock timer
+            if group in self.hold_timers:
+                self.hold_timers[group].cancel()
+                del self.hold_timers[group]
+                print(f"Cancelled hold timer for group: {group}")
     
-    def _trigger_held_shock(self, group):
+    def _shockosc_actions(self, group):
+        """ShockOsc avatar inputs for one group: {suffix: (delivery mode, handler)}"""
+        sc = self.shock_controller
+
+        def instant(action_type):
+            def h(address, *args):
+                if args and sc.is_own_echo(address, args[0]):
+                    return
+                sc.send_group_action(group, action_type)
+            return h
+
+        def continuous(action_type):
+            # Float 0..1 intensity; active until it drops back to 0
+            def h(address, *args):
+                level = float(args[0]) if args else 0.0
+                if sc.is_own_echo(address, level):
+                    return
+                sc.set_continuous(group, action_type, level)
+            return h
+
+        return {
+            "": (CHANGES, self._handle_shock_trigger),
+            "_IShock": (RISING, instant(1)),
+            "_IVibrate": (RISING, instant(2)),
+            "_ISound": (RISING, instant(3)),
+            "_CShock": (CHANGES, continuous(1)),
+            "_CVibrate": (CHANGES, continuous(2)),
+        }
+
+    def _update_shockosc_routes(self):
+        """Map the ShockOsc inputs for the configured groups, unmapping removed ones"""
+        wanted = {}
+        for group in self.shock_controller.config.get("groups", []):
+            for suffix, route in self._shockosc_actions(group).items():
+                wanted[f"/avatar/parameters/ShockOsc/{group}{suffix}"] = route
+        with self.router.batch():
+            for address in set(self._shockosc_routes) - set(wanted):
+                self.router.unmap(address, self._shockosc_routes.pop(address))
+            for address, (mode, handler) in wanted.items():
+                if address not in self._shockosc_routes:
+                    # OpenShock sends are queued, but cooldowns and the chatbox
+                    # callback still run here, so keep them off the receive loop
+                    self.router.map(address, handler, blocking=True, mode=mode)
+                    self._shockosc_routes[address] = handler
+        print(f"ShockOsc routes: {len(wanted)} addresses for "
+              f"{len(self.shock_controller.config.get('groups', []))} group(s)")
+
+    def _trigger_held_shock(self, group, address, started):
         """Trigger shock after hold time has been met"""
-        # Check if contact is still active
-        if group in self.contact_start_times:
+        # Check the same contact is still active (not released and touched again)
+        params = self.router.params
+        if params.get(address) and params.changed_at(address) == started:
             hold_time = self.app_config.get("shockosc", {}).get("hold_time", 0.5)
-            contact_duration = time.time() - self.contact_start_times[group]
+            contact_duration = clock.time() - started
             print(f"Hold time met for group: {group} (held for {contact_duration:.2f}s, required {hold_time}s)")
             
             # Send shock to the specific group
@@ -464,7 +693,7 @@ class VRChatMessenger:
             self.shock_hide_timer.cancel()
         
         # Set timer to hide shock info after 5 seconds
-        self.shock_hide_timer = threading.Timer(5.0, self._hide_shock_info)
+        self.shock_hide_timer = clock.timer(5.0, self._hide_shock_info)
         self.shock_hide_timer.start()
         
         # Request display update
@@ -520,7 +749,7 @@ class VRChatMessenger:
             self.internet_shock_hide_timer.cancel()
 
         # Set timer to hide internet shock info after 10 seconds
-        self.internet_shock_hide_timer = threading.Timer(10.0, self._hide_internet_shock_info)
+        self.internet_shock_hide_timer = clock.timer(10.0, self._hide_internet_shock_info)
         self.internet_shock_hide_timer.start()
 
         # Request display update
@@ -554,7 +783,7 @@ class VRChatMessenger:
         if self._stt_hide_timer:
             self._stt_hide_timer.cancel()
         if self.show_stt:
-            self._stt_hide_timer = threading.Timer(self.stt_final_linger, self._hide_stt)
+            self._stt_hide_timer = clock.timer(self.stt_final_linger, self._hide_stt)
             self._stt_hide_timer.start()
 
     def _hide_stt(self):
@@ -573,12 +802,93 @@ class VRChatMessenger:
         except Exception as e:
             print(f"Failed to send typing indicator: {e}")
 
+    @staticmethod
+    def _section(name):
+        """Mutable copy of one config section, for a controller to keep."""
+        return config_store.view(name).to_dict()
+
+    def _save_section(self, key, value):
+        if not self.offline:
+            config_store.save_section(key, value)
+
+    def _apply_section(self, section, section_config):
+        """Hand one config section to its controller and time the apply."""
+        controller = {
+            "shockosc": getattr(self, "shock_controller", None),
+            "slide": getattr(self, "slide_controller", None),
+            "shock_panel": getattr(self, "shock_panel_controller", None),
+            "whisper": getattr(self, "stt_controller", None),
+        }.get(section)
+        if controller is None:
+            return
+        t0 = time.perf_counter()
+        changes = controller.update_config(section_config)
+        if section == "shockosc" and changes and "groups" in changes:
+            self._update_shockosc_routes()
+        if changes:
+            self._refresh_oscquery()
+        dt = (time.perf_counter() - t0) * 1000
+        self.config_apply_ms[section] = dt
+        print(f"[TIMING] {section} config applied in {dt:.1f}ms")
+        return changes
+
+    def _on_config_file_changed(self, old, new):
+        """Hot-reload edits made to app_config.json outside the app.
+
+        new is the store's freshly loaded config, so everything is applied
+        from it and nothing is saved back."""
+        for section in ("shockosc", "slide", "shock_panel", "whisper"):
+            if not diff_config(old.get(section), new.get(section)):
+                continue
+            section_config = copy.deepcopy(new.get(section, {}))
+            if section == "whisper":
+                self._apply_whisper(section_config)
+            else:
+                self._apply_section(section, section_config)
+
+        if (diff_config(old.get("osc_output"), new.get("osc_output")) and not self.offline
+                and hasattr(self.client, "set_mirrors")):
+            self.client.set_mirrors(new.get("osc_output", {}).get("mirrors", []))
+
+        if diff_config(old.get("osc_relay"), new.get("osc_relay")) and not self.offline:
+            self._update_relay(new.get("osc_relay", {}))
+
+        if diff_config(old.get("avatars"), new.get("avatars")):
+            self._load_avatar_profiles()
+
+        restart = [k for k in ("joinmymusic", "osc_input", "oscquery")
+                   if diff_config(old.get(k), new.get(k))]
+        if restart:
+            print(f"Config change to {', '.join(restart)} takes effect after a restart")
+
+        top = diff_config(
+            {k: old.get(k) for k in ("show_music", "show_time", "messages")},
+            {k: new.get(k) for k in ("show_music", "show_time", "messages")},
+        )
+        if not top:
+            return
+        self.show_music = self.app_config.get("show_music", True)
+        self.show_time = self.app_config.get("show_time", True)
+        if "messages" in top:
+            reload_message_config()
+            self._refresh_active_messages()
+        self.request_display_update()
+
+    def _refresh_active_messages(self):
+        """Re-format every active message from the current templates."""
+        for category in list(self.active_messages):
+            if category in message_config:
+                self.active_messages[category]["message"] = self._format_message(
+                    message_config[category]["messages"][0]
+                )
+
     def update_whisper_config(self, whisper_config):
         """Update speech-to-text configuration"""
-        self.app_config["whisper"] = whisper_config
-        save_app_config(self.app_config)
-        if hasattr(self, 'stt_controller'):
-            self.stt_controller.update_config(whisper_config)
+        self._save_section("whisper", whisper_config)
+        self._apply_whisper(whisper_config)
+
+    def _apply_whisper(self, whisper_config):
+        self._apply_section("whisper", whisper_config)
         # If STT was just turned off, clear any transcription still on screen.
         if not whisper_config.get("enabled") and self.show_stt:
             self._hide_stt()
@@ -589,40 +899,39 @@ class VRChatMessenger:
             timer.cancel()
             print(f"Cleared hold timer for group: {group}")
         self.hold_timers.clear()
-        self.contact_start_times.clear()
 
     def update_shock_config(self, shock_config):
         """Update ShockOSC configuration"""
-        self.app_config["shockosc"] = shock_config
-        save_app_config(self.app_config)
-        self.shock_controller.update_config(shock_config)
+        self._save_section("shockosc", shock_config)
+        self._apply_section("shockosc", shock_config)
 
     def update_slide_config(self, slide_config):
         """Update Slide configuration"""
-        self.app_config["slide"] = slide_config
-        save_app_config(self.app_config)
-        if hasattr(self, 'slide_controller'):
-            self.slide_controller.update_config(slide_config)
+        self._save_section("slide", slide_config)
+        self._apply_section("slide", slide_config)
 
     def update_shock_panel_config(self, panel_config):
         """Update Shock Panel configuration"""
-        self.app_config["shock_panel"] = panel_config
-        save_app_config(self.app_config)
+        self._save_section("shock_panel", panel_config)
         if hasattr(self, 'shock_panel_controller'):
-            self.shock_panel_controller.update_config(panel_config)
+            self._apply_section("shock_panel", panel_config)
             # This path is only hit on explicit UI changes, so it's safe to push
             # our values to the avatar here (startup uses update_config directly).
+            # The panel's ParamSync only sends values the avatar doesn't have yet.
             self.shock_panel_controller.broadcast_all()
 
     def _on_shock_panel_state_change(self):
-        """Persist shock panel state changed via OSC (global intensities, per-entry enabled)."""
-        self.app_config["shock_panel"] = self.shock_panel_controller.config
-        save_app_config(self.app_config)
+        """Persist shock panel state changed via OSC (global intensities, per-entry enabled).
+
+        Runs for every slider packet, so only mark the section dirty; the
+        store copies it from the controller when it next needs it."""
+        if not self.offline:
+            config_store.defer_section("shock_panel", self.shock_panel_controller.export_config)
 
     def update_app_config(self, new_config):
         """Update full app configuration including messages"""
-        self.app_config.update(new_config)
-        save_app_config(self.app_config)
+        for key, value in new_config.items():
+            self._save_section(key, value)
         reload_message_config()  # Reload message templates from updated config
 
     def cleanup(self):
@@ -650,14 +959,39 @@ class VRChatMessenger:
         if getattr(self, '_stt_hide_timer', None):
             self._stt_hide_timer.cancel()
 
-        # Stop OSC server
+        # Stop OSC listener, then let queued blocking handlers finish
+        if getattr(self, 'oscquery', None):
+            self.oscquery.shutdown()
         if hasattr(self, 'server'):
             self.server.shutdown()
+        if self.relay:
+            for target in self.relay.get_stats():
+                print(f"OSC relay {target['target']}: {target['sent']} sent, "
+                      f"{target['filtered']} filtered, {target['errors']} errors")
+            self.relay.close()
+        if self.router.pool:
+            self.router.pool.shutdown()
+        health = self.get_input_health()
+        if health["kernel_drops"] or health["stream_gaps"]:
+            print(f"OSC input: {health['kernel_drops']} datagrams dropped by the OS, "
+                  f"{health['stream_gaps']} gaps in parameter streams")
+        stats = self.router.get_filter_stats()
+        if stats["skipped"]:
+            print(f"OSC change filter: {stats['delivered']} handler calls made, "
+                  f"{stats['skipped']} repeats skipped")
+
+        # Send whatever outbound OSC is still pending
+        if hasattr(self.client, "close"):
+            self.client.close()
 
         # Cleanly tear down the BLE heart-rate link so the sensor is free to
         # reconnect on the next launch.
         bpm_monitor.shutdown()
 
+        # Write out any config changes still waiting in the write-behind buffer.
+        if not self.offline:
+            config_store.shutdown()
+
     def request_display_update(self, force_for_shock=False, from_song_change=False):
         """Request a display update, respecting rate limits"""
         if self.show_shock_info and from_song_change:
@@ -742,15 +1076,13 @@ class VRChatMessenger:
     def toggle_music_display(self, show_music):
         """Toggle music display and save to config"""
         self.show_music = show_music
-        self.app_config["show_music"] = show_music
-        save_app_config(self.app_config)
+        self._save_section("show_music", show_music)
         self.request_display_update()
 
     def toggle_time_display(self, show_time):
         """Toggle time display and save to config"""
         self.show_time = show_time
-        self.app_config["show_time"] = show_time
-        save_app_config(self.app_config)
+        self._save_section("show_time", show_time)
         self.request_display_update()
 
 
@@ -758,12 +1090,31 @@ def main():
     import sys
 
     gui_mode = "--gui" in sys.argv or getattr(sys, "frozen", False)
+    if "--config-dir" in sys.argv:
+        idx = sys.argv.index("--config-dir")
+        if idx + 1 < len(sys.argv):
+            set_config_dir(sys.argv[idx + 1])
+    record_path = None
+    if "--record" in sys.argv:
+        idx = sys.argv.index("--record")
+        record_path = sys.argv[idx + 1] if idx + 1 < len(sys.argv) else "session.vrcrec"
+    stats_path = None
+    if "--osc-stats" in sys.argv:
+        idx = sys.argv.index("--osc-stats")
+        stats_path = sys.argv[idx + 1] if idx + 1 < len(sys.argv) else "osc_stats.json"
+
+    if record_path:
+        # Start before the messenger so its startup output is captured too;
+        # the replayer collects outputs from the same point.
+        input_recorder.start(record_path)
 
     try:
         vrc = VRChatMessenger()
     except OSError as e:
-        if e.winerror == 10048 or "address already in use" in str(e).lower():
-            msg = "Could not start: OSC port 9001 is already in use.\n\nAnother instance may already be running."
+        input_recorder.stop()
+        if getattr(e, "winerror", None) == 10048 or "address already in use" in str(e).lower():
+            port = getattr(e, "osc_port", 9001)
+            msg = f"Could not start: OSC port {port} is already in use.\n\nAnother instance may already be running."
             if gui_mode:
                 from PyQt6.QtWidgets import QApplication, QMessageBox
                 _app = QApplication.instance() or QApplication(sys.argv)
@@ -780,11 +1131,15 @@ def main():
             show_settings_gui(vrc)
         except ImportError:
             print("GUI not available (PyQt6 not installed). Run: pip install PyQt6")
+        finally:
+            input_recorder.stop()
+            if stats_path:
+                vrc.osc_stats.export(stats_path)
         return
 
     try:
         print("VRChat Dynamic Chat Message Sender running...")
-        print("Listening for boops on port 9001...")
+        print(f"Listening for boops on port {vrc.server.port}...")
         print("Run with --gui to open settings")
         print("Press Ctrl+C to exit")
         while True:
@@ -793,6 +1148,9 @@ def main():
         print("\nExiting...")
     finally:
         vrc.cleanup()
+        input_recorder.stop()
+        if stats_path:
+            vrc.osc_stats.export(stats_path)
 
 
 if __name__ == "__main__":
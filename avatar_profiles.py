@@ -0,0 +1,96 @@
+"""Per-avatar parameter profiles.
+
+A profile is the set of OSC parameter addresses an avatar actually has. They
+come from two places, checked in this order:
+
+1. ``avatars.profiles`` in app_config.json — ``{"avtr_...": {"name": "...",
+   "params": ["OSCBoop", "/avatar/parameters/ShockOsc/leftleg", ...]}}``.
+   Bare names are expanded to ``/avatar/parameters/<name>``.
+2. The OSC config files VRChat writes for every avatar you load, under
+   ``LocalLow/VRChat/VRChat/OSC/usr_*/Avatars/avtr_*.json``.
+
+Avatars with no profile keep the old behaviour: every route stays live.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+from osc_router import AVATAR_PARAM_PREFIX
+
+
+def vrchat_osc_dir():
+    """VRChat's OSC config directory, or None if it can't be located."""
+    override = os.environ.get("VRCHAT_OSC_DIR")
+    if override:
+        return Path(override)
+    if sys.platform == "win32":
+        return Path.home() / "AppData" / "LocalLow" / "VRChat" / "VRChat" / "OSC"
+    # Proton/Wine prefix used by Steam on Linux
+    proton = (Path.home() / ".steam" / "steam" / "steamapps" / "compatdata" / "438100"
+              / "pfx" / "drive_c" / "users" / "steamuser" / "AppData" / "LocalLow"
+              / "VRChat" / "VRChat" / "OSC")
+    return proton
+
+
+def _normalise(param):
+    return param if param.startswith("/") else AVATAR_PARAM_PREFIX + param
+
+
+def load_vrchat_avatar_file(path):
+    """Return (avatar_id, name, set_of_addresses) from a VRChat avatar OSC file."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        data = json.load(f)
+    params = set()
+    for p in data.get("parameters", []):
+        for direction in ("input", "output"):
+            address = (p.get(direction) or {}).get("address")
+            if address:
+                params.add(address)
+    return data.get("id") or Path(path).stem, data.get("name", ""), params
+
+
+def find_vrchat_avatar_file(avatar_id, osc_dir=None):
+    osc_dir = osc_dir or vrchat_osc_dir()
+    if not osc_dir or not osc_dir.is_dir():
+        return None
+    for user_dir in osc_dir.glob("usr_*"):
+        candidate = user_dir / "Avatars" / f"{avatar_id}.json"
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def scan_vrchat_avatars(osc_dir=None):
+    """All avatars VRChat has written OSC configs for: {avatar_id: (name, params)}."""
+    osc_dir = osc_dir or vrchat_osc_dir()
+    profiles = {}
+    if not osc_dir or not osc_dir.is_dir():
+        return profiles
+    for path in osc_dir.glob("usr_*/Avatars/*.json"):
+        try:
+            avatar_id, name, params = load_vrchat_avatar_file(path)
+        except (OSError, ValueError) as e:
+            print(f"Skipping avatar OSC config {path.name}: {e}")
+            continue
+        profiles[avatar_id] = (name, params)
+    return profiles
+
+
+def build_profiles(avatars_config):
+    """Merge VRChat's avatar files with configured overrides.
+
+    Returns {avatar_id: (name, frozenset_of_addresses)}."""
+    avatars_config = avatars_config or {}
+    profiles = {}
+    if avatars_config.get("use_vrchat_osc_configs", True):
+        for avatar_id, (name, params) in scan_vrchat_avatars().items():
+            profiles[avatar_id] = (name, frozenset(params))
+    for avatar_id, entry in (avatars_config.get("profiles") or {}).items():
+        params = entry.get("params")
+        if params is None:
+            continue
+        name = entry.get("name") or profiles.get(avatar_id, ("", None))[0]
+        profiles[avatar_id] = (name, frozenset(_normalise(p) for p in params))
+    return profiles
@@ -2,6 +2,8 @@ import asyncio
 import sys
 import threading
 
+from replay import input_recorder, KIND_BPM
+
 HR_SERVICE_UUID = "0000180d-0000-1000-8000-00805f9b34fb"
 HR_MEASUREMENT_UUID = "00002a37-0000-1000-8000-00805f9b34fb"
 
@@ -188,6 +190,8 @@ class BPMMonitor:
             self._status = "Disconnected"
 
     def _hr_handler(self, sender, data: bytearray):
+        if input_recorder.active:
+            input_recorder.record(KIND_BPM, bytes(data))
         flags = data[0]
         if flags & 0x01:
             bpm = int.from_bytes(data[1:3], byteorder='little')
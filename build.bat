@@ -13,7 +13,7 @@ taskkill /f /im VRCChatbox.exe >nul 2>&1
 
 echo Installing / updating dependencies...
 %VENV_DIR%\Scripts\python.exe -m pip install --upgrade pip
-%VENV_DIR%\Scripts\pip install python-osc PyQt6 requests websockets pyinstaller bleak faster-whisper sounddevice webrtcvad-wheels numpy nvidia-cublas-cu12 nvidia-cudnn-cu12 nvidia-cuda-runtime-cu12 nvidia-cuda-nvrtc-cu12
+%VENV_DIR%\Scripts\pip install python-osc PyQt6 requests websockets pyinstaller bleak zeroconf faster-whisper sounddevice webrtcvad-wheels numpy nvidia-cublas-cu12 nvidia-cudnn-cu12 nvidia-cuda-runtime-cu12 nvidia-cuda-nvrtc-cu12
 if errorlevel 1 ( echo Dependency install failed & pause & exit /b 1 )
 
 echo Building...
@@ -29,6 +29,7 @@ REM DLL search path at runtime. CPU still works as a fallback.
     --additional-hooks-dir pyinstaller_hooks ^
     --collect-all websockets ^
     --collect-all bleak ^
+    --collect-all zeroconf ^
     --collect-all faster_whisper ^
     --collect-all ctranslate2 ^
     --collect-all sounddevice ^
@@ -0,0 +1,56 @@
+"""Time source for the app's timers, cooldowns and rate limits.
+
+Everything that decides *when* something happens (hold timers, cooldowns,
+the chatbox rate limit, the outbound OSC tick, ParamSync's echo window) reads
+time and sleeps through ``clock`` instead of the time module. Live, it is the
+real clock. The replayer sets ``clock.set_speed(N)`` so a capture plays back N
+times faster with every one of those intervals shortened to match, and the
+outputs still line up with the recording.
+
+    clock.monotonic()               # like time.monotonic(), in scaled seconds
+    clock.sleep(0.5)                # half a scaled second
+    clock.timer(2.0, fn, [arg])     # unstarted threading.Timer
+    cond.wait(clock.real(timeout))  # scaled timeout for a blocking wait
+"""
+
+import threading
+import time
+
+
+class Clock:
+    def __init__(self):
+        self.speed = 1.0
+        self._real0 = time.monotonic()
+        self._mono0 = self._real0
+        self._wall0 = time.time()
+
+    def set_speed(self, speed):
+        """Run speed× faster from now on. Readings stay continuous across the change."""
+        speed = max(0.01, float(speed))
+        mono, wall = self.monotonic(), self.time()
+        self._real0 = time.monotonic()
+        self._mono0 = mono
+        self._wall0 = wall
+        self.speed = speed
+
+    def monotonic(self):
+        return self._mono0 + (time.monotonic() - self._real0) * self.speed
+
+    def time(self):
+        """Like time.time(), advancing at the clock's speed."""
+        return self._wall0 + (time.monotonic() - self._real0) * self.speed
+
+    def real(self, seconds):
+        """Real seconds for a scaled interval (None stays None)."""
+        return None if seconds is None else seconds / self.speed
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    def timer(self, interval, function, args=None, kwargs=None):
+        """threading.Timer firing after interval scaled seconds (not started)."""
+        return threading.Timer(interval / self.speed, function, args, kwargs)
+
+
+clock = Clock()
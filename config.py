@@ -1,15 +1,54 @@
+import atexit
+import copy
 import string
 import json
 import os
 import sys
 import shutil
+import threading
+import time
+from collections.abc import Mapping, MutableMapping
 from pathlib import Path
 
 
+APP_DIR_NAME = "VRCChatbox"
+CONFIG_DIR_ENV = "VRCCHATBOX_CONFIG_DIR"
+
+_config_dir = None  # resolved lazily on first use (or injected via set_config_dir)
+
+
+def set_config_dir(path):
+    """Point all config/data files at ``path`` (tests, portable installs).
+
+    Must be called before anything reads the config; pass None to go back to
+    the default lookup."""
+    global _config_dir
+    _config_dir = Path(path) if path is not None else None
+
+
+def _default_config_dir() -> Path:
+    """Resolve the per-user config dir without touching the filesystem.
+
+    Order: $VRCCHATBOX_CONFIG_DIR, %APPDATA% (Windows), ~/Library/Application
+    Support (macOS), then $XDG_CONFIG_HOME or ~/.config (Linux and others)."""
+    override = os.environ.get(CONFIG_DIR_ENV)
+    if override:
+        return Path(override)
+    appdata = os.environ.get("APPDATA")
+    if appdata:
+        return Path(appdata) / APP_DIR_NAME
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Application Support" / APP_DIR_NAME
+    xdg = os.environ.get("XDG_CONFIG_HOME")
+    return Path(xdg or Path.home() / ".config") / APP_DIR_NAME
+
+
 def get_config_dir() -> Path:
-    d = Path(os.environ["APPDATA"]) / "VRCChatbox"
-    d.mkdir(parents=True, exist_ok=True)
-    return d
+    global _config_dir
+    if _config_dir is None:
+        _config_dir = _default_config_dir()
+    _config_dir.mkdir(parents=True, exist_ok=True)
+    return _config_dir
 
 
 def _config_path(filename: str) -> Path:
@@ -70,10 +109,12 @@ def get_default_message_config():
         },
     }
 
-def load_app_config():
-    """Load application configuration from config.json"""
-    config_file = _config_path("app_config.json")
-    default_config = {
+# Default app configuration. It doubles as the merge schema: nested dicts are
+# merged key-by-key with the user's file so new fields appear automatically,
+# while lists and scalars from the user's file replace the default outright.
+def get_default_app_config():
+    """Get default application configuration"""
+    return {
         "show_music": True,
         "show_time": True,
         "messages": get_default_message_config(),
@@ -129,78 +170,397 @@ def load_app_config():
             "partial_interval": 0.8,     # seconds between live partial transcriptions
             "max_chars": 120,            # max characters for the transcription line
             "aggressiveness": 2,         # WebRTC VAD aggressiveness (0-3)
+        },
+        "avatars": {
+            "enabled": True,                 # route parameters per worn avatar
+            "use_vrchat_osc_configs": True,  # read VRChat's per-avatar OSC files
+            "profiles": {},                  # {"avtr_...": {"name": str, "params": [...]}}
+        },
+        "osc_input": {
+            "receive_buffer": 1048576,  # SO_RCVBUF bytes for the OSC listener socket
+        },
+        "osc_output": {
+            # Extra destinations for outbound OSC (second client, overlay):
+            # [{"host": "127.0.0.1", "port": 9010, "max_packets_per_sec": 50, "filters": ["/chatbox/"]}]
+            "mirrors": [],
+        },
+        "osc_relay": {
+            "enabled": False,  # forward inbound OSC to other local apps
+            "targets": [],     # [{"host": "127.0.0.1", "port": 9002, "filters": ["/avatar/parameters/"]}]
+        },
+        "oscquery": {
+            "enabled": False,      # advertise over OSCQuery so VRChat only sends routed paths
+            "name": "VRCChatbox",  # service name VRChat sees
+            "osc_port": 0,         # UDP port to listen on instead of 9001 (0 = any free port)
+            "http_port": 0,        # OSCQuery HTTP port (0 = any free port)
         }
     }
 
-    if os.path.exists(config_file):
+
+def merge_config(default, user):
+    """Recursively overlay ``user`` onto ``default``, returning a new dict.
+
+    Keys missing from ``user`` take the default; keys only in ``user`` are
+    kept. Only dict-vs-dict pairs recurse — anything else is taken from
+    ``user`` as-is."""
+    merged = copy.deepcopy(default)
+    for key, value in user.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def diff_config(old, new, partial=False):
+    """Return {key: (old_value, new_value)} for top-level keys that differ.
+
+    With ``partial`` only keys present in ``new`` are compared, matching
+    dict.update() semantics. Missing values are reported as None."""
+    old = old or {}
+    new = new or {}
+    keys = new.keys() if partial else old.keys() | new.keys()
+    return {
+        key: (old.get(key), new.get(key))
+        for key in keys
+        if key not in old or key not in new or old[key] != new[key]
+    }
+
+
+SECRET_KEYS = {"openshock_token"}
+
+
+def format_changes(changes):
+    """Short, log-safe summary of a diff_config() result."""
+    parts = []
+    for key in sorted(changes):
+        old, new = changes[key]
+        if key in SECRET_KEYS:
+            parts.append(f"{key} changed")
+        elif isinstance(old, (dict, list)) or isinstance(new, (dict, list)):
+            parts.append(f"{key} changed")
+        else:
+            parts.append(f"{key}: {old!r} -> {new!r}")
+    return ", ".join(parts) or "no changes"
+
+
+def _freeze(value, store, path):
+    if isinstance(value, dict):
+        return ConfigView(store, path)
+    if isinstance(value, list):
+        return tuple(_freeze(v, store, path + (i,)) for i, v in enumerate(value))
+    return value
+
+
+class ConfigView(Mapping):
+    """Read-only window onto a section of the shared config.
+
+    The path is resolved against the store on every access, so a view handed
+    out at startup keeps tracking the config across reloads."""
+
+    __slots__ = ("_store", "_path")
+
+    def __init__(self, store, path=()):
+        self._store = store
+        self._path = tuple(path)
+
+    def _data(self):
+        data = self._store.get()
+        for key in self._path:
+            try:
+                data = data[key]
+            except (KeyError, IndexError, TypeError):
+                return {}
+        return data if isinstance(data, dict) else {}
+
+    def __getitem__(self, key):
+        return _freeze(self._data()[key], self._store, self._path + (key,))
+
+    def __iter__(self):
+        return iter(self._data())
+
+    def __len__(self):
+        return len(self._data())
+
+    def to_dict(self):
+        """Mutable deep copy of this section."""
+        return copy.deepcopy(self._data())
+
+    def __repr__(self):
+        return f"ConfigView({'/'.join(map(str, self._path)) or '<root>'})"
+
+
+class ConfigStore:
+    """Process-wide app configuration, parsed once and cached.
+
+    The file is only re-read when its mtime/size change. ``view()`` hands out
+    live read-only views, which is how the running app reads its settings;
+    ``snapshot()`` returns a private mutable copy for editors (the GUI) that
+    change it and ``save()`` it back. Code that changes one section saves just
+    that with ``save_section()``.
+
+    Saves are write-behind: the cache updates immediately, and every save made
+    within ``write_delay`` seconds of the first is coalesced into one atomic
+    write (temp file + rename). Dragging a slider therefore costs one disk
+    write, not hundreds. Changes made at packet rate use ``defer_section()``,
+    which copies the section once when it is next read or written rather
+    than on every change."""
+
+    def __init__(self, filename="app_config.json", write_delay=1.0):
+        self._filename = filename
+        self._config = None
+        self._stat_key = None
+        self._lock = threading.RLock()
+        self.version = 0  # bumped whenever the cached config changes
+
+        self.write_delay = write_delay
+        self._dirty = False
+        self._write_timer = None
+        self._deferred = {}     # key -> source() giving its value, read when next needed
+        self._pinned = False    # serving a fixed config from memory (replay)
+        self._write_lock = threading.Lock()    # one disk write at a time
+        self.saves_requested = 0
+        self.writes = 0
+
+        # External-edit watcher
+        self._listeners = []
+        self._watch_thread = None
+        self._watching = False
+
+    @property
+    def path(self):
+        return _config_path(self._filename)
+
+    def _file_key(self, path):
         try:
-            with open(config_file, 'r') as f:
-                user_config = json.load(f)
-
-                # Merge with defaults to ensure all required fields exist
-                merged_config = default_config.copy()
-                merged_config.update(user_config)
-
-                # Deep merge the shockosc config to ensure new fields are added
-                if "shockosc" in user_config and "shockosc" in default_config:
-                    default_shockosc = default_config["shockosc"].copy()
-                    default_shockosc.update(user_config["shockosc"])
-                    merged_config["shockosc"] = default_shockosc
-
-                # Deep merge the slide config to ensure new fields are added
-                if "slide" in user_config and "slide" in default_config:
-                    default_slide = default_config["slide"].copy()
-                    default_slide.update(user_config["slide"])
-                    merged_config["slide"] = default_slide
-
-                # Deep merge the joinmymusic config to ensure new fields are added
-                if "joinmymusic" in default_config:
-                    default_jmm = default_config["joinmymusic"].copy()
-                    default_jmm.update(user_config.get("joinmymusic", {}))
-                    merged_config["joinmymusic"] = default_jmm
-
-                # Deep merge shock_panel config
-                if "shock_panel" in default_config:
-                    default_sp = default_config["shock_panel"].copy()
-                    default_sp.update(user_config.get("shock_panel", {}))
-                    merged_config["shock_panel"] = default_sp
-
-                # Deep merge bpm config
-                if "bpm" in default_config:
-                    default_bpm = default_config["bpm"].copy()
-                    default_bpm.update(user_config.get("bpm", {}))
-                    merged_config["bpm"] = default_bpm
-
-                # Deep merge whisper config
-                if "whisper" in default_config:
-                    default_whisper = default_config["whisper"].copy()
-                    default_whisper.update(user_config.get("whisper", {}))
-                    merged_config["whisper"] = default_whisper
-
-                # Ensure messages section exists and merge with defaults
-                if "messages" not in merged_config:
-                    merged_config["messages"] = get_default_message_config()
-                else:
-                    # Merge user messages with defaults to ensure all message types exist
-                    default_messages = get_default_message_config()
-                    for key, value in default_messages.items():
-                        if key not in merged_config["messages"]:
-                            merged_config["messages"][key] = value
-
-                return merged_config
-        except (json.JSONDecodeError, IOError):
-            return default_config
-    return default_config
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def refresh(self):
+        """Re-parse the file if it changed on disk. Returns True if it did."""
+        if self._pinned:
+            return False
+        path = self.path
+        key = self._file_key(path)
+        with self._lock:
+            if self._config is not None and key == self._stat_key:
+                return False
+            # A save we haven't written yet wins over whatever is on disk.
+            if self._dirty:
+                return False
+            old = self._config
+            user_config = {}
+            if key is not None:
+                try:
+                    with open(path, 'r') as f:
+                        user_config = json.load(f)
+                except (json.JSONDecodeError, IOError):
+                    user_config = {}
+            if not isinstance(user_config, dict):
+                user_config = {}
+            self._config = merge_config(get_default_app_config(), user_config)
+            self._stat_key = key
+            self.version += 1
+            new = self._config
+        if old is not None:
+            print("Config file changed on disk, reloading")
+            for listener in list(self._listeners):
+                try:
+                    listener(old, new)
+                except Exception as e:
+                    print(f"Config listener error: {e}")
+        return True
+
+    def pin(self, config):
+        """Serve config from memory only, with no file reads or writes (replay
+        runs against the config a capture was made with). pin(None) goes back
+        to the file."""
+        with self._lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+            self._deferred.clear()
+            self._dirty = False
+            self._pinned = config is not None
+            self._config = merge_config(get_default_app_config(), config) if self._pinned else None
+            self._stat_key = None
+            self.version += 1
+
+    def add_listener(self, callback):
+        """Register callback(old_config, new_config) for external file edits."""
+        self._listeners.append(callback)
+
+    def start_watching(self, interval=1.0):
+        """Poll the config file for external edits in a background thread."""
+        if self._watching:
+            return
+        self._watching = True
+
+        def _watch():
+            while self._watching:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Config watch error: {e}")
+
+        self._watch_thread = threading.Thread(target=_watch, daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self):
+        self._watching = False
+
+    def get(self):
+        """The cached merged config. Treat as read-only."""
+        if self._config is None:
+            self.refresh()
+        if self._deferred:
+            with self._lock:
+                self._resolve_deferred()
+        return self._config
+
+    def view(self, *path):
+        return ConfigView(self, path)
+
+    def snapshot(self):
+        self.refresh()
+        with self._lock:
+            return copy.deepcopy(self.get())
+
+    def save(self, config):
+        """Make config the cached copy and schedule it to be written."""
+        with self._lock:
+            self._config = merge_config(get_default_app_config(), config)
+            self.version += 1
+            self.saves_requested += 1
+            self._dirty = True
+            self._schedule_write()
+
+    def save_section(self, key, value):
+        """Replace one top-level key (a section, or a flag like show_time) and
+        schedule a write. Only that key is merged with its defaults."""
+        default = get_default_app_config().get(key)
+        if isinstance(default, dict) and isinstance(value, Mapping):
+            value = merge_config(default, value)
+        else:
+            value = copy.deepcopy(value)
+        self.get()
+        with self._lock:
+            self._deferred.pop(key, None)
+            self._config = {**self._config, key: value}
+            self.version += 1
+            self.saves_requested += 1
+            self._dirty = True
+            self._schedule_write()
+
+    def defer_section(self, key, source):
+        """Mark key changed without copying anything yet.
+
+        source() must return a private copy of the key's value; it is called
+        when the config is next read or written, so a burst of changes (a
+        slider being dragged) costs one copy instead of one per change."""
+        if self._config is None:
+            self.refresh()  # something to fold the section into
+        with self._lock:
+            self._deferred[key] = source
+            self.saves_requested += 1
+            self._dirty = True
+            self._schedule_write()
+
+    def _resolve_deferred(self):
+        """Fold deferred sections into the cached config (lock held)."""
+        if not self._deferred:
+            return
+        deferred, self._deferred = self._deferred, {}
+        config = dict(self._config)
+        defaults = get_default_app_config()
+        for key, source in deferred.items():
+            value = source()
+            if isinstance(defaults.get(key), dict) and isinstance(value, Mapping):
+                value = merge_config(defaults[key], value)
+            config[key] = value
+        self._config = config
+        self.version += 1
+
+    def _schedule_write(self):
+        """Start the write-behind timer unless one is pending (lock held)."""
+        if self._write_timer is None:
+            self._write_timer = threading.Timer(self.write_delay, self.flush)
+            self._write_timer.daemon = True
+            self._write_timer.start()
+
+    def flush(self):
+        """Write any pending changes now. Safe to call at any time.
+
+        The config is taken under the lock and written outside it, so saves
+        and reads never wait on the disk; ``_write_lock`` keeps writes in
+        order. A save made during the write marks the store dirty again and
+        gets its own write. A failed write stays pending and is retried."""
+        with self._write_lock:
+            with self._lock:
+                if self._write_timer is not None:
+                    self._write_timer.cancel()
+                    self._write_timer = None
+                if not self._dirty or self._pinned:
+                    self._dirty = False
+                    return
+                self._resolve_deferred()
+                self._dirty = False
+                data = self._config     # saves replace it, never mutate it
+            path = self.path
+            tmp = path.with_name(path.name + ".tmp")
+            try:
+                with open(tmp, 'w') as f:
+                    json.dump(data, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, path)
+            except OSError as e:
+                print(f"Failed to save config: {e}")
+                with self._lock:
+                    self._dirty = True
+                    self._schedule_write()
+                return
+            key = self._file_key(path)
+            with self._lock:
+                self.writes += 1
+                self._stat_key = key
+
+    def get_stats(self):
+        """Persistence counters: saves requested, disk writes, writes avoided."""
+        with self._lock:
+            return {
+                "saves_requested": self.saves_requested,
+                "writes": self.writes,
+                "writes_avoided": max(0, self.saves_requested - self.writes - self._dirty),
+                "pending": self._dirty,
+            }
+
+    def shutdown(self):
+        """Flush pending changes and report how many writes were coalesced."""
+        self.stop_watching()
+        self.flush()
+        stats = self.get_stats()
+        if stats["saves_requested"]:
+            print(f"Config persisted: {stats['writes']} write(s) for "
+                  f"{stats['saves_requested']} save(s), {stats['writes_avoided']} avoided")
+
+
+config_store = ConfigStore()
+# Last-chance flush in case the host app exits without calling shutdown().
+atexit.register(config_store.flush)
+
+
+def load_app_config():
+    """Load application configuration (a private, mutable copy)"""
+    return config_store.snapshot()
 
 
 def save_app_config(config):
     """Save application configuration to config.json"""
-    config_file = _config_path("app_config.json")
-    try:
-        with open(config_file, 'w') as f:
-            json.dump(config, f, indent=2)
-    except IOError as e:
-        print(f"Failed to save config: {e}")
+    config_store.save(config)
 
 
 def extract_placeholders(messages):
@@ -215,22 +575,60 @@ def extract_placeholders(messages):
     return list(placeholders)
 
 
-def reload_message_config():
-    """Reload message configuration from the config file"""
-    global message_config
-    _app_config = load_app_config()
-    message_config = _app_config.get("messages", get_default_message_config())
-
+def _build_message_config(app_config):
+    messages = copy.deepcopy(app_config.get("messages", get_default_message_config()))
     all_messages = [
-        msg for config in message_config.values() for msg in config.get("messages", [])
+        msg for config in messages.values() for msg in config.get("messages", [])
     ]
-    message_config["placeholders"] = extract_placeholders(all_messages)
+    messages["placeholders"] = extract_placeholders(all_messages)
+    return messages
+
+
+class _MessageConfig(MutableMapping):
+    """Message templates plus their placeholder list, loaded on first access.
+
+    A stable object rather than a plain dict so ``from config import
+    message_config`` is free at import time and still sees later reloads."""
+
+    def __init__(self):
+        self._data = None
+
+    def _loaded(self):
+        if self._data is None:
+            reload_message_config()
+        return self._data
+
+    def __getitem__(self, key):
+        return self._loaded()[key]
+
+    def __setitem__(self, key, value):
+        self._loaded()[key] = value
+
+    def __delitem__(self, key):
+        del self._loaded()[key]
+
+    def __iter__(self):
+        return iter(self._loaded())
+
+    def __len__(self):
+        return len(self._loaded())
+
+    def __repr__(self):
+        return repr(self._loaded())
+
+
+_message_config_version = None
+
+
+def reload_message_config():
+    """Reload message configuration from the config file"""
+    global _message_config_version
+    config_store.refresh()
+    if config_store.version == _message_config_version and message_config._data is not None:
+        return
+    message_config._data = _build_message_config(config_store.get())
+    _message_config_version = config_store.version
 
-# Load configuration and set up message_config
-_app_config = load_app_config()
-message_config = _app_config.get("messages", get_default_message_config())
 
-all_messages = [
-    msg for config in message_config.values() for msg in config.get("messages", [])
-]
-message_config["placeholders"] = extract_placeholders(all_messages)
+# Nothing is read from disk until the first lookup.
+message_config = _MessageConfig()
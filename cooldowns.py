@@ -0,0 +1,162 @@
+"""Cooldowns for shock groups and individual shockers.
+
+Every cooldown is a key (``("group", "leftleg")``, ``("shocker", id)``)
+with an end time. Checks are one dict lookup and a comparison, so nothing has
+to run when a cooldown ends just to make ``active()`` right. Ends are also
+kept in a heap, and one thread pops whatever has expired: it prunes the
+entry and tells ``on_expire``. A restarted or cleared cooldown leaves its old
+heap entry behind, which is skipped when it comes up.
+
+Cooldowns started with ``report=True`` also get progress output: while any
+are running the thread wakes every ``interval`` seconds and passes the
+remaining fraction (1 → 0) to ``on_progress``. The fraction is rounded up to
+a fixed number of steps, each at least two wake-ups long, so it changes at a
+bounded rate and a cooldown of a given length always reports the same
+values.
+"""
+
+import heapq
+import itertools
+import math
+import threading
+
+from clock import clock
+
+_MAX_STEPS = 20
+
+
+class _Cooldown:
+    __slots__ = ("start", "end", "steps", "reported")
+
+    def __init__(self, start, end, steps):
+        self.start = start
+        self.end = end
+        self.steps = steps          # progress resolution, 0 = not reported
+        self.reported = 1.0         # last fraction passed to on_progress
+
+    def level(self, now):
+        """Remaining fraction, rounded up to a step."""
+        duration = self.end - self.start
+        if duration <= 0 or now >= self.end:
+            return 0.0
+        return math.ceil((self.end - now) / duration * self.steps) / self.steps
+
+
+class CooldownManager:
+    def __init__(self, on_progress=None, on_expire=None, interval=0.1):
+        """
+        Args:
+            on_progress: on_progress(key, fraction) for reported cooldowns
+            on_expire: on_expire(key) when a cooldown runs out (not when cleared)
+            interval: seconds between progress updates
+        """
+        self.on_progress = on_progress
+        self.on_expire = on_expire
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._entries = {}          # key -> _Cooldown
+        self._reporting = {}        # key -> _Cooldown, the reported subset
+        self._heap = []             # (end, seq, key); stale entries skipped lazily
+        self._seq = itertools.count()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="cooldowns", daemon=True)
+        self._thread.start()
+
+    # ── changes ──────────────────────────────────────────────────────────────
+
+    def start(self, key, duration, report=False):
+        """(Re)start key's cooldown for duration seconds."""
+        now = clock.monotonic()
+        steps = max(1, min(_MAX_STEPS, int(duration / (2 * self.interval)))) if report else 0
+        entry = _Cooldown(now, now + duration, steps)
+        with self._cond:
+            self._entries[key] = entry
+            if report:
+                self._reporting[key] = entry
+            else:
+                self._reporting.pop(key, None)
+            heapq.heappush(self._heap, (entry.end, next(self._seq), key))
+            self._cond.notify()
+
+    def clear(self, key):
+        """End key's cooldown now, without on_expire. Returns True if it was active."""
+        with self._cond:
+            entry = self._entries.pop(key, None)
+            self._reporting.pop(key, None)
+        return entry is not None and clock.monotonic() < entry.end
+
+    # ── checks (any thread) ──────────────────────────────────────────────────
+
+    def active(self, key):
+        entry = self._entries.get(key)
+        return entry is not None and clock.monotonic() < entry.end
+
+    def remaining(self, key):
+        """Seconds left on key's cooldown (0.0 if none)."""
+        entry = self._entries.get(key)
+        return max(0.0, entry.end - clock.monotonic()) if entry is not None else 0.0
+
+    def active_keys(self, kind=None):
+        """Keys currently cooling down, optionally only those whose key[0] is kind."""
+        now = clock.monotonic()
+        with self._cond:
+            return [k for k, e in self._entries.items()
+                    if now < e.end and (kind is None or k[0] == kind)]
+
+    # ── expiry / progress thread ─────────────────────────────────────────────
+
+    def _prune(self, now):
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            end, _, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            if entry is not None and entry.end == end:
+                del self._entries[key]
+                self._reporting.pop(key, None)
+                expired.append(key)
+        return expired
+
+    def _progress(self, now):
+        changed = []
+        for key, entry in self._reporting.items():
+            level = entry.level(now)
+            if level != entry.reported:
+                entry.reported = level
+                changed.append((key, level))
+        return changed
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    now = clock.monotonic()
+                    expired = self._prune(now)
+                    progress = self._progress(now)
+                    if expired or progress:
+                        break
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    if self._reporting:
+                        timeout = self.interval if timeout is None else min(timeout, self.interval)
+                    self._cond.wait(clock.real(timeout))
+            for key, level in progress:
+                if self.on_progress:
+                    self._call(self.on_progress, key, level)
+            for key in expired:
+                if self.on_expire:
+                    self._call(self.on_expire, key)
+
+    @staticmethod
+    def _call(callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"Cooldown callback error: {e}")
+
+    def shutdown(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
@@ -1,6 +1,6 @@
+import copy
 import sys
 import uuid
-import queue
 import threading
 from datetime import datetime
 import requests
@@ -11,12 +11,13 @@ from PyQt6.QtWidgets import (
     QRadioButton, QSpinBox, QDoubleSpinBox, QAbstractSpinBox, QLineEdit,
     QComboBox, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
     QDialog, QDialogButtonBox, QAbstractItemView, QButtonGroup, QFrame,
-    QSizePolicy, QScrollArea, QInputDialog,
+    QSizePolicy, QScrollArea, QInputDialog, QFileDialog,
 )
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject
 from PyQt6.QtGui import QPalette, QColor
 
-from config import load_app_config, save_app_config
+from clock import clock
+from config import load_app_config, config_store, diff_config
 from shock_panel import osc_safe_name
 from bpm import bpm_monitor, BLEAK_AVAILABLE
 from whisper_stt import (
@@ -263,7 +264,11 @@ class VRCChatboxGUI(QMainWindow):
         super().__init__()
         self.messenger = messenger
         self.config = load_app_config()
+        self._saved = copy.deepcopy(self.config)  # what self.config was last synced to
         self._bridge = _Bridge()
+        # External edits to app_config.json (picked up by the store's watcher)
+        config_store.add_listener(
+            lambda old, new: self._bridge.run_in_main(self._reload_config))
 
         self.app.setStyle("Fusion")
         self.app.setPalette(_make_palette())
@@ -363,19 +368,53 @@ class VRCChatboxGUI(QMainWindow):
         osc_idx = len(self._nav_btns) - 1
         if prev == osc_idx and index != osc_idx:
             self._osc_timer.stop()
-            if self.messenger:
-                self.messenger.set_monitor_callback(None)
         self._stack.setCurrentIndex(index)
         self._nav_btns[index].setChecked(True)
         if index == osc_idx and prev != osc_idx:
-            if self.messenger:
-                self.messenger.set_monitor_callback(self._on_osc_message)
+            self._osc_version = None
+            self._osc_health = None
             self._osc_timer.start()
 
     def _set_status(self, text, ms=2500):
         self.status_label.setText(text)
         QTimer.singleShot(ms, lambda: self.status_label.setText(""))
 
+    # ── Config sync ────────────────────────────────────────────────────────
+
+    def _save_config(self):
+        """Save what was edited here on top of the store's current config.
+
+        Only keys that differ from what this window last loaded or saved are
+        written, so changes made elsewhere in the meantime (an external edit,
+        ShockPanel sliders moved in VRChat) are kept rather than reverted."""
+        current = config_store.snapshot()
+        for key, (old, new) in diff_config(self._saved, self.config).items():
+            if key not in self.config:
+                current.pop(key, None)
+            elif isinstance(old, dict) and isinstance(new, dict) and isinstance(current.get(key), dict):
+                for sub, (_, value) in diff_config(old, new).items():
+                    if sub in new:
+                        current[key][sub] = copy.deepcopy(value)
+                    else:
+                        current[key].pop(sub, None)
+            else:
+                current[key] = copy.deepcopy(new)
+        config_store.save(current)
+        self._adopt(current)
+
+    def _adopt(self, config):
+        """Bring self.config in line with config (a private copy we may keep)."""
+        for key in [k for k in self.config if k not in config]:
+            del self.config[key]
+        for key, value in config.items():
+            if self.config.get(key) != value:
+                self.config[key] = value
+        self._saved = copy.deepcopy(config)
+
+    def _reload_config(self):
+        self._adopt(config_store.snapshot())
+        self._set_status("Config reloaded from disk")
+
     # ── General page ───────────────────────────────────────────────────────
 
     def _build_general_page(self):
@@ -527,6 +566,15 @@ class VRCChatboxGUI(QMainWindow):
         token_row.addWidget(self.token_entry, stretch=1)
         og.addLayout(token_row)
 
+        # Live gateway status, pushed by the controller on every state change
+        self.gateway_status_lbl = _label("", "field_label")
+        og.addWidget(self.gateway_status_lbl)
+        ctrl = getattr(self.messenger, "shock_controller", None)
+        if ctrl is not None:
+            ctrl.set_connection_state_callback(
+                lambda state: self._bridge.run_in_main(self._refresh_gateway_status))
+        self._refresh_gateway_status()
+
         self.discover_button = QPushButton("Discover Shockers")
         self.discover_button.setFixedWidth(200)
         self.discover_button.clicked.connect(self.discover_shockers)
@@ -838,7 +886,7 @@ class VRCChatboxGUI(QMainWindow):
 
     def on_shock_panel_settings_change(self, *_):
         self.config.setdefault("shock_panel", {})["enabled"] = self.panel_enabled_cb.isChecked()
-        save_app_config(self.config)
+        self._save_config()
         self._update_shock_panel_controller()
         s = "enabled" if self.config["shock_panel"]["enabled"] else "disabled"
         self._set_status(f"Shock Panel {s}")
@@ -849,7 +897,7 @@ class VRCChatboxGUI(QMainWindow):
             data = dlg.get_data()
             data["id"] = str(uuid.uuid4())
             self.config.setdefault("shock_panel", {}).setdefault("entries", []).append(data)
-            save_app_config(self.config)
+            self._save_config()
             self.refresh_panel_display()
             self._update_shock_panel_controller()
             self._set_status("Entry added")
@@ -866,7 +914,7 @@ class VRCChatboxGUI(QMainWindow):
             data = dlg.get_data()
             data["id"] = entries[idx]["id"]
             entries[idx] = data
-            save_app_config(self.config)
+            self._save_config()
             self.refresh_panel_display()
             self._update_shock_panel_controller()
             self._set_status("Entry updated")
@@ -882,7 +930,7 @@ class VRCChatboxGUI(QMainWindow):
         entries = self.config.get("shock_panel", {}).get("entries", [])
         if idx < len(entries):
             del entries[idx]
-            save_app_config(self.config)
+            self._save_config()
             self.refresh_panel_display()
             self._update_shock_panel_controller()
             self._set_status("Entry removed")
@@ -935,7 +983,7 @@ class VRCChatboxGUI(QMainWindow):
         sp["intensity_min"] = self.panel_min_spinbox.value()
         sp["intensity_max"] = self.panel_max_spinbox.value()
         sp["duration"] = round(self.panel_duration_spinbox.value(), 1)
-        save_app_config(self.config)
+        self._save_config()
         self._update_shock_panel_controller()
 
     def _on_panel_enabled_toggled(self, eid, checked):
@@ -944,7 +992,7 @@ class VRCChatboxGUI(QMainWindow):
             if e.get("id") == eid:
                 e["enabled"] = checked
                 break
-        save_app_config(self.config)
+        self._save_config()
         self._update_shock_panel_controller()
         self._set_status(f"Entry {'enabled' if checked else 'disabled'}")
 
@@ -1149,7 +1197,7 @@ class VRCChatboxGUI(QMainWindow):
             "device_address": addr,
             "device_name": name,
         })
-        save_app_config(self.config)
+        self._save_config()
         bpm_monitor.connect(addr)
 
     def _bpm_disconnect(self):
@@ -1157,7 +1205,7 @@ class VRCChatboxGUI(QMainWindow):
 
     def _on_bpm_enabled_change(self, checked):
         self.config.setdefault("bpm", {})["enabled"] = checked
-        save_app_config(self.config)
+        self._save_config()
         if checked:
             addr = self.config.get("bpm", {}).get("device_address", "")
             if addr:
@@ -1368,7 +1416,7 @@ class VRCChatboxGUI(QMainWindow):
             "max_chars":        int(self.stt_maxchars_spinbox.value()),
             "aggressiveness":   int(self.stt_vad_spinbox.value()),
         })
-        save_app_config(self.config)
+        self._save_config()
         if self.messenger and hasattr(self.messenger, "update_whisper_config"):
             self.messenger.update_whisper_config(self.config["whisper"])
         s = "enabled" if self.config["whisper"]["enabled"] else "disabled"
@@ -1377,8 +1425,14 @@ class VRCChatboxGUI(QMainWindow):
     # ── OSC Monitor page ───────────────────────────────────────────────────
 
     def _build_osc_monitor_page(self):
-        self._osc_queue = queue.Queue()
-        self._osc_params = {}  # {address: (display_value, type_str, datetime)}
+        # Values are read straight from the router's parameter store
+        self._osc_version = None  # store version the table was last built from
+        self._osc_paths = []    # paths in the table's rows, in order
+        self._osc_shown = {}    # address -> what its row currently shows
+        self._osc_cleared_at = 0.0  # rows not updated since Clear are hidden
+        self._osc_rates = {}    # address -> OSCStats snapshot row, refreshed every second
+        self._osc_health = None  # get_input_health(), refreshed every second
+        self._osc_ticks = 0
 
         self._osc_timer = QTimer()
         self._osc_timer.setInterval(100)
@@ -1409,19 +1463,24 @@ class VRCChatboxGUI(QMainWindow):
         copy_btn.clicked.connect(self._copy_osc_path)
         toolbar.addWidget(copy_btn)
 
+        export_btn = QPushButton("Export Stats")
+        export_btn.setToolTip("Save per-address rates and handler timings as JSON")
+        export_btn.clicked.connect(self._export_osc_stats)
+        toolbar.addWidget(export_btn)
+
         clear_btn = QPushButton("Clear")
         clear_btn.clicked.connect(self._clear_osc_monitor)
         toolbar.addWidget(clear_btn)
 
         layout.addLayout(toolbar)
 
-        self._osc_table = QTableWidget(0, 4)
-        self._osc_table.setHorizontalHeaderLabels(["OSC Path", "Value", "Type", "Updated"])
+        self._osc_table = QTableWidget(0, 6)
+        self._osc_table.setHorizontalHeaderLabels(
+            ["OSC Path", "Value", "Type", "Updated", "Rate", "Handler ms/s"])
         oh = self._osc_table.horizontalHeader()
         oh.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
-        oh.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        oh.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
-        oh.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
+        for col in range(1, 6):
+            oh.setSectionResizeMode(col, QHeaderView.ResizeMode.ResizeToContents)
         self._osc_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self._osc_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self._osc_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
@@ -1431,19 +1490,73 @@ class VRCChatboxGUI(QMainWindow):
 
         layout.addWidget(_label("Double-click or select a row and press Copy Path to copy the OSC path.", "field_label"))
 
-        return page
+        # Change filter stats: how many handler calls repeated values didn't cost
+        self._osc_filter_lbl = QLabel("")
+        self._osc_filter_lbl.setObjectName("field_label")
+        layout.addWidget(self._osc_filter_lbl)
 
-    def _on_osc_message(self, address, args):
-        value = args[0] if len(args) == 1 else list(args)
-        self._osc_queue.put((address, value, datetime.now()))
+        return page
 
     def _osc_monitor_tick(self):
-        updated = False
-        while True:
-            try:
-                address, value, ts = self._osc_queue.get_nowait()
-            except queue.Empty:
-                break
+        if not self.messenger:
+            return
+        params = self.messenger.router.params
+        updated = params.version != self._osc_version
+        self._osc_version = params.version
+        # Rates are worked out from one-second snapshots of the counters
+        self._osc_ticks += 1
+        if self._osc_ticks % 10 == 0:
+            self._osc_rates = self.messenger.osc_stats.snapshot()
+            # Socket drop counters come from /proc or GetUdpStatistics, too
+            # costly for every render tick
+            self._osc_health = self.messenger.get_input_health()
+            updated = True
+        if updated:
+            self._refresh_osc_table()
+            router = self.messenger.router
+            text = (f"Handler calls: {router.delivered} made, "
+                    f"{router.skipped_total} unchanged repeats filtered")
+            health = self._osc_health
+            if health is None:
+                health = self._osc_health = self.messenger.get_input_health()
+            if health["kernel_drops"] is not None:
+                text += f"  ·  Socket drops: {health['kernel_drops']}"
+            text += f"  ·  Stream gaps: {health['stream_gaps']}"
+            self._osc_filter_lbl.setText(text)
+
+    def _refresh_osc_table(self):
+        if not self.messenger:
+            return
+        filt = self._osc_filter.text().lower()
+        rows = sorted((row for row in self.messenger.router.params.items()
+                       if row[2] >= self._osc_cleared_at), key=lambda row: row[0])
+        self._osc_count_lbl.setText(f"{len(rows)} parameters")
+        if filt:
+            rows = [row for row in rows if filt in row[0].lower()]
+
+        # Rows only need rebuilding when the set of shown paths changes; under
+        # steady traffic just the cells whose values moved are rewritten
+        paths = [row[0] for row in rows]
+        if paths != self._osc_paths:
+            sel_row = self._osc_table.currentRow()
+            sel_path = (self._osc_table.item(sel_row, 0).text()
+                        if sel_row >= 0 and self._osc_table.item(sel_row, 0) else None)
+            self._osc_table.setRowCount(0)
+            self._osc_table.setRowCount(len(paths))
+            for r, address in enumerate(paths):
+                self._osc_table.setItem(r, 0, QTableWidgetItem(address))
+                if address == sel_path:
+                    self._osc_table.selectRow(r)
+            self._osc_paths = paths
+            self._osc_shown = {}
+
+        for r, (address, value, ts) in enumerate(rows):
+            rate = self._osc_rates.get(address)
+            state = (type(value), value, ts, rate["hz"] if rate else None,
+                     rate["handler_ms_per_s"] if rate else None)
+            if self._osc_shown.get(address) == state:
+                continue
+            self._osc_shown[address] = state
             if isinstance(value, bool):
                 type_str, display = "bool", "True" if value else "False"
             elif isinstance(value, float):
@@ -1452,31 +1565,19 @@ class VRCChatboxGUI(QMainWindow):
                 type_str, display = "int", str(value)
             else:
                 type_str, display = type(value).__name__, str(value)
-            self._osc_params[address] = (display, type_str, ts)
-            updated = True
-        if updated:
-            self._osc_count_lbl.setText(f"{len(self._osc_params)} parameters")
-            self._refresh_osc_table()
-
-    def _refresh_osc_table(self):
-        filt = self._osc_filter.text().lower()
-        # Remember selected path so we can re-select after rebuild
-        sel_row = self._osc_table.currentRow()
-        sel_path = (self._osc_table.item(sel_row, 0).text()
-                    if sel_row >= 0 and self._osc_table.item(sel_row, 0) else None)
-
-        self._osc_table.setRowCount(0)
-        for address, (display, type_str, ts) in sorted(self._osc_params.items()):
-            if filt and filt not in address.lower():
-                continue
-            r = self._osc_table.rowCount()
-            self._osc_table.insertRow(r)
-            self._osc_table.setItem(r, 0, QTableWidgetItem(address))
-            self._osc_table.setItem(r, 1, QTableWidgetItem(display))
-            self._osc_table.setItem(r, 2, QTableWidgetItem(type_str))
-            self._osc_table.setItem(r, 3, QTableWidgetItem(ts.strftime("%H:%M:%S.%f")[:-3]))
-            if address == sel_path:
-                self._osc_table.selectRow(r)
+            self._set_osc_cell(r, 1, display)
+            self._set_osc_cell(r, 2, type_str)
+            self._set_osc_cell(r, 3, datetime.fromtimestamp(ts).strftime("%H:%M:%S.%f")[:-3])
+            if rate:
+                self._set_osc_cell(r, 4, f"{rate['hz']:.1f} Hz")
+                self._set_osc_cell(r, 5, f"{rate['handler_ms_per_s']:.3f}")
+
+    def _set_osc_cell(self, row, col, text):
+        item = self._osc_table.item(row, col)
+        if item is None:
+            self._osc_table.setItem(row, col, QTableWidgetItem(text))
+        elif item.text() != text:
+            item.setText(text)
 
     def _copy_osc_path(self):
         row = self._osc_table.currentRow()
@@ -1486,9 +1587,24 @@ class VRCChatboxGUI(QMainWindow):
         QApplication.clipboard().setText(path)
         self._set_status(f"Copied: {path}")
 
+    def _export_osc_stats(self):
+        if not self.messenger:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export OSC stats", "osc_stats.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.messenger.osc_stats.export(path)
+            self._set_status(f"OSC stats saved to {path}")
+        except OSError as e:
+            QMessageBox.warning(self, "Export failed", str(e))
+
     def _clear_osc_monitor(self):
-        self._osc_params.clear()
+        self._osc_cleared_at = clock.time()
         self._osc_table.setRowCount(0)
+        self._osc_paths = []
+        self._osc_shown = {}
         self._osc_count_lbl.setText("0 parameters")
 
     # ── ShockOSC logic ─────────────────────────────────────────────────────
@@ -1525,7 +1641,7 @@ class VRCChatboxGUI(QMainWindow):
             "shockers":          self.config["shockosc"].get("shockers", {}),
             "openshock_url":     self.config["shockosc"].get("openshock_url", "https://api.openshock.app"),
         })
-        save_app_config(self.config)
+        self._save_config()
         if self.messenger and hasattr(self.messenger, 'update_shock_config'):
             self.messenger.update_shock_config(self.config["shockosc"])
         if hasattr(self, 'status_label'):
@@ -1534,7 +1650,7 @@ class VRCChatboxGUI(QMainWindow):
 
     def on_time_toggle(self, checked):
         self.config["show_time"] = checked
-        save_app_config(self.config)
+        self._save_config()
         if self.messenger:
             self.messenger.show_time = checked
             self.messenger.request_display_update()
@@ -1542,7 +1658,7 @@ class VRCChatboxGUI(QMainWindow):
 
     def on_music_toggle(self, checked):
         self.config["show_music"] = checked
-        save_app_config(self.config)
+        self._save_config()
         if self.messenger:
             self.messenger.show_music = checked
             self.messenger.request_display_update()
@@ -1552,10 +1668,25 @@ class VRCChatboxGUI(QMainWindow):
         if "shockosc" not in self.config:
             self.config["shockosc"] = {}
         self.config["shockosc"]["openshock_token"] = text
-        save_app_config(self.config)
+        self._save_config()
         if self.messenger and hasattr(self.messenger, 'update_shock_config'):
             self.messenger.update_shock_config(self.config["shockosc"])
 
+    def _refresh_gateway_status(self):
+        ctrl = getattr(self.messenger, "shock_controller", None)
+        if ctrl is None:
+            self.gateway_status_lbl.setText("Live gateway: not running")
+            return
+        health = ctrl.get_signalr_health()
+        text = f"Live gateway: {health['state']}"
+        if health["state"] != "stopped":
+            text += f"  ·  connected {health['connected_ratio']:.0%} of the time"
+        if health["reconnects"]:
+            text += f"  ·  {health['reconnects']} reconnect(s), last took {health['last_reconnect_s']:.1f}s"
+        if health["state"] in ("reconnecting", "unauthorized") and health["last_error"]:
+            text += f"  ·  {health['last_error']}"
+        self.gateway_status_lbl.setText(text)
+
     def discover_shockers(self):
         token = self.token_entry.text().strip()
         if not token:
@@ -1671,7 +1802,7 @@ class VRCChatboxGUI(QMainWindow):
                 }
                 added += 1
         if added:
-            save_app_config(self.config)
+            self._save_config()
             if self.messenger and hasattr(self.messenger, 'update_shock_config'):
                 self.messenger.update_shock_config(self.config["shockosc"])
         self.refresh_shockers_display()
@@ -1711,7 +1842,7 @@ class VRCChatboxGUI(QMainWindow):
                 "group": data["group"],
                 "device_name": "Manual",
             }
-            save_app_config(self.config)
+            self._save_config()
             if self.messenger and hasattr(self.messenger, 'update_shock_config'):
                 self.messenger.update_shock_config(self.config["shockosc"])
             self.refresh_shockers_display()
@@ -1736,7 +1867,7 @@ class VRCChatboxGUI(QMainWindow):
                 "name": data["name"],
                 "group": data["group"],
             }
-            save_app_config(self.config)
+            self._save_config()
             if self.messenger and hasattr(self.messenger, 'update_shock_config'):
                 self.messenger.update_shock_config(self.config["shockosc"])
             self.refresh_shockers_display()
@@ -1753,7 +1884,7 @@ class VRCChatboxGUI(QMainWindow):
         shockers = self.config.get("shockosc", {}).get("shockers", {})
         if sid in shockers:
             del shockers[sid]
-            save_app_config(self.config)
+            self._save_config()
             if self.messenger and hasattr(self.messenger, 'update_shock_config'):
                 self.messenger.update_shock_config(self.config["shockosc"])
             self.refresh_shockers_display()
@@ -1765,7 +1896,7 @@ class VRCChatboxGUI(QMainWindow):
         sc = self.config.setdefault("shockosc", {})
         if "groups" not in sc:
             sc["groups"] = ["leftleg", "rightleg"]
-            save_app_config(self.config)
+            self._save_config()
 
     def refresh_groups_display(self):
         self.groups_table.setRowCount(0)
@@ -1791,7 +1922,7 @@ class VRCChatboxGUI(QMainWindow):
             QMessageBox.warning(self, "Duplicate", f'Group "{name}" already exists.')
             return
         groups.append(name)
-        save_app_config(self.config)
+        self._save_config()
         self.refresh_groups_display()
         self._set_status(f'Group "{name}" added')
 
@@ -1812,7 +1943,7 @@ class VRCChatboxGUI(QMainWindow):
         for info in self.config.get("shockosc", {}).get("shockers", {}).values():
             if isinstance(info, dict) and info.get("group") == old_name:
                 info["group"] = name
-        save_app_config(self.config)
+        self._save_config()
         if self.messenger and hasattr(self.messenger, 'update_shock_config'):
             self.messenger.update_shock_config(self.config["shockosc"])
         self.refresh_groups_display()
@@ -1840,7 +1971,7 @@ class VRCChatboxGUI(QMainWindow):
         for info in self.config.get("shockosc", {}).get("shockers", {}).values():
             if isinstance(info, dict) and info.get("group") == name:
                 info["group"] = ""
-        save_app_config(self.config)
+        self._save_config()
         if self.messenger and hasattr(self.messenger, 'update_shock_config'):
             self.messenger.update_shock_config(self.config["shockosc"])
         self.refresh_groups_display()
@@ -1881,7 +2012,7 @@ class VRCChatboxGUI(QMainWindow):
                 shockers[sid] = {"group": info, "name": f"Shocker {sid[:8]}…", "device_name": "Unknown"}
                 changed = True
         if changed:
-            save_app_config(self.config)
+            self._save_config()
 
     # ── Slide logic ────────────────────────────────────────────────────────
 
@@ -1889,7 +2020,7 @@ class VRCChatboxGUI(QMainWindow):
         dlg = SlideVariableDialog(self, None, self.config)
         if dlg.exec() == QDialog.DialogCode.Accepted:
             self.config.setdefault("slide", {}).setdefault("variables", []).append(dlg.get_data())
-            save_app_config(self.config)
+            self._save_config()
             self.refresh_slide_variables_display()
             self.update_slide_controller()
 
@@ -1903,7 +2034,7 @@ class VRCChatboxGUI(QMainWindow):
         dlg = SlideVariableDialog(self, variables[config_idx], self.config)
         if dlg.exec() == QDialog.DialogCode.Accepted:
             variables[config_idx] = dlg.get_data()
-            save_app_config(self.config)
+            self._save_config()
             self.refresh_slide_variables_display()
             self.update_slide_controller()
 
@@ -1918,7 +2049,7 @@ class VRCChatboxGUI(QMainWindow):
         variables = self.config.get("slide", {}).get("variables", [])
         if config_idx < len(variables):
             del variables[config_idx]
-            save_app_config(self.config)
+            self._save_config()
             self.refresh_slide_variables_display()
             self.update_slide_controller()
 
@@ -1948,7 +2079,7 @@ class VRCChatboxGUI(QMainWindow):
             "cooldown_min": round(self.slide_cooldown_min_spinbox.value(), 1),
             "cooldown_max": round(self.slide_cooldown_max_spinbox.value(), 1),
         })
-        save_app_config(self.config)
+        self._save_config()
         self.update_slide_controller()
         if hasattr(self, 'status_label'):
             s = "enabled" if self.config["slide"]["enabled"] else "disabled"
@@ -1960,8 +2091,10 @@ class VRCChatboxGUI(QMainWindow):
 
     def run(self):
         # Cleanly disconnect the BLE heart-rate sensor on exit so it is free to
-        # reconnect next launch (GUI mode never calls messenger.cleanup()).
+        # reconnect next launch (GUI mode never calls messenger.cleanup()), and
+        # write out any config changes still in the write-behind buffer.
         self.app.aboutToQuit.connect(bpm_monitor.shutdown)
+        self.app.aboutToQuit.connect(config_store.shutdown)
         self.show()
         self.app.exec()
 
@@ -0,0 +1,269 @@
+"""OSC load generator for stress-testing the listener.
+
+Sends a VRChat-like parameter mix: many float parameters updated every frame,
+bool contacts toggling, OSCBoop spam and the ShockOsc group contacts, plus a
+timestamped probe message a few times per second to measure delay.
+
+Two ways to run it:
+
+    python loadgen.py send --port 9001 --floats 60 --fps 60 --duration 10
+        Blast a running app. Prints what was sent; look at the app's
+        --osc-stats export for the receiving side.
+
+    python loadgen.py bench --floats 60 --fps 60 --duration 10
+        Start an offline VRChatMessenger behind the real OSCListener and
+        worker pool, drive it from a separate sender process and report
+        packets handled, dropped by the socket or the pool, and delayed.
+
+Both take --oscquery. For send it is the URL of the app's OSCQuery service;
+the sender then behaves like VRChat does, sending only the advertised
+addresses to the advertised port. For bench it starts an OSCQuery service for
+the benchmarked app and points the sender at it.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+from osc_stats import latency_summary
+
+PROBE_ADDRESS = "/loadgen/probe"
+
+
+def _message(address, value, arg_type=None):
+    builder = OscMessageBuilder(address=address)
+    builder.add_arg(value, arg_type)
+    return builder.build().dgram
+
+
+class ParameterMix:
+    """Builds the datagrams for one frame of simulated avatar traffic."""
+
+    def __init__(self, floats=60, contacts=6, groups=("leftleg", "rightleg"),
+                 contact_hz=2.0, boop_hz=10.0, fps=60.0, seed=0):
+        self.rng = random.Random(seed)
+        self.fps = fps
+        self.floats = [f"/avatar/parameters/LoadFloat{i}" for i in range(floats)]
+        self.contacts = [f"/avatar/parameters/LoadContact{i}" for i in range(contacts)]
+        self.contacts += [f"/avatar/parameters/ShockOsc/{g}" for g in groups]
+        self.contact_p = min(1.0, contact_hz / fps)
+        self.boop_p = min(1.0, boop_hz / fps)
+        self._phase = [self.rng.random() * math.tau for _ in self.floats]
+        self._contact_state = {a: False for a in self.contacts}
+        self._boop = False
+        self.boop = True
+        self.frame = 0
+
+    def restrict(self, allowed):
+        """Only send addresses in allowed, like VRChat does for an OSCQuery client."""
+        keep = [(a, p) for a, p in zip(self.floats, self._phase) if a in allowed]
+        self.floats = [a for a, _ in keep]
+        self._phase = [p for _, p in keep]
+        self._contact_state = {a: s for a, s in self._contact_state.items() if a in allowed}
+        self.contacts = list(self._contact_state)
+        self.boop = "/avatar/parameters/OSCBoop" in allowed
+
+    def next_frame(self):
+        """Datagrams for the next frame, in send order."""
+        self.frame += 1
+        t = self.frame / self.fps
+        packets = []
+        # Floats: smooth motion like physbones / gestures, all resent each frame
+        for address, phase in zip(self.floats, self._phase):
+            packets.append(_message(address, 0.5 + 0.5 * math.sin(t * 2.0 + phase)))
+        for address, state in self._contact_state.items():
+            if self.rng.random() < self.contact_p:
+                state = not state
+                self._contact_state[address] = state
+            packets.append(_message(address, state))
+        if self.rng.random() < self.boop_p and self.boop:
+            self._boop = not self._boop
+            packets.append(_message("/avatar/parameters/OSCBoop", self._boop))
+        return packets
+
+
+def send(host, port, mix, duration, probe_hz=20.0):
+    """Send mix frames at mix.fps for duration seconds (probe_hz 0 = no probes)."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    target = (host, port)
+    sent = probes = late_frames = 0
+    frame_time = 1.0 / mix.fps
+    probe_every = max(1, round(mix.fps / probe_hz)) if probe_hz else 0
+    start = time.perf_counter()
+    frames = int(duration * mix.fps)
+    for i in range(frames):
+        due = start + i * frame_time
+        now = time.perf_counter()
+        if now < due:
+            time.sleep(due - now)
+        elif now - due > frame_time:
+            late_frames += 1
+        for data in mix.next_frame():
+            sock.sendto(data, target)
+            sent += 1
+        if probe_every and i % probe_every == 0:
+            sock.sendto(_message(PROBE_ADDRESS, time.time_ns(), OscMessageBuilder.ARG_TYPE_INT64),
+                        target)
+            sent += 1
+            probes += 1
+    elapsed = time.perf_counter() - start
+    sock.close()
+    return {"sent": sent, "probes": probes, "frames": frames,
+            "late_frames": late_frames, "elapsed_s": round(elapsed, 3),
+            "rate": round(sent / elapsed, 1)}
+
+
+def bench(args):
+    """Run the offline app behind the real listener and measure what it handled."""
+    from app import VRChatMessenger
+    from osc_listener import OSCListener, WorkerPool
+    from oscquery import OSCQueryService
+    from replay import FakeHTTPSession
+
+    messenger = VRChatMessenger(offline=True)
+    messenger.shock_controller.http_session = FakeHTTPSession()
+    messenger.router.pool = WorkerPool(workers=2, max_pending=64)
+
+    delays = []
+
+    def on_probe(address, *probe_args):
+        delays.append((time.time_ns() - probe_args[0]) / 1e6)
+
+    messenger.router.map(PROBE_ADDRESS, on_probe)
+    listener = OSCListener("127.0.0.1", args.port, messenger.dispatcher.call_handlers_for_packet,
+                           receive_buffer=args.receive_buffer)
+    listener.start()
+    service = None
+    if args.oscquery:
+        service = OSCQueryService("loadgen-bench", "127.0.0.1", listener.port, mdns=False)
+        service.start()
+        service.set_paths(messenger.router.routed_addresses())
+
+    cmd = [sys.executable, os.path.abspath(__file__), "send", "--json",
+           "--port", str(args.port), "--floats", str(args.floats), "--fps", str(args.fps),
+           "--contacts", str(args.contacts), "--contact-hz", str(args.contact_hz),
+           "--boop-hz", str(args.boop_hz), "--duration", str(args.duration)]
+    if service:
+        cmd += ["--oscquery", f"http://127.0.0.1:{service.http_port}"]
+    cpu0 = time.process_time()
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    sender = json.loads(out.strip().splitlines()[-1])
+    # Let the listener and pool drain what's still queued
+    time.sleep(args.settle)
+    cpu = time.process_time() - cpu0
+
+    kernel_drops = listener.kernel_drops()
+    listener.shutdown()
+    if service:
+        service.shutdown()
+    pool = messenger.router.pool
+    messenger.cleanup()
+
+    received = listener.packets
+    report = {
+        "sent": sender["sent"],
+        "send_rate": sender["rate"],
+        "advertised": len(service.paths) if service else None,
+        "sender_late_frames": sender["late_frames"],
+        "received": received,
+        "dropped_socket": sender["sent"] - received,
+        "kernel_drops": kernel_drops,
+        "receive_buffer": listener.receive_buffer_actual,
+        "stream_gaps": messenger.router.params.gaps_total,
+        "dropped_pool": pool.dropped,
+        "packet_errors": listener.errors,
+        "fast_decoded": messenger.dispatcher.fast_packets,
+        "handler_calls": messenger.router.delivered,
+        "filtered_repeats": messenger.router.skipped_total,
+        "probes": {"sent": sender["probes"], "handled": len(delays)},
+        "delay_ms": {
+            **latency_summary(delays, quantiles=(0.5, 0.99), digits=2),
+            "over_threshold": sum(1 for d in delays if d > args.delay_threshold),
+            "threshold": args.delay_threshold,
+        },
+        "cpu_s": round(cpu, 3),
+        "cpu_us_per_packet": round(cpu / received * 1e6, 1) if received else 0.0,
+    }
+    return report
+
+
+def print_bench(report):
+    print(f"Sent {report['sent']} packets at {report['send_rate']:.0f}/s "
+          f"({report['sender_late_frames']} late frames)")
+    if report["advertised"] is not None:
+        print(f"OSCQuery advertised {report['advertised']} addresses")
+    print(f"Received {report['received']}  dropped: socket {report['dropped_socket']}, "
+          f"pool {report['dropped_pool']}  errors {report['packet_errors']}  "
+          f"fast-decoded {report['fast_decoded']}")
+    print(f"Kernel drops {report['kernel_drops']} (receive buffer {report['receive_buffer']} bytes), "
+          f"stream gaps {report['stream_gaps']}")
+    print(f"Handler calls {report['handler_calls']}, repeats filtered {report['filtered_repeats']}")
+    d = report["delay_ms"]
+    print(f"Probe delay  p50 {d['p50']}ms  p99 {d['p99']}ms  max {d['max']}ms  "
+          f"({d['over_threshold']} of {report['probes']['handled']} over {d['threshold']}ms, "
+          f"{report['probes']['sent'] - report['probes']['handled']} lost)")
+    print(f"Receiver CPU {report['cpu_s']}s ({report['cpu_us_per_packet']} us/packet)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VRChat-like OSC load generator")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("send", "bench"):
+        p = sub.add_parser(name)
+        p.add_argument("--port", type=int, default=9001)
+        p.add_argument("--floats", type=int, default=60, help="float parameters resent every frame")
+        p.add_argument("--fps", type=float, default=60.0, help="frames per second")
+        p.add_argument("--contacts", type=int, default=6, help="bool contacts (plus ShockOsc groups)")
+        p.add_argument("--contact-hz", type=float, default=2.0, help="toggles per contact per second")
+        p.add_argument("--boop-hz", type=float, default=10.0, help="OSCBoop toggles per second")
+        p.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+        p.add_argument("--json", action="store_true", help="print the result as JSON")
+    sub.choices["send"].add_argument("--host", default="127.0.0.1")
+    sub.choices["send"].add_argument("--oscquery", metavar="URL",
+                                     help="only send what this OSCQuery service advertises")
+    sub.choices["bench"].add_argument("--oscquery", action="store_true",
+                                      help="advertise the app over OSCQuery and filter the sender")
+    sub.choices["bench"].add_argument("--settle", type=float, default=1.0,
+                                      help="seconds to let queues drain after sending")
+    sub.choices["bench"].add_argument("--receive-buffer", type=int, default=None,
+                                      help="SO_RCVBUF for the listener in bytes (default: OS)")
+    sub.choices["bench"].add_argument("--delay-threshold", type=float, default=20.0,
+                                      help="probe delay (ms) counted as delayed")
+    args = parser.parse_args()
+
+    if args.command == "send":
+        mix = ParameterMix(args.floats, args.contacts, contact_hz=args.contact_hz,
+                           boop_hz=args.boop_hz, fps=args.fps)
+        port, probe_hz = args.port, 20.0
+        if args.oscquery:
+            from oscquery import query
+            info, paths = query(args.oscquery)
+            mix.restrict(paths)
+            port = info["OSC_PORT"]
+            if PROBE_ADDRESS not in paths:
+                probe_hz = 0
+        result = send(args.host, port, mix, args.duration, probe_hz)
+        print(json.dumps(result) if args.json else
+              f"Sent {result['sent']} packets in {result['elapsed_s']}s "
+              f"({result['rate']}/s, {result['late_frames']} late frames)")
+        return 0
+
+    report = bench(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_bench(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,137 @@
+"""Fast path for the single-scalar OSC messages VRChat sends most.
+
+Nearly every avatar parameter arrives as one message with one float, int or
+bool. pythonosc parses those through OscPacket → OscMessage → a parsed
+argument list, building several objects per datagram. ``decode_scalar()``
+recognises the four fixed layouts directly:
+
+    /address\\0 (padded to 4)  ,f\\0\\0  <4-byte big-endian float>
+    /address\\0 (padded to 4)  ,i\\0\\0  <4-byte big-endian int32>
+    /address\\0 (padded to 4)  ,T\\0\\0
+    /address\\0 (padded to 4)  ,F\\0\\0
+
+and reads the value in place with ``struct.unpack_from``, so nothing but the
+address string is copied out of the datagram. Anything else (bundles, several
+arguments, strings, blobs) returns None and goes through pythonosc as before.
+``ScalarDispatcher`` is the pythonosc dispatcher that takes the fast path.
+
+    python osc_decode.py    # compare against pythonosc on a VRChat-like mix
+"""
+
+import struct
+
+from pythonosc import dispatcher
+
+_FLOAT = struct.Struct(">f")
+_INT = struct.Struct(">i")
+
+_TAG_FLOAT = b",f\x00\x00"
+_TAG_INT = b",i\x00\x00"
+_TAG_TRUE = b",T\x00\x00"
+_TAG_FALSE = b",F\x00\x00"
+
+
+def decode_scalar(data):
+    """(address, value) for a single float/int/bool message, else None."""
+    if data[:1] != b"/":
+        return None
+    end = data.find(b"\x00")
+    if end < 0:
+        return None
+    tag = (end & ~3) + 4    # address is NUL-terminated and padded to 4 bytes
+    size = len(data)
+    if size == tag + 8:
+        tags = data[tag:tag + 4]
+        if tags == _TAG_FLOAT:
+            value = _FLOAT.unpack_from(data, tag + 4)[0]
+        elif tags == _TAG_INT:
+            value = _INT.unpack_from(data, tag + 4)[0]
+        else:
+            return None
+    elif size == tag + 4:
+        tags = data[tag:tag + 4]
+        if tags == _TAG_TRUE:
+            value = True
+        elif tags == _TAG_FALSE:
+            value = False
+        else:
+            return None
+    else:
+        return None
+    try:
+        return data[:end].decode("utf-8"), value
+    except UnicodeDecodeError:
+        return None
+
+
+class ScalarDispatcher(dispatcher.Dispatcher):
+    """Dispatcher that routes single-scalar messages without pythonosc's parser.
+
+    Single float/int/bool messages go straight to the default handler;
+    everything else, and anything when handlers are mapped on the dispatcher
+    itself, takes the full path. ``capture``, when set, is called with every
+    raw datagram first (input recording).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.capture = None
+        self._route = None          # default handler, called as route(address, value)
+        self.fast_packets = 0
+        self.parsed_packets = 0
+
+    def set_default_handler(self, handler, needs_reply_address=False):
+        super().set_default_handler(handler, needs_reply_address)
+        self._route = None if needs_reply_address else handler
+
+    def call_handlers_for_packet(self, data, client_address):
+        capture = self.capture
+        if capture is not None:
+            capture(data)
+        route = self._route
+        if route is not None and not self._map:
+            message = decode_scalar(data)
+            if message is not None:
+                self.fast_packets += 1
+                route(*message)
+                return []
+        self.parsed_packets += 1
+        return super().call_handlers_for_packet(data, client_address)
+
+
+def _bench(rounds=20):
+    import time
+
+    from pythonosc.osc_packet import OscPacket
+
+    from loadgen import ParameterMix
+
+    mix = ParameterMix(floats=60, contacts=6)
+    datagrams = [d for _ in range(60) for d in mix.next_frame()]
+
+    def run(fn):
+        best = float("inf")
+        for _ in range(rounds):
+            t0 = time.perf_counter_ns()
+            for data in datagrams:
+                fn(data)
+            best = min(best, time.perf_counter_ns() - t0)
+        return best / len(datagrams)
+
+    def pythonosc(data):
+        for timed in OscPacket(data).messages:
+            timed.message.address, timed.message.params
+
+    for data in datagrams:
+        message = OscPacket(data).messages[0].message
+        assert decode_scalar(data) == (message.address, message.params[0]), message.address
+
+    slow = run(pythonosc)
+    fast = run(decode_scalar)
+    print(f"{len(datagrams)} datagrams, best of {rounds}")
+    print(f"  pythonosc OscPacket  {slow:7.0f} ns/message")
+    print(f"  decode_scalar        {fast:7.0f} ns/message  ({slow / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    _bench()
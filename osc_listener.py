@@ -0,0 +1,238 @@
+"""Single-loop asyncio OSC receiver.
+
+Replaces pythonosc's ThreadingOSCUDPServer, which started a new OS thread for
+every datagram. Here one asyncio loop (on its own thread) receives everything
+and routes it inline; handlers mapped as blocking — the ones that talk to
+OpenShock — are handed to a small WorkerPool instead so they can't stall the
+receive loop.
+
+The socket's receive buffer is sized from settings so a burst from VRChat
+fits in the kernel instead of overflowing it, and ``kernel_drops()`` reports
+what overflowed anyway where the OS exposes it: per socket from
+/proc/net/udp on Linux, system-wide UDP receive errors on Windows.
+"""
+
+import asyncio
+import os
+import queue
+import socket
+import sys
+import threading
+
+
+class WorkerPool:
+    """A few worker threads with bounded queues for blocking OSC handlers.
+
+    Jobs are sharded by key (the OSC address), so everything for one address
+    runs in order on the same worker — a hold's release can never overtake
+    its press. When a worker's queue is full the job is dropped and counted
+    rather than letting a stalled HTTP call back up the listener.
+    """
+
+    def __init__(self, workers=2, max_pending=64, name="osc-worker"):
+        self._queues = [queue.Queue(maxsize=max_pending) for _ in range(max(1, workers))]
+        self.submitted = 0
+        self.dropped = 0
+        self._threads = []
+        for i, q in enumerate(self._queues):
+            t = threading.Thread(target=self._run, args=(q,), name=f"{name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, key, fn, *args):
+        """Queue fn(*args) on key's worker. Returns False if it was dropped."""
+        q = self._queues[hash(key) % len(self._queues)]
+        try:
+            q.put_nowait((fn, args))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def _run(self, q):
+        while True:
+            job = q.get()
+            if job is None:
+                return
+            fn, args = job
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"OSC worker error: {e}")
+
+    def shutdown(self, timeout=2.0):
+        for q in self._queues:
+            try:
+                q.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+        for t in self._threads:
+            t.join(timeout=timeout)
+        if self.dropped:
+            print(f"OSC worker pool dropped {self.dropped} of "
+                  f"{self.submitted + self.dropped} blocking handler calls")
+
+
+def _linux_socket_drops(inode):
+    """Drop counter of the UDP socket with this inode from /proc/net/udp."""
+    try:
+        with open("/proc/net/udp", encoding="ascii") as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 13 and fields[9] == str(inode):
+                    return int(fields[12])
+    except (OSError, ValueError, StopIteration):
+        pass
+    return None
+
+
+def _windows_udp_in_errors():
+    """System-wide count of UDP datagrams Windows received but couldn't deliver."""
+    import ctypes
+    from ctypes import wintypes
+
+    class MIB_UDPSTATS(ctypes.Structure):
+        _fields_ = [("dwInDatagrams", wintypes.DWORD), ("dwNoPorts", wintypes.DWORD),
+                    ("dwInErrors", wintypes.DWORD), ("dwOutDatagrams", wintypes.DWORD),
+                    ("dwNumAddrs", wintypes.DWORD)]
+
+    stats = MIB_UDPSTATS()
+    try:
+        if ctypes.windll.iphlpapi.GetUdpStatistics(ctypes.byref(stats)) != 0:
+            return None
+    except (AttributeError, OSError):
+        return None
+    return stats.dwInErrors
+
+
+class _OSCProtocol(asyncio.DatagramProtocol):
+    def __init__(self, listener):
+        self._listener = listener
+
+    def datagram_received(self, data, addr):
+        self._listener._on_datagram(data, addr)
+
+    def error_received(self, exc):
+        print(f"OSC listener socket error: {exc}")
+
+
+class OSCListener:
+    """Receives OSC datagrams on one asyncio loop and passes them to on_packet.
+
+    on_packet(data, client_address) has the same signature as pythonosc's
+    Dispatcher.call_handlers_for_packet, so a dispatcher can be plugged in
+    directly.
+    """
+
+    def __init__(self, ip, port, on_packet, receive_buffer=None):
+        """
+        Args:
+            receive_buffer: SO_RCVBUF to ask for in bytes (None = OS default)
+        """
+        self.ip = ip
+        self.port = port
+        self.on_packet = on_packet
+        self.receive_buffer = receive_buffer
+        self.receive_buffer_actual = None   # what the OS granted (Linux reports double)
+        self.packets = 0
+        self.errors = 0
+        self.relay = None   # OSCRelay that gets every datagram first, see osc_relay
+        self._inode = None
+        self._win_errors_at_start = None
+        self._loop = None
+        self._thread = None
+        self._transport = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def start(self):
+        """Bind and start receiving. Raises OSError if the port is taken."""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="osc-listener", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        if self._error:
+            raise self._error
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            sock = self._bind()
+            self._transport, _ = self._loop.run_until_complete(
+                self._loop.create_datagram_endpoint(lambda: _OSCProtocol(self), sock=sock)
+            )
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            self._loop.close()
+            return
+        # Port 0 asks the OS for any free port; report the one we got
+        self.port = sock.getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._transport.close()
+            # One more pass so the transport's close callbacks run
+            self._loop.run_until_complete(asyncio.sleep(0))
+            self._loop.close()
+
+    def _bind(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            if self.receive_buffer:
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer)
+                except OSError as e:
+                    print(f"Could not set OSC receive buffer to {self.receive_buffer}: {e}")
+            sock.bind((self.ip, self.port))
+        except OSError:
+            sock.close()
+            raise
+        self.receive_buffer_actual = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        if self.receive_buffer and self.receive_buffer_actual < self.receive_buffer:
+            # Linux caps requests at net.core.rmem_max
+            print(f"OSC receive buffer is {self.receive_buffer_actual} bytes "
+                  f"(asked for {self.receive_buffer})")
+        if sys.platform.startswith("linux"):
+            self._inode = os.fstat(sock.fileno()).st_ino
+        elif sys.platform == "win32":
+            self._win_errors_at_start = _windows_udp_in_errors()
+        return sock
+
+    def kernel_drops(self):
+        """Datagrams the OS dropped before we could read them, or None if unknown.
+
+        Linux counts this socket only; Windows only has a system-wide counter,
+        so there it is every UDP receive error since the listener started.
+        """
+        if self._inode is not None:
+            return _linux_socket_drops(self._inode)
+        if self._win_errors_at_start is not None:
+            now = _windows_udp_in_errors()
+            if now is not None:
+                return (now - self._win_errors_at_start) & 0xFFFFFFFF
+        return None
+
+    def _on_datagram(self, data, addr):
+        self.packets += 1
+        relay = self.relay
+        if relay is not None:
+            relay.forward(data)
+        try:
+            self.on_packet(data, addr)
+        except Exception as e:
+            self.errors += 1
+            print(f"OSC packet error from {addr}: {e}")
+
+    def shutdown(self):
+        loop = self._loop
+        if loop and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(loop.stop)
+            except RuntimeError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=2)
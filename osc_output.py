@@ -0,0 +1,302 @@
+"""Single outbound OSC engine shared by every controller.
+
+Controllers call ``send_message(address, value)`` exactly as they did on
+SimpleUDPClient, but nothing goes on the wire immediately. Writes land in a
+pending table keyed by address, so a later write in the same tick replaces an
+earlier one (a cooldown flipping True→False inside one tick sends just the
+final False). A flush thread wakes one tick after the first write, encodes
+what's pending — reusing cached bytes for messages it has sent before — and
+packs it into as few OSC bundles as fit in a datagram. A token bucket caps
+datagrams per second; whatever doesn't fit stays pending and keeps coalescing
+until the next tick.
+
+Besides the main target (VRChat) the output can mirror to more destinations
+— a second client, an overlay — set with ``set_mirrors()``. Messages are
+encoded once and the same bytes go to every destination from the one socket.
+Each mirror has its own address filter, token bucket and health counters. A
+mirror that runs out of tokens drops what it can't take instead of holding
+up the main target.
+"""
+
+import socket
+import struct
+import threading
+
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+from clock import clock
+from osc_relay import AddressFilter
+from replay import input_recorder, KIND_OUT_OSC
+
+_BUNDLE_HEADER = b"#bundle\x00" + struct.pack(">Q", 1)   # timetag 1 = immediately
+_SIZE = struct.Struct(">i")
+
+# Values whose encoded message is worth caching (hashable and usually repeated)
+_CACHEABLE = (bool, int, float, str, type(None))
+
+
+class OutputDestination:
+    """One place flushed messages go, with its own rate limit and health."""
+
+    def __init__(self, host, port, max_packets_per_sec=200, filters=()):
+        self.host = host
+        self.port = port
+        self.address = (host, port)
+        self.max_packets_per_sec = max_packets_per_sec
+        self.filters = [AddressFilter(f) for f in filters]
+        self._matches = {}
+        self._tokens = float(max_packets_per_sec)
+        self._last_refill = clock.monotonic()
+        # Stats
+        self.messages_sent = 0
+        self.datagrams_sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.last_error = None
+
+    def wants(self, address):
+        if not self.filters:
+            return True
+        wanted = self._matches.get(address)
+        if wanted is None:
+            wanted = self._matches[address] = any(f.matches(address) for f in self.filters)
+        return wanted
+
+    def take(self, count):
+        """How many of count datagrams the token bucket allows right now."""
+        now = clock.monotonic()
+        rate = self.max_packets_per_sec
+        self._tokens = min(float(rate), self._tokens + (now - self._last_refill) * rate)
+        self._last_refill = now
+        allowed = min(count, int(self._tokens))
+        self._tokens -= allowed
+        return allowed
+
+    @property
+    def healthy(self):
+        return self.consecutive_errors < 3
+
+    def get_stats(self):
+        return {
+            "target": f"{self.host}:{self.port}",
+            "messages_sent": self.messages_sent,
+            "datagrams_sent": self.datagrams_sent,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "healthy": self.healthy,
+            "last_error": self.last_error,
+        }
+
+
+class OSCOutput:
+    def __init__(self, ip="127.0.0.1", port=9000, tick=0.005, max_packets_per_sec=200,
+                 max_datagram=1400, bundle=True, offline=False):
+        """
+        Args:
+            tick: seconds to gather writes before a flush
+            max_packets_per_sec: datagrams allowed per second (burst = one second's worth)
+            max_datagram: largest bundle to build, in bytes
+            bundle: pack simultaneous writes into OSC bundles
+            offline: don't open a socket; flushed messages are only recorded
+        """
+        self.main = OutputDestination(ip, port, max_packets_per_sec)
+        self.mirrors = []
+        self.tick = tick
+        self.max_datagram = max_datagram
+        self.bundle = bundle
+        self.offline = offline
+        self._sock = None if offline else socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        self._lock = threading.Lock()
+        self._pending = {}          # address -> latest value, in first-write order
+        self._wake = threading.Event()
+        self._cache = {}            # (address, type, value) -> encoded message
+        self._cache_limit = 2048
+
+        # Stats
+        self.writes = 0
+        self.coalesced = 0
+        self.messages_sent = 0
+        self.datagrams_sent = 0
+        self.cache_hits = 0
+        self.deferred = 0
+        self.send_errors = 0
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="osc-output", daemon=True)
+        self._thread.start()
+
+    # ── public API (SimpleUDPClient compatible) ───────────────────────────────
+
+    def send_message(self, address, value):
+        """Queue value for address; a newer write before the flush replaces it."""
+        if isinstance(value, list):
+            value = tuple(value)
+        with self._lock:
+            if address in self._pending:
+                self.coalesced += 1
+            self._pending[address] = value
+            self.writes += 1
+        self._wake.set()
+
+    def set_mirrors(self, mirrors):
+        """Replace the mirror destinations.
+
+        Args:
+            mirrors: iterable of {"host", "port", "max_packets_per_sec", "filters"}
+        """
+        self.mirrors = [
+            OutputDestination(m.get("host", "127.0.0.1"), int(m["port"]),
+                              m.get("max_packets_per_sec", 50), m.get("filters") or ())
+            for m in mirrors if m.get("port")
+        ]
+        if self.mirrors:
+            print("OSC output mirrored to " + ", ".join(f"{m.host}:{m.port}" for m in self.mirrors))
+
+    def flush(self):
+        """Send everything pending now, ignoring the rate limit."""
+        self._flush(paced=False)
+
+    def get_stats(self):
+        return {
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "messages_sent": self.messages_sent,
+            "datagrams_sent": self.datagrams_sent,
+            "cache_hits": self.cache_hits,
+            "deferred": self.deferred,
+            "send_errors": self.send_errors,
+            "pending": len(self._pending),
+            "destinations": [d.get_stats() for d in [self.main] + self.mirrors],
+        }
+
+    def close(self):
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout=1)
+        self.flush()
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    # ── flush loop ────────────────────────────────────────────────────────────
+
+    def _run(self):
+        while self._running:
+            self._wake.wait()
+            if not self._running:
+                break
+            # Let writes made at the same moment land in this flush
+            clock.sleep(self.tick)
+            self._wake.clear()
+            if not self._flush(paced=True):
+                # Out of tokens with work left — come back next tick
+                self._wake.set()
+
+    def _flush(self, paced):
+        """Encode and send pending messages. Returns False if some were deferred."""
+        with self._lock:
+            if not self._pending:
+                return True
+            items = list(self._pending.items())
+            self._pending.clear()
+
+        datagrams = self._pack([(address, value, self._encode(address, value))
+                                for address, value in items])
+
+        main = self.main
+        budget = main.take(len(datagrams)) if paced else len(datagrams)
+        for messages, data in datagrams[:budget]:
+            self._send(main, data, len(messages))
+            self.datagrams_sent += 1
+            self.messages_sent += len(messages)
+            if input_recorder.active or input_recorder.output_sink:
+                for address, value, _ in messages:
+                    input_recorder.record_output(
+                        KIND_OUT_OSC, [address, list(value) if isinstance(value, tuple) else value]
+                    )
+        if self.mirrors and budget:
+            # Mirrors get what the main target got, from the same encoded bytes
+            self._mirror([m for messages, _ in datagrams[:budget] for m in messages], paced)
+
+        leftover = [(a, v) for messages, _ in datagrams[budget:] for a, v, _ in messages]
+        if not leftover:
+            return True
+        self.deferred += len(leftover)
+        with self._lock:
+            # Deferred values go back first; anything written since wins
+            merged = dict(leftover)
+            merged.update(self._pending)
+            self._pending = merged
+        return False
+
+    def _mirror(self, encoded, paced):
+        for mirror in self.mirrors:
+            chosen = [m for m in encoded if mirror.wants(m[0])] if mirror.filters else encoded
+            if not chosen:
+                continue
+            datagrams = self._pack(chosen)
+            allowed = mirror.take(len(datagrams)) if paced else len(datagrams)
+            for messages, data in datagrams[:allowed]:
+                self._send(mirror, data, len(messages))
+            mirror.dropped += sum(len(messages) for messages, _ in datagrams[allowed:])
+
+    def _encode(self, address, value):
+        key = None
+        if isinstance(value, _CACHEABLE):
+            key = (address, type(value), value)
+            data = self._cache.get(key)
+            if data is not None:
+                self.cache_hits += 1
+                return data
+        builder = OscMessageBuilder(address=address)
+        for arg in (value if isinstance(value, tuple) else (value,)):
+            builder.add_arg(arg)
+        data = builder.build().dgram
+        if key is not None:
+            if len(self._cache) >= self._cache_limit:
+                self._cache.clear()
+            self._cache[key] = data
+        return data
+
+    def _pack(self, encoded):
+        """Group (address, value, bytes) into [([(address, value, bytes)], datagram), ...]."""
+        if not self.bundle:
+            return [([m], m[2]) for m in encoded]
+        datagrams = []
+        messages, parts, size = [], [], len(_BUNDLE_HEADER)
+        for address, value, data in encoded:
+            need = _SIZE.size + len(data)
+            if parts and size + need > self.max_datagram:
+                datagrams.append(self._finish(messages, parts))
+                messages, parts, size = [], [], len(_BUNDLE_HEADER)
+            messages.append((address, value, data))
+            parts.append(data)
+            size += need
+        if parts:
+            datagrams.append(self._finish(messages, parts))
+        return datagrams
+
+    @staticmethod
+    def _finish(messages, parts):
+        if len(parts) == 1:
+            return messages, parts[0]
+        body = b"".join(_SIZE.pack(len(p)) + p for p in parts)
+        return messages, _BUNDLE_HEADER + body
+
+    def _send(self, destination, data, messages):
+        if self._sock is not None:
+            try:
+                self._sock.sendto(data, destination.address)
+            except OSError as e:
+                self.send_errors += 1
+                destination.errors += 1
+                destination.consecutive_errors += 1
+                destination.last_error = str(e)
+                if destination.consecutive_errors == 1:
+                    print(f"OSC send error to {destination.host}:{destination.port}: {e}")
+                return
+        destination.consecutive_errors = 0
+        destination.datagrams_sent += 1
+        destination.messages_sent += messages
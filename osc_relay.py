@@ -0,0 +1,152 @@
+"""Forward inbound OSC datagrams to other local apps.
+
+VRChat only sends to one port, so other OSC tools normally sit behind a
+separate router process. The listener can instead hand every datagram it
+receives to an ``OSCRelay``, which sends the same bytes on to each target
+from one socket — nothing is decoded or re-encoded.
+
+A target can take everything or only some addresses. Filters are OSC address
+patterns (``/avatar/parameters/Face*``) or prefixes (``/avatar/parameters/``).
+Only the address is read out of the datagram to check them, and the answer is
+cached per address. Bundles go to a filtered target if any message inside
+matches.
+"""
+
+import socket
+import struct
+
+from osc_router import is_pattern, pattern_segments
+
+_SIZE = struct.Struct(">i")
+_MATCH_CACHE_LIMIT = 4096
+
+
+def _bundle_addresses(data):
+    """Addresses of the messages in a bundle (nested bundles included)."""
+    addresses = []
+    i = 16  # "#bundle\0" + 8-byte timetag
+    while i + 4 <= len(data):
+        size = _SIZE.unpack_from(data, i)[0]
+        element = data[i + 4:i + 4 + size]
+        if element.startswith(b"#bundle"):
+            addresses.extend(_bundle_addresses(element))
+        else:
+            end = element.find(b"\x00")
+            if end > 0:
+                addresses.append(element[:end])
+        i += 4 + size
+    return addresses
+
+
+class AddressFilter:
+    """Matches an address against an OSC address pattern or a prefix."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        if is_pattern(spec):
+            self._segments = pattern_segments(spec)
+            self.prefix = None
+        else:
+            self._segments = None
+            self.prefix = spec
+
+    def matches(self, address):
+        if self._segments is None:
+            return (address == self.prefix or address.startswith(self.prefix)
+                    and (self.prefix.endswith("/") or address[len(self.prefix)] == "/"))
+        parts = address.split("/")[1:]
+        return len(parts) == len(self._segments) and all(
+            regex.match(part) for regex, part in zip(self._segments, parts))
+
+
+class RelayTarget:
+    def __init__(self, host, port, filters=()):
+        self.host = host
+        self.port = port
+        self.address = (host, port)
+        self.filters = [AddressFilter(f) for f in filters]
+        self._cache = {}    # address bytes -> relay it?
+        # Stats
+        self.sent = 0
+        self.bytes = 0
+        self.filtered = 0
+        self.errors = 0
+        self.last_error = None
+
+    def wants(self, address):
+        if not self.filters:
+            return True
+        wanted = self._cache.get(address)
+        if wanted is None:
+            text = address.decode("utf-8", "replace")
+            wanted = any(f.matches(text) for f in self.filters)
+            if len(self._cache) >= _MATCH_CACHE_LIMIT:
+                self._cache.clear()
+            self._cache[address] = wanted
+        return wanted
+
+    def get_stats(self):
+        return {
+            "target": f"{self.host}:{self.port}",
+            "filters": [f.spec for f in self.filters],
+            "sent": self.sent,
+            "bytes": self.bytes,
+            "filtered": self.filtered,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+class OSCRelay:
+    def __init__(self, targets=()):
+        """
+        Args:
+            targets: iterable of {"host", "port", "filters"} dicts
+        """
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self.targets = []
+        self.set_targets(targets)
+
+    def set_targets(self, targets):
+        """Replace the target list (stats restart for every target)."""
+        self.targets = [
+            RelayTarget(t.get("host", "127.0.0.1"), int(t["port"]), t.get("filters") or ())
+            for t in targets if t.get("port")
+        ]
+        if self.targets:
+            print("OSC relay to " + ", ".join(f"{t.host}:{t.port}" for t in self.targets))
+
+    def forward(self, data):
+        """Send one received datagram on to every target that wants it."""
+        targets = self.targets
+        if not targets:
+            return
+        addresses = None
+        for target in targets:
+            if target.filters:
+                if addresses is None:
+                    if data.startswith(b"#bundle"):
+                        addresses = _bundle_addresses(data)
+                    else:
+                        end = data.find(b"\x00")
+                        addresses = [data[:end]] if end > 0 else []
+                if not any(target.wants(a) for a in addresses):
+                    target.filtered += 1
+                    continue
+            try:
+                self._sock.sendto(data, target.address)
+            except OSError as e:
+                # Nothing listening there yet (ICMP unreachable) or the
+                # socket buffer is full; drop this datagram for this target
+                target.errors += 1
+                target.last_error = str(e)
+                continue
+            target.sent += 1
+            target.bytes += len(data)
+
+    def get_stats(self):
+        return [t.get_stats() for t in self.targets]
+
+    def close(self):
+        self._sock.close()
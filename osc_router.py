@@ -0,0 +1,368 @@
+"""Inbound OSC routing owned by the app.
+
+Exact addresses live in a hash table and OSC address patterns (``*``, ``?``,
+``[a-z]``, ``{a,b}``) in a per-segment trie. Handlers are added with ``map()``
+and taken away again with ``unmap()`` / ``replace()``, so removed variables
+and renamed panel entries stop costing anything at dispatch time.
+
+What actually gets called is an *active table*: a prebuilt ``{address:
+handlers}`` dict for the avatar currently worn, with any matching pattern
+handlers already folded into each exact entry. Avatar parameters the avatar
+doesn't have are left out of its table, so switching avatars is a single
+reference swap and never re-registers anything. Addresses that only a pattern
+matches are resolved through the trie once and cached.
+
+Every message is written into ``params`` (a ``ParamStore``) before any
+handler runs, so the latest value of each parameter is readable from one place
+whether or not anything is mapped to it. Each handler also picks which samples
+it wants. VRChat resends unchanged parameter values constantly, so a handler
+is only called on ``EVERY`` sample, on ``CHANGES`` of the value, or on
+``RISING`` edges (falsy → truthy), judged against the value the store held.
+Skipped calls are counted per address for ``get_filter_stats()``.
+
+Handlers mapped with ``blocking=True`` (anything that calls OpenShock) are
+passed to ``pool`` when one is set, so they never run on the receive loop.
+"""
+
+import re
+import threading
+from contextlib import contextmanager
+from time import perf_counter_ns
+
+from param_store import ParamStore, MISSING
+
+AVATAR_PARAM_PREFIX = "/avatar/parameters/"
+
+# Delivery modes for map()
+EVERY = "every"
+CHANGES = "changes"
+RISING = "rising"
+
+_PATTERN_CHARS = frozenset("*?[]{}")
+_RESOLVED_LIMIT = 4096   # pattern-only addresses cached per table
+
+
+def is_pattern(address):
+    return not _PATTERN_CHARS.isdisjoint(address)
+
+
+def _segment_regex(segment):
+    """Compile one OSC address-pattern segment (between slashes)."""
+    out, i = [], 0
+    while i < len(segment):
+        c = segment[i]
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = segment.find("]", i)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                body = segment[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        elif c == "{":
+            end = segment.find("}", i)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                options = segment[i + 1:end].split(",")
+                out.append("(?:" + "|".join(re.escape(o) for o in options) + ")")
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return re.compile("".join(out) + r"\Z")
+
+
+def pattern_segments(pattern):
+    """Compiled regex per segment of an OSC address pattern."""
+    return [_segment_regex(segment) for segment in pattern.split("/")[1:]]
+
+
+class _TrieNode:
+    __slots__ = ("literal", "patterns", "handlers")
+
+    def __init__(self):
+        self.literal = {}       # segment -> _TrieNode
+        self.patterns = {}      # pattern segment -> (compiled regex, _TrieNode)
+        self.handlers = []      # [(handler, blocking, mode), ...] for patterns ending here
+
+
+class OSCRouter:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._routes = {}       # exact address -> [(handler, blocking, mode), ...] (all avatars)
+        self._trie = _TrieNode()
+        self._pattern_count = 0
+        self._profiles = {}     # avatar_id -> frozenset of parameter addresses
+        self._tables = {}       # avatar_id -> prebuilt {address: ((handler, blocking, mode), ...)}
+        self._default_table = {}
+        self._batch_depth = 0
+        self._dirty = False
+        self.avatar_id = None
+        self.active_params = None   # frozenset for the current avatar, None = unknown
+        self._table = {}
+        self._resolved = {}     # pattern-only address -> handlers, for the active table
+        self.pool = None        # WorkerPool for blocking handlers (None = run inline)
+        self.params = ParamStore()  # latest value of every inbound address
+        # Change filter
+        self.delivered = 0      # handler calls made
+        self.skipped = {}       # address -> handler calls saved by the filter
+        self.skipped_total = 0
+        self.stats = None       # OSCStats for traffic/handler cost, see set_stats()
+
+    # ── registration ──────────────────────────────────────────────────────────
+
+    def map(self, address, handler, blocking=False, mode=EVERY):
+        """Register handler(address, *args) for an address or address pattern.
+
+        blocking: the handler may wait on the network; run it on the pool.
+        mode: EVERY sample, only CHANGES of value, or only RISING edges.
+        """
+        with self._lock:
+            handlers = self._handlers_at(address, create=True)
+            # == rather than "is": each bound-method access is a new object
+            if all(h != handler for h, _, _ in handlers):
+                if not handlers and is_pattern(address):
+                    self._pattern_count += 1
+                handlers.append((handler, blocking, mode))
+            self._invalidate()
+
+    def unmap(self, address, handler=None):
+        """Remove handler from address (or every handler there if None)."""
+        with self._lock:
+            handlers = self._handlers_at(address, create=False)
+            if not handlers:
+                return
+            if handler is None:
+                handlers.clear()
+            else:
+                handlers[:] = [entry for entry in handlers if entry[0] != handler]
+            if not handlers:
+                self._drop(address)
+            self._invalidate()
+
+    def replace(self, address, handler, blocking=False, mode=EVERY):
+        """Make handler the only one mapped to address."""
+        with self.batch():
+            self.unmap(address)
+            self.map(address, handler, blocking, mode)
+
+    @contextmanager
+    def batch(self):
+        """Defer table rebuilds until a run of map/unmap calls is done."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    self._invalidate()
+
+    def _handlers_at(self, address, create):
+        if not is_pattern(address):
+            if create:
+                return self._routes.setdefault(address, [])
+            return self._routes.get(address)
+        node = self._trie
+        for segment in address.split("/")[1:]:
+            if is_pattern(segment):
+                entry = node.patterns.get(segment)
+                if entry is None:
+                    if not create:
+                        return None
+                    entry = node.patterns[segment] = (_segment_regex(segment), _TrieNode())
+                node = entry[1]
+            else:
+                child = node.literal.get(segment)
+                if child is None:
+                    if not create:
+                        return None
+                    child = node.literal[segment] = _TrieNode()
+                node = child
+        return node.handlers
+
+    def _drop(self, address):
+        """Forget an address with no handlers left (pattern nodes are kept)."""
+        if not is_pattern(address):
+            self._routes.pop(address, None)
+        else:
+            self._pattern_count -= 1
+
+    def _match_patterns(self, address):
+        """Pattern handlers whose pattern matches the concrete address."""
+        matched = []
+        nodes = [self._trie]
+        for segment in address.split("/")[1:]:
+            next_nodes = []
+            for node in nodes:
+                child = node.literal.get(segment)
+                if child is not None:
+                    next_nodes.append(child)
+                for regex, child in node.patterns.values():
+                    if regex.match(segment):
+                        next_nodes.append(child)
+            if not next_nodes:
+                return matched
+            nodes = next_nodes
+        for node in nodes:
+            matched.extend(node.handlers)
+        return matched
+
+    # ── profiles ─────────────────────────────────────────────────────────────
+
+    def set_profiles(self, profiles):
+        """Replace the known avatar profiles ({avatar_id: iterable of addresses})."""
+        with self._lock:
+            self._profiles = {aid: frozenset(params) for aid, params in profiles.items()}
+            self._invalidate()
+
+    def add_profile(self, avatar_id, params):
+        with self._lock:
+            self._profiles[avatar_id] = frozenset(params)
+            self._tables[avatar_id] = self._build_table(self._profiles[avatar_id])
+            if avatar_id == self.avatar_id:
+                self._activate_locked(avatar_id)
+
+    def has_profile(self, avatar_id):
+        return avatar_id in self._profiles
+
+    def _invalidate(self):
+        """Rebuild every table after the routes or profiles changed."""
+        if self._batch_depth:
+            self._dirty = True
+            return
+        self._dirty = False
+        has_patterns = self._pattern_count > 0
+        self._default_table = {
+            address: tuple(handlers + self._match_patterns(address)) if has_patterns
+            else tuple(handlers)
+            for address, handlers in self._routes.items()
+        }
+        self._tables = {
+            aid: self._build_table(params) for aid, params in self._profiles.items()
+        }
+        self._activate_locked(self.avatar_id)
+
+    def _build_table(self, params):
+        # Non-parameter addresses (/avatar/change, /chatbox/...) always route.
+        return {
+            address: handlers
+            for address, handlers in self._default_table.items()
+            if not address.startswith(AVATAR_PARAM_PREFIX) or address in params
+        }
+
+    # ── avatar switching ─────────────────────────────────────────────────────
+
+    def activate(self, avatar_id):
+        """Swap in the prebuilt table for avatar_id (unknown avatars get all routes)."""
+        with self._lock:
+            self._activate_locked(avatar_id)
+            # The new avatar's first sample of everything counts as a change
+            self.params.clear()
+
+    def _activate_locked(self, avatar_id):
+        self.avatar_id = avatar_id
+        table = self._tables.get(avatar_id)
+        if table is None:
+            self.active_params = None
+            self._table = self._default_table
+        else:
+            self.active_params = self._profiles[avatar_id]
+            self._table = table
+        self._resolved = {}
+
+    # ── dispatch ─────────────────────────────────────────────────────────────
+
+    def set_stats(self, stats):
+        """Count traffic and time handlers into an OSCStats (None turns it off)."""
+        self.stats = stats
+
+    def routed_addresses(self):
+        """Exact addresses the active table has handlers for."""
+        return [address for address, handlers in self._table.items() if handlers]
+
+    def handlers_for(self, address):
+        """Handlers the active table routes address to."""
+        handlers = self._table.get(address)
+        if handlers is None and self._pattern_count:
+            handlers = self._resolve(address)
+        return handlers or ()
+
+    def _resolve(self, address):
+        resolved = self._resolved
+        handlers = resolved.get(address)
+        if handlers is not None:
+            return handlers
+        params = self.active_params
+        if params is not None and address.startswith(AVATAR_PARAM_PREFIX) and address not in params:
+            handlers = ()
+        else:
+            handlers = tuple(self._match_patterns(address))
+        if len(resolved) >= _RESOLVED_LIMIT:
+            resolved.clear()
+        resolved[address] = handlers
+        return handlers
+
+    def get_filter_stats(self):
+        """{"delivered": n, "skipped": n, "by_address": {address: skipped}}"""
+        by_address = dict(self.skipped)
+        return {
+            "delivered": self.delivered,
+            "skipped": self.skipped_total,
+            "by_address": dict(sorted(by_address.items(), key=lambda kv: -kv[1])),
+        }
+
+    def dispatch(self, address, *args):
+        """Call the handlers for address in the active table."""
+        stats = self.stats
+        if stats is not None:
+            stats.count(address)
+        value = args[0] if args else None
+        last = self.params.update(address, value)
+        handlers = self._table.get(address)
+        if handlers is None:
+            if not self._pattern_count:
+                return
+            handlers = self._resolve(address)
+        if not handlers:
+            return
+
+        changed = last is MISSING or value != last
+        rising = changed and bool(value) and (last is MISSING or not last)
+
+        for handler, blocking, mode in handlers:
+            if mode is not EVERY and not (changed and (mode is CHANGES or rising)):
+                self.skipped[address] = self.skipped.get(address, 0) + 1
+                self.skipped_total += 1
+                continue
+            self.delivered += 1
+            if blocking and self.pool is not None:
+                if stats is not None:
+                    self.pool.submit(address, self._run_timed, stats, handler, address, args)
+                else:
+                    self.pool.submit(address, handler, address, *args)
+                continue
+            t0 = perf_counter_ns() if stats is not None else 0
+            try:
+                handler(address, *args)
+            except Exception as e:
+                print(f"OSC handler error for {address}: {e}")
+            if stats is not None:
+                stats.record(address, handler, perf_counter_ns() - t0)
+
+    @staticmethod
+    def _run_timed(stats, handler, address, args):
+        t0 = perf_counter_ns()
+        try:
+            handler(address, *args)
+        except Exception as e:
+            print(f"OSC handler error for {address}: {e}")
+        stats.record(address, handler, perf_counter_ns() - t0)
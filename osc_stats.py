@@ -0,0 +1,152 @@
+"""Per-address OSC traffic and per-handler cost counters.
+
+The router bumps a message count for every inbound address and, for each
+handler it runs, adds the wall time to a log2 histogram keyed by (address,
+handler). Counting takes no timestamps; rates are worked out when someone
+looks, from the difference between two snapshots. Counters are plain ints
+updated without a lock, so a rare lost increment between the receive loop
+and a worker thread is accepted in exchange for staying cheap.
+
+    stats.snapshot()        # live view: rates since the previous snapshot
+    stats.export("x.json")  # everything, for offline digging
+"""
+
+import json
+import time
+
+_BUCKETS = 24   # bucket k holds calls of [2^(k-1), 2^k) µs; 0 is < 1 µs
+
+
+def latency_summary(samples, scale=1.0, quantiles=(0.5, 0.95), digits=1):
+    """{"p50", "p95", "max"} of samples, each multiplied by scale and rounded.
+
+    quantiles picks other percentiles ((0.5, 0.99) gives "p50" and "p99").
+    """
+    values = sorted(samples)
+
+    def pick(q):
+        if not values:
+            return 0.0
+        return round(values[min(len(values) - 1, int(q * len(values)))] * scale, digits)
+
+    summary = {f"p{round(q * 100):g}": pick(q) for q in quantiles}
+    summary["max"] = pick(1.0)
+    return summary
+
+
+def _handler_name(handler):
+    return getattr(handler, "__qualname__", None) or repr(handler)
+
+
+class _HandlerStats:
+    __slots__ = ("calls", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * _BUCKETS
+
+    def percentile_us(self, q):
+        """Upper bound of the bucket holding the q-th call, in µs."""
+        if not self.calls:
+            return 0
+        target = q * self.calls
+        seen = 0
+        for k, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return 1 << k
+        return 1 << (_BUCKETS - 1)
+
+
+class OSCStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self._messages = {}     # address -> messages received
+        self._cost_ns = {}      # address -> total handler ns
+        self._handlers = {}     # (address, handler) -> _HandlerStats
+        self._last_snapshot = (self.started, {}, {})
+
+    # ── hot path (called by OSCRouter) ───────────────────────────────────────
+
+    def count(self, address):
+        messages = self._messages
+        messages[address] = messages.get(address, 0) + 1
+
+    def record(self, address, handler, elapsed_ns):
+        key = (address, handler)
+        h = self._handlers.get(key)
+        if h is None:
+            h = self._handlers[key] = _HandlerStats()
+        h.calls += 1
+        h.total_ns += elapsed_ns
+        if elapsed_ns > h.max_ns:
+            h.max_ns = elapsed_ns
+        h.buckets[min((elapsed_ns // 1000).bit_length(), _BUCKETS - 1)] += 1
+        self._cost_ns[address] = self._cost_ns.get(address, 0) + elapsed_ns
+
+    # ── views ────────────────────────────────────────────────────────────────
+
+    def snapshot(self):
+        """Per-address rates since the previous snapshot.
+
+        Returns {address: {"messages", "hz", "avg_hz", "handler_ms_per_s"}}.
+        """
+        now = time.monotonic()
+        prev_t, prev_messages, prev_cost = self._last_snapshot
+        messages = dict(self._messages)
+        cost = dict(self._cost_ns)
+        window = max(now - prev_t, 1e-6)
+        total = max(now - self.started, 1e-6)
+        view = {}
+        for address, n in messages.items():
+            spent = cost.get(address, 0) - prev_cost.get(address, 0)
+            view[address] = {
+                "messages": n,
+                "hz": (n - prev_messages.get(address, 0)) / window,
+                "avg_hz": n / total,
+                "handler_ms_per_s": spent / 1e6 / window,
+            }
+        self._last_snapshot = (now, messages, cost)
+        return view
+
+    def to_dict(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        addresses = sorted(self._messages.items(), key=lambda kv: -kv[1])
+        handlers = sorted(self._handlers.items(), key=lambda kv: -kv[1].total_ns)
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "addresses": [
+                {
+                    "address": address,
+                    "messages": n,
+                    "avg_hz": round(n / elapsed, 2),
+                    "handler_ms_per_s": round(self._cost_ns.get(address, 0) / 1e6 / elapsed, 4),
+                }
+                for address, n in addresses
+            ],
+            "handlers": [
+                {
+                    "address": address,
+                    "handler": _handler_name(handler),
+                    "calls": h.calls,
+                    "total_ms": round(h.total_ns / 1e6, 3),
+                    "mean_us": round(h.total_ns / h.calls / 1000, 1) if h.calls else 0,
+                    "p50_us": h.percentile_us(0.5),
+                    "p99_us": h.percentile_us(0.99),
+                    "max_us": round(h.max_ns / 1000, 1),
+                    # histogram[k] = calls taking [2^(k-1), 2^k) µs
+                    "histogram": list(h.buckets),
+                }
+                for (address, handler), h in handlers
+            ],
+        }
+
+    def export(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        print(f"OSC stats written to {path}")
+
+    def reset(self):
+        self.__init__()
@@ -0,0 +1,219 @@
+"""OSCQuery service so VRChat only sends the parameters we route.
+
+A plain UDP listener on 9001 gets every avatar parameter. An OSCQuery service
+instead advertises itself over mDNS (``_oscjson._tcp`` for the HTTP side,
+``_osc._udp`` for the OSC port) and serves a JSON tree of the addresses it
+wants; VRChat reads the tree and only sends those. The app keeps the tree in
+step with its routing table through ``set_paths()``, so adding a ShockOsc
+group or a Slide variable makes VRChat start sending it.
+
+mDNS needs the optional ``zeroconf`` package. Without it the HTTP side still
+runs, which is enough for the stand-in client below:
+
+    python oscquery.py query http://127.0.0.1:<http_port>
+"""
+
+import json
+import socket
+import sys
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, unquote
+
+try:
+    from zeroconf import ServiceInfo, Zeroconf
+    ZEROCONF_AVAILABLE = True
+except ImportError:
+    ZEROCONF_AVAILABLE = False
+
+ACCESS_NONE = 0
+ACCESS_READ = 1
+ACCESS_WRITE = 2     # clients may send to it — what VRChat looks for
+
+_EXTENSIONS = {
+    "ACCESS": True, "VALUE": False, "RANGE": False, "DESCRIPTION": False,
+    "TAGS": False, "CRITICAL": False, "CLIPMODE": False,
+}
+
+
+def build_tree(paths):
+    """OSCQuery node tree for a set of concrete OSC addresses."""
+    root = {"DESCRIPTION": "root node", "FULL_PATH": "/", "ACCESS": ACCESS_NONE, "CONTENTS": {}}
+    for path in sorted(paths):
+        node = root
+        parts = path.strip("/").split("/")
+        for i, part in enumerate(parts):
+            contents = node.setdefault("CONTENTS", {})
+            child = contents.get(part)
+            if child is None:
+                child = contents[part] = {
+                    "FULL_PATH": "/" + "/".join(parts[:i + 1]),
+                    "ACCESS": ACCESS_NONE,
+                }
+            node = child
+        node["ACCESS"] = ACCESS_WRITE
+    return root
+
+
+def _find_node(tree, path):
+    node = tree
+    for part in path.strip("/").split("/"):
+        if not part:
+            continue
+        node = node.get("CONTENTS", {}).get(part)
+        if node is None:
+            return None
+    return node
+
+
+class OSCQueryService:
+    def __init__(self, name, osc_ip, osc_port, http_port=0, mdns=True):
+        """
+        Args:
+            name: service name shown to VRChat
+            osc_ip, osc_port: where our OSC listener is bound
+            http_port: port for the OSCQuery HTTP server (0 = any free port)
+            mdns: advertise over mDNS (needs zeroconf)
+        """
+        self.name = name
+        self.osc_ip = osc_ip
+        self.osc_port = osc_port
+        self.http_port = http_port
+        self.mdns = mdns
+        self.paths = frozenset()
+        self.requests = 0
+        self._tree = build_tree(())
+        self._root_json = json.dumps(self._tree).encode()
+        self._httpd = None
+        self._thread = None
+        self._zeroconf = None
+        self._services = []
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    def start(self):
+        """Start the HTTP server and advertise it. Raises OSError if the port is taken."""
+        self._httpd = ThreadingHTTPServer((self.osc_ip, self.http_port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self.http_port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name="oscquery-http", daemon=True)
+        self._thread.start()
+        print(f"OSCQuery service on http://{self.osc_ip}:{self.http_port} "
+              f"(OSC {self.osc_ip}:{self.osc_port})")
+        if self.mdns:
+            self._advertise()
+
+    def _advertise(self):
+        if not ZEROCONF_AVAILABLE:
+            print("OSCQuery mDNS disabled (zeroconf not installed); "
+                  "VRChat won't discover the service")
+            return
+        address = socket.inet_aton(self.osc_ip)
+        server = f"{self.name}.local."
+        self._services = [
+            ServiceInfo("_oscjson._tcp.local.", f"{self.name}._oscjson._tcp.local.",
+                        addresses=[address], port=self.http_port, server=server),
+            ServiceInfo("_osc._udp.local.", f"{self.name}._osc._udp.local.",
+                        addresses=[address], port=self.osc_port, server=server),
+        ]
+        try:
+            self._zeroconf = Zeroconf()
+            for info in self._services:
+                self._zeroconf.register_service(info)
+        except Exception as e:
+            print(f"OSCQuery mDNS advertisement failed: {e}")
+
+    def shutdown(self):
+        if self._zeroconf:
+            try:
+                for info in self._services:
+                    self._zeroconf.unregister_service(info)
+                self._zeroconf.close()
+            except Exception as e:
+                print(f"OSCQuery mDNS shutdown error: {e}")
+            self._zeroconf = None
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    # ── advertised addresses ─────────────────────────────────────────────────
+
+    def set_paths(self, paths):
+        """Advertise exactly these addresses. Returns True if the set changed."""
+        paths = frozenset(paths)
+        if paths == self.paths:
+            return False
+        tree = build_tree(paths)
+        # Swap both together; request threads only ever read the references
+        self._tree, self._root_json, self.paths = tree, json.dumps(tree).encode(), paths
+        print(f"OSCQuery advertising {len(paths)} addresses")
+        return True
+
+    def host_info(self):
+        return {
+            "NAME": self.name,
+            "EXTENSIONS": _EXTENSIONS,
+            "OSC_IP": self.osc_ip,
+            "OSC_PORT": self.osc_port,
+            "OSC_TRANSPORT": "UDP",
+        }
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                service.requests += 1
+                url = urlsplit(self.path)
+                if url.query == "HOST_INFO":
+                    body = json.dumps(service.host_info()).encode()
+                elif url.path in ("", "/"):
+                    body = service._root_json
+                else:
+                    node = _find_node(service._tree, unquote(url.path))
+                    if node is None:
+                        self.send_error(404)
+                        return
+                    body = json.dumps(node).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+# ── stand-in client ──────────────────────────────────────────────────────────
+
+def _leaf_paths(node):
+    if node.get("ACCESS", ACCESS_NONE) & ACCESS_WRITE:
+        yield node["FULL_PATH"]
+    for child in node.get("CONTENTS", {}).values():
+        yield from _leaf_paths(child)
+
+
+def query(url, timeout=2.0):
+    """Read a service the way VRChat does: (host_info, set of writable addresses)."""
+    url = url.rstrip("/")
+    with urllib.request.urlopen(f"{url}/?HOST_INFO", timeout=timeout) as r:
+        host_info = json.load(r)
+    with urllib.request.urlopen(f"{url}/", timeout=timeout) as r:
+        tree = json.load(r)
+    return host_info, set(_leaf_paths(tree))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "query":
+        print("usage: python oscquery.py query http://HOST:PORT")
+        raise SystemExit(2)
+    info, paths = query(sys.argv[2])
+    print(f"{info['NAME']}: OSC {info['OSC_TRANSPORT']} {info['OSC_IP']}:{info['OSC_PORT']}")
+    for path in sorted(paths):
+        print(f"  {path}")
@@ -0,0 +1,188 @@
+"""Latest value of every inbound avatar parameter, shared by reference.
+
+The router writes each message into the store before dispatching it, so the
+store is the one place that knows what every parameter is right now. Slide
+reads its variables from here when it polls, the GUI monitor renders from it,
+and the router's change filter compares against it, instead of each keeping
+its own copy of every packet.
+
+Storage is slot-based: an address is given a slot index the first time it is
+seen and its value and timestamps live in flat parallel arrays, which stays
+compact for thousands of parameters. Writes come from the receive loop only;
+readers never take a lock, they just index the arrays.
+
+The store also watches each address's arrival rhythm. A stream that normally
+arrives every few milliseconds and then skips a few samples (longer than
+``gap_factor`` times its usual interval and ``gap_min``, but shorter than
+``gap_max``, which is more likely the parameter simply going quiet) is
+counted as a gap. Gaps on
+an address next to kernel drops on the socket say the packets were lost.
+"""
+
+import threading
+from array import array
+from collections import deque
+
+from clock import clock
+
+MISSING = object()
+
+_GAP_WARMUP = 8      # samples before an address's interval is trusted
+
+
+class _Table:
+    """One generation of storage; clear() swaps in a fresh one atomically."""
+    __slots__ = ("slots", "addresses", "values", "updated", "changed",
+                 "interval", "samples", "gaps")
+
+    def __init__(self):
+        self.slots = {}                 # address -> slot index
+        self.addresses = []             # slot -> address
+        self.values = []                # slot -> latest value
+        self.updated = array("d")       # slot -> clock.time() of last sample
+        self.changed = array("d")       # slot -> clock.time() the value last changed
+        self.interval = array("d")      # slot -> smoothed seconds between samples
+        self.samples = array("l")       # slot -> samples seen, up to _GAP_WARMUP
+        self.gaps = array("l")          # slot -> suspected gaps in the stream
+
+
+class ParamStore:
+    def __init__(self, gap_factor=3.0, gap_min=0.05, gap_max=1.0):
+        """
+        Args:
+            gap_factor: an interval this many times the usual one is a gap
+            gap_min: shorter intervals are never gaps (seconds; timer jitter)
+            gap_max: longer silences than this (seconds) are not counted
+        """
+        self._lock = threading.Lock()   # guards slot allocation and subscriptions
+        self._table = _Table()
+        self._subscribers = {}          # address -> [callback(address, value, previous)]
+        self.version = 0                # bumped on every change, for cheap polling
+        self.gap_factor = gap_factor
+        self.gap_min = gap_min
+        self.gap_max = gap_max
+        self.gaps_total = 0
+        self.recent_gaps = deque(maxlen=64)  # (address, gap seconds, clock.time())
+
+    # ── writes (receive loop) ────────────────────────────────────────────────
+
+    def update(self, address, value, now=None):
+        """Store a sample; returns the previous value or MISSING.
+
+        Subscribers for address are called inline when the value changed, so
+        they must be quick.
+        """
+        if now is None:
+            now = clock.time()
+        table = self._table
+        slot = table.slots.get(address)
+        if slot is None:
+            with self._lock:
+                slot = table.slots.get(address)
+                if slot is None:
+                    # Fill the arrays before publishing the slot so readers
+                    # never see an index past the end.
+                    table.addresses.append(address)
+                    table.values.append(value)
+                    table.updated.append(now)
+                    table.changed.append(now)
+                    table.interval.append(0.0)
+                    table.samples.append(1)
+                    table.gaps.append(0)
+                    table.slots[address] = len(table.addresses) - 1
+                    self.version += 1
+            if self._subscribers:
+                self._notify(address, value, MISSING)
+            return MISSING
+        previous = table.values[slot]
+        dt = now - table.updated[slot]
+        table.updated[slot] = now
+        interval = table.interval[slot]
+        if table.samples[slot] < _GAP_WARMUP:
+            table.samples[slot] += 1
+            interval = dt if interval == 0.0 else interval + (dt - interval) * 0.25
+        elif max(interval * self.gap_factor, self.gap_min) < dt < self.gap_max:
+            table.gaps[slot] += 1
+            self.gaps_total += 1
+            self.recent_gaps.append((address, dt, now))
+        else:
+            interval += (min(dt, self.gap_max) - interval) * 0.05
+        table.interval[slot] = interval
+        if previous is value or previous == value:
+            return previous
+        table.values[slot] = value
+        table.changed[slot] = now
+        self.version += 1
+        if self._subscribers:
+            self._notify(address, value, previous)
+        return previous
+
+    def _notify(self, address, value, previous):
+        for callback in self._subscribers.get(address, ()):
+            try:
+                callback(address, value, previous)
+            except Exception as e:
+                print(f"Parameter subscriber error for {address}: {e}")
+
+    def clear(self):
+        """Forget every value (new avatar). Subscriptions and gap totals are kept."""
+        self._table = _Table()
+        self.version += 1
+
+    # ── subscriptions ────────────────────────────────────────────────────────
+
+    def subscribe(self, address, callback):
+        """Call callback(address, value, previous) whenever address changes."""
+        with self._lock:
+            callbacks = list(self._subscribers.get(address, ()))
+            if callback not in callbacks:
+                callbacks.append(callback)
+            # Copy-on-write so the receive loop can iterate without a lock
+            self._subscribers = {**self._subscribers, address: callbacks}
+
+    def unsubscribe(self, address, callback):
+        with self._lock:
+            callbacks = [c for c in self._subscribers.get(address, ()) if c != callback]
+            subscribers = dict(self._subscribers)
+            if callbacks:
+                subscribers[address] = callbacks
+            else:
+                subscribers.pop(address, None)
+            self._subscribers = subscribers
+
+    # ── reads (any thread) ───────────────────────────────────────────────────
+
+    def get(self, address, default=None):
+        table = self._table
+        slot = table.slots.get(address)
+        return default if slot is None else table.values[slot]
+
+    def updated_at(self, address):
+        """clock.time() of the last sample for address, or None."""
+        table = self._table
+        slot = table.slots.get(address)
+        return None if slot is None else table.updated[slot]
+
+    def changed_at(self, address):
+        """clock.time() the value of address last changed, or None."""
+        table = self._table
+        slot = table.slots.get(address)
+        return None if slot is None else table.changed[slot]
+
+    def gaps(self):
+        """{address: suspected gaps} for every address that has had one."""
+        table = self._table
+        n = len(table.slots)
+        return {a: g for a, g in zip(table.addresses[:n], table.gaps[:n]) if g}
+
+    def items(self):
+        """[(address, value, updated_at), ...] for every known parameter."""
+        table = self._table
+        n = len(table.slots)
+        return list(zip(table.addresses[:n], table.values[:n], table.updated[:n]))
+
+    def __contains__(self, address):
+        return address in self._table.slots
+
+    def __len__(self):
+        return len(self._table.slots)
@@ -0,0 +1,249 @@
+"""Two-way sync between app-side values and avatar parameters.
+
+Some avatar parameters are both ours and the avatar's: the ShockPanel
+globals are sliders on the avatar and spinboxes in the UI. Pushing our value
+whenever we like fights the avatar's own puppet state — the avatar sends its
+value back, we "correct" it, and the two oscillate. ``ParamSync`` keeps one
+record per bound address (value, version, last writer, last value seen from
+the avatar, our unconfirmed write) and follows three rules:
+
+* We only send on an explicit ``write()``, and only if the value actually
+  differs from what both sides already agree on.
+* Inbound values that match our unconfirmed write within ``tolerance`` are
+  our own echo and are swallowed. Values inside ``tolerance`` of the current
+  one are jitter and are ignored, so a slider hovering around a value never
+  counts as a change.
+* While a write is unconfirmed, an inbound value equal to what the avatar
+  had before it is stale (sent before our write landed) and is held back; a
+  different value is the avatar moving on its own and wins at once. After
+  ``echo_window`` an unconfirmed write is resent, up to ``max_retries``
+  times. If the avatar still disagrees, its value is adopted. Either way the
+  sides end up matching without a loop.
+
+Values the avatar changes are handed to the bound ``apply`` callback; that is
+the only way inbound values reach the app.
+"""
+
+import threading
+
+from clock import clock
+
+APP = "app"
+AVATAR = "avatar"
+
+
+class _Binding:
+    __slots__ = ("apply", "tolerance", "value", "version", "writer",
+                 "remote", "sent", "sent_at", "before", "retries")
+
+    def __init__(self, value, apply, tolerance):
+        self.apply = apply
+        self.tolerance = tolerance
+        self.value = value          # what the app currently holds
+        self.version = 0            # bumped whenever value changes, from either side
+        self.writer = APP           # who set value last
+        self.remote = None          # last value seen from the avatar (None = not yet)
+        self.sent = None            # our unconfirmed write
+        self.sent_at = 0.0
+        self.before = None          # the avatar's value when we wrote
+        self.retries = 0
+
+
+def _same(a, b, tolerance):
+    if a is None or b is None:
+        return a is b
+    if isinstance(a, bool) or isinstance(b, bool) or not tolerance:
+        return a == b
+    return abs(a - b) <= tolerance
+
+
+class ParamSync:
+    def __init__(self, client, echo_window=1.0, max_retries=2):
+        """
+        Args:
+            client: outbound OSC client (send_message)
+            echo_window: seconds to wait for the avatar to echo a write
+            max_retries: resends before the avatar's value is adopted
+        """
+        self.client = client
+        self.echo_window = echo_window
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._bindings = {}     # address -> _Binding
+        self._timer = None
+        # Stats
+        self.sends = 0
+        self.skipped_sends = 0
+        self.echoes = 0
+        self.adopted = 0
+
+    # ── bindings ─────────────────────────────────────────────────────────────
+
+    def bind(self, address, value, apply, tolerance=0.0):
+        """Sync address, starting from the app's value.
+
+        apply(value) is called (outside the lock) when the avatar's value is
+        taken. Rebinding keeps the record but replaces apply and tolerance.
+        """
+        with self._lock:
+            binding = self._bindings.get(address)
+            if binding is None:
+                self._bindings[address] = _Binding(value, apply, tolerance)
+            else:
+                binding.apply = apply
+                binding.tolerance = tolerance
+
+    def set_local(self, address, value):
+        """The app's value changed without asking for a send (e.g. config load)."""
+        with self._lock:
+            binding = self._bindings.get(address)
+            if binding is not None and not _same(value, binding.value, binding.tolerance):
+                binding.value = value
+                binding.version += 1
+                binding.writer = APP
+
+    def unbind(self, address):
+        with self._lock:
+            self._bindings.pop(address, None)
+
+    def forget_remote(self):
+        """The avatar changed: drop what we knew about its side."""
+        with self._lock:
+            for binding in self._bindings.values():
+                binding.remote = None
+                binding.sent = None
+                binding.retries = 0
+
+    # ── app side ─────────────────────────────────────────────────────────────
+
+    def write(self, address, value):
+        """App changed address; send it unless both sides already have it."""
+        with self._lock:
+            binding = self._bindings.get(address)
+            if binding is None:
+                send = True
+            else:
+                before = binding.remote if binding.remote is not None else binding.value
+                if not _same(value, binding.value, binding.tolerance):
+                    binding.value = value
+                    binding.version += 1
+                    binding.writer = APP
+                send = not (_same(value, binding.remote, binding.tolerance)
+                            or _same(value, binding.sent, binding.tolerance))
+                if send:
+                    if binding.sent is None:
+                        binding.before = before
+                    binding.sent = value
+                    binding.sent_at = clock.monotonic()
+                    binding.retries = 0
+            if send:
+                self.sends += 1
+            else:
+                self.skipped_sends += 1
+        if send:
+            self.client.send_message(address, value)
+            if binding is not None:
+                self._schedule()
+        return send
+
+    # ── avatar side ──────────────────────────────────────────────────────────
+
+    def receive(self, address, value):
+        """Inbound value for address. Returns True if it was applied."""
+        with self._lock:
+            binding = self._bindings.get(address)
+            if binding is None:
+                return False
+            binding.remote = value
+            if binding.sent is not None:
+                if _same(value, binding.sent, binding.tolerance):
+                    # Our own write coming back
+                    binding.sent = None
+                    self.echoes += 1
+                    return False
+                if _same(value, binding.before, binding.tolerance):
+                    # Stale: sent before our write landed; reconcile() decides
+                    return False
+                # The avatar moved on its own since; it wins
+                binding.sent = None
+            if _same(value, binding.value, binding.tolerance):
+                return False
+            binding.value = value
+            binding.version += 1
+            binding.writer = AVATAR
+            apply = binding.apply
+        apply(value)
+        return True
+
+    # ── reconciliation ───────────────────────────────────────────────────────
+
+    def _schedule(self):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = clock.timer(self.echo_window, self._on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        if self.reconcile():
+            self._schedule()
+
+    def reconcile(self):
+        """Settle unconfirmed writes past the echo window. Returns True if any remain."""
+        now = clock.monotonic()
+        resend, adopt, pending = [], [], False
+        with self._lock:
+            for address, binding in self._bindings.items():
+                if binding.sent is None:
+                    continue
+                if now - binding.sent_at < self.echo_window:
+                    pending = True
+                    continue
+                if _same(binding.remote, binding.sent, binding.tolerance):
+                    binding.sent = None
+                elif binding.retries < self.max_retries:
+                    binding.retries += 1
+                    binding.sent_at = now
+                    resend.append((address, binding.sent))
+                    pending = True
+                else:
+                    binding.sent = None
+                    if binding.remote is not None and not _same(
+                            binding.remote, binding.value, binding.tolerance):
+                        # The avatar keeps its own value; stop fighting it
+                        binding.value = binding.remote
+                        binding.version += 1
+                        binding.writer = AVATAR
+                        adopt.append((binding.apply, binding.remote))
+                        self.adopted += 1
+            self.sends += len(resend)
+        for address, value in resend:
+            self.client.send_message(address, value)
+        for apply, value in adopt:
+            apply(value)
+        return pending
+
+    # ── inspection ───────────────────────────────────────────────────────────
+
+    def get_state(self, address):
+        """{"value", "version", "writer", "remote", "pending"} or None."""
+        with self._lock:
+            b = self._bindings.get(address)
+            if b is None:
+                return None
+            return {"value": b.value, "version": b.version, "writer": b.writer,
+                    "remote": b.remote, "pending": b.sent is not None}
+
+    def get_stats(self):
+        return {"bound": len(self._bindings), "sends": self.sends,
+                "skipped_sends": self.skipped_sends, "echoes": self.echoes,
+                "adopted": self.adopted}
+
+    def cleanup(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
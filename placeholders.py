@@ -6,6 +6,7 @@ from datetime import datetime
 import requests
 
 from bpm import bpm_monitor
+from replay import input_recorder, KIND_SSE
 
 
 class DataCache:
@@ -52,21 +53,27 @@ class DataCache:
                             event_type = line[len("event:"):].strip()
                         elif line.startswith("data:"):
                             data_str = line[len("data:"):].strip()
-                            try:
-                                data = json.loads(data_str)
-                                with self._jmm_lock:
-                                    if event_type == "metadata":
-                                        self.jmm_cache["metadata"] = data
-                                    elif event_type == "listeners":
-                                        self.jmm_cache["listeners"] = data
-                            except json.JSONDecodeError:
-                                pass
+                            self._handle_sse_event(event_type, data_str)
                         # Lines starting with ':' are SSE comments/keepalives — ignore
             except Exception as e:
                 if self._sse_running:
                     print(f"SSE error ({e}), reconnecting in 5s...")
                     time.sleep(5)
 
+    def _handle_sse_event(self, event_type, data_str):
+        """Apply one SSE data line to the JoinMyMusic cache."""
+        if input_recorder.active:
+            input_recorder.record_json(KIND_SSE, [event_type, data_str])
+        try:
+            data = json.loads(data_str)
+        except json.JSONDecodeError:
+            return
+        with self._jmm_lock:
+            if event_type == "metadata":
+                self.jmm_cache["metadata"] = data
+            elif event_type == "listeners":
+                self.jmm_cache["listeners"] = data
+
     def get_jmm_data(self):
         with self._jmm_lock:
             return dict(self.jmm_cache)
@@ -0,0 +1,365 @@
+"""Input capture and replay for regression testing.
+
+The recorder writes every inbound event the app reacts to (OSC datagrams, SSE
+events, SignalR frames, BPM notifications, STT results) plus every outbound
+message it produces into a compact binary file, stamped with monotonic time.
+The header holds the RNG seed and the config in use (secrets blanked out).
+
+The replayer feeds that file back into an offline ``VRChatMessenger`` (no
+listener, no network, fake outbound clients) running on the captured config,
+at 1x or N× speed, then diffs the outputs it produced against the recorded
+ones and compares their latency. N× speed runs the shared ``clock`` N times
+faster, so cooldowns, hold timers, the chatbox rate limit and the output tick
+shrink with the input timeline; very high speeds leave thread scheduling
+jitter visible as divergences.
+
+Usage:
+    python app.py --record session.vrcrec       # capture a live session
+    python replay.py session.vrcrec --speed 10  # replay it 10x faster
+"""
+
+import argparse
+import asyncio
+import bisect
+import difflib
+import json
+import random
+import struct
+import threading
+
+from clock import clock
+from config import config_store, SECRET_KEYS
+from osc_stats import latency_summary
+from shock_actions import rng
+
+MAGIC = b"VRCREC2\n"
+_MAGIC_V1 = b"VRCREC1\n"             # seed only, no config
+_HEADER = struct.Struct("<II")       # seed, config JSON length
+_HEADER_V1 = struct.Struct("<I")
+_RECORD = struct.Struct("<dBI")      # t (s since start), kind, payload length
+
+# Inbound event kinds
+KIND_OSC = 1        # raw OSC datagram bytes
+KIND_SSE = 2        # JSON [event_type, data_str]
+KIND_SIGNALR = 3    # SignalR text frame (utf-8)
+KIND_BPM = 4        # raw heart-rate measurement bytes
+KIND_STT = 5        # JSON [event, value] — event is partial/final/state
+
+# Outbound event kinds
+KIND_OUT_OSC = 16      # JSON [address, value]
+KIND_OUT_CONTROL = 17  # JSON [transport, shocker_ids, type, intensity, duration_ms]
+
+INPUT_KINDS = {KIND_OSC, KIND_SSE, KIND_SIGNALR, KIND_BPM, KIND_STT}
+
+
+class InputRecorder:
+    """Appends timestamped events to a capture file.
+
+    ``active`` is a plain attribute so hot paths can skip the call entirely
+    when nothing is being recorded."""
+
+    def __init__(self):
+        self.active = False
+        # When set (by the replayer), outputs go here instead of to the file.
+        self.output_sink = None
+        self._file = None
+        self._t0 = 0.0
+        self._lock = threading.Lock()
+        self.records_written = 0
+
+    def start(self, path):
+        self.stop()
+        seed = random.randrange(2 ** 32)
+        # Seed the controllers' RNG so random intensities replay identically.
+        rng.seed(seed)
+        config = json.dumps(_blank_secrets(config_store.get())).encode("utf-8")
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + _HEADER.pack(seed, len(config)) + config)
+        self._t0 = clock.monotonic()
+        self.records_written = 0
+        self.active = True
+        print(f"Recording inputs to {path}")
+
+    def stop(self):
+        with self._lock:
+            self.active = False
+            if self._file:
+                self._file.close()
+                self._file = None
+                print(f"Recording stopped ({self.records_written} records)")
+
+    def record(self, kind, payload):
+        if not self.active:
+            return
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        t = clock.monotonic() - self._t0
+        with self._lock:
+            if not self._file:
+                return
+            self._file.write(_RECORD.pack(t, kind, len(payload)))
+            self._file.write(payload)
+            self.records_written += 1
+
+    def record_osc(self, data):
+        """Capture hook for the OSC dispatcher (``dispatcher.capture``)."""
+        self.record(KIND_OSC, data)
+
+    def record_json(self, kind, value):
+        if self.active:
+            self.record(kind, json.dumps(value, separators=(",", ":")))
+
+    def record_output(self, kind, value):
+        sink = self.output_sink
+        if sink:
+            sink(kind, value)
+        elif self.active:
+            self.record_json(kind, value)
+
+
+input_recorder = InputRecorder()
+
+
+def _blank_secrets(value):
+    """Copy of value with secret fields (API tokens) replaced by a placeholder."""
+    if isinstance(value, dict):
+        return {k: ("redacted" if k in SECRET_KEYS and v else _blank_secrets(v))
+                for k, v in value.items()}
+    if isinstance(value, list):
+        return [_blank_secrets(v) for v in value]
+    return value
+
+
+def read_capture(path):
+    """Return (seed, config, [(t, kind, payload_bytes), ...]) for a capture file.
+
+    config is None for captures made before it was recorded."""
+    with open(path, "rb") as f:
+        data = f.read()
+    config = None
+    if data.startswith(MAGIC):
+        off = len(MAGIC)
+        seed, size = _HEADER.unpack_from(data, off)
+        off += _HEADER.size
+        config = json.loads(data[off:off + size])
+        off += size
+    elif data.startswith(_MAGIC_V1):
+        off = len(_MAGIC_V1)
+        (seed,) = _HEADER_V1.unpack_from(data, off)
+        off += _HEADER_V1.size
+    else:
+        raise ValueError(f"{path} is not a VRCChatbox capture file")
+    records = []
+    while off + _RECORD.size <= len(data):
+        t, kind, n = _RECORD.unpack_from(data, off)
+        off += _RECORD.size
+        records.append((t, kind, data[off:off + n]))
+        off += n
+    return seed, config, records
+
+
+# ── Capture taps ──────────────────────────────────────────────────────────────
+
+def record_control(transport, shocker_ids, action_type, intensity, duration_ms):
+    """Capture an outbound OpenShock control command."""
+    if input_recorder.active or input_recorder.output_sink:
+        input_recorder.record_output(
+            KIND_OUT_CONTROL,
+            [transport, list(shocker_ids), action_type, int(intensity), int(duration_ms)],
+        )
+
+
+# ── Replay ────────────────────────────────────────────────────────────────────
+
+class _FakeResponse:
+    status_code = 200
+    text = ""
+
+
+class FakeHTTPSession:
+    """Stands in for the OpenShock requests.Session during replay.
+
+    Every request "succeeds"; the controller then reports the command through
+    record_control exactly as it does live."""
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        return _FakeResponse()
+
+
+class Replayer:
+    def __init__(self, path, speed=1.0, settle=3.0):
+        """
+        Args:
+            path: capture file written by InputRecorder
+            speed: time compression factor (1.0 = real time)
+            settle: seconds (recording time) to keep collecting outputs after the last input
+        """
+        self.path = path
+        self.speed = max(0.01, float(speed))
+        self.settle = settle
+        self.seed, self.config, self.records = read_capture(path)
+        self._outputs = []
+        self._out_lock = threading.Lock()
+        self._t0 = 0.0
+
+    def _sink(self, kind, value):
+        # The clock runs at replay speed, so this is already recording time
+        t = clock.monotonic() - self._t0
+        value = json.loads(json.dumps(value))  # normalise tuples etc.
+        with self._out_lock:
+            self._outputs.append((t, kind, value))
+
+    def _build_messenger(self):
+        from app import VRChatMessenger
+
+        # Offline, the shared OSCOutput opens no socket and reports what it
+        # flushes to input_recorder.output_sink, i.e. self._sink.
+        messenger = VRChatMessenger(offline=True)
+        messenger.shock_controller.http_session = FakeHTTPSession()
+        return messenger
+
+    def _feed(self, messenger, loop, kind, payload):
+        from bpm import bpm_monitor
+        from placeholders import data_cache
+
+        if kind == KIND_OSC:
+            messenger.dispatcher.call_handlers_for_packet(payload, ("127.0.0.1", 0))
+        elif kind == KIND_SSE:
+            event_type, data_str = json.loads(payload)
+            data_cache._handle_sse_event(event_type, data_str)
+        elif kind == KIND_SIGNALR:
+            loop.run_until_complete(
+                messenger.shock_controller.handle_signalr_message(payload.decode("utf-8"))
+            )
+        elif kind == KIND_BPM:
+            # BPM lines are only displayed while a sensor is connected. Connect
+            # on the first reading, as live, not up front: the messenger would
+            # notice a sensor the capture never had and redraw the chatbox.
+            bpm_monitor._connected = True
+            bpm_monitor._hr_handler(None, bytearray(payload))
+        elif kind == KIND_STT:
+            event, value = json.loads(payload)
+            if event == "partial":
+                messenger._on_stt_partial(value)
+            elif event == "final":
+                messenger._on_stt_final(value)
+            elif event == "state":
+                messenger._on_stt_state(value)
+
+    def run(self):
+        """Replay the capture and return a report dict."""
+        input_recorder.output_sink = self._sink
+        if self.config is not None:
+            config_store.pin(self.config)
+        else:
+            print("Capture has no config snapshot, replaying against the current config")
+        clock.set_speed(self.speed)
+        rng.seed(self.seed)
+        loop = asyncio.new_event_loop()
+        inputs = [(t, k, p) for t, k, p in self.records if k in INPUT_KINDS]
+        print(f"Replaying {len(inputs)} inputs from {self.path} at {self.speed:g}x")
+
+        # app.py --record starts recording before it builds the messenger, so
+        # the startup output is in the capture; collect from the same point.
+        with self._out_lock:
+            self._outputs.clear()
+        self._t0 = clock.monotonic()
+        messenger = self._build_messenger()
+        for t, kind, payload in inputs:
+            clock.sleep(self._t0 + t - clock.monotonic())
+            try:
+                self._feed(messenger, loop, kind, payload)
+            except Exception as e:
+                print(f"Replay error on kind {kind} at {t:.3f}s: {e}")
+        clock.sleep(self.settle)
+
+        messenger.cleanup()
+        input_recorder.output_sink = None
+        clock.set_speed(1.0)
+        if self.config is not None:
+            config_store.pin(None)
+        loop.close()
+        return self.compare()
+
+    def compare(self):
+        expected = [
+            (t, k, json.loads(p)) for t, k, p in self.records
+            if k not in INPUT_KINDS
+        ]
+        with self._out_lock:
+            actual = list(self._outputs)
+        input_times = [t for t, k, _ in self.records if k in INPUT_KINDS]
+
+        def key(item):
+            return json.dumps([item[1], item[2]])
+
+        divergences = []
+        matcher = difflib.SequenceMatcher(
+            a=[key(e) for e in expected], b=[key(a) for a in actual], autojunk=False
+        )
+        exp_lat, act_lat = [], []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                for e, a in zip(expected[i1:i2], actual[j1:j2]):
+                    exp_lat.append(_latency(e[0], input_times))
+                    act_lat.append(_latency(a[0], input_times))
+                continue
+            divergences.append({
+                "op": tag,
+                "expected": [(round(t, 3), v) for t, _, v in expected[i1:i2]],
+                "actual": [(round(t, 3), v) for t, _, v in actual[j1:j2]],
+            })
+
+        return {
+            "inputs": len(input_times),
+            "expected_outputs": len(expected),
+            "actual_outputs": len(actual),
+            "divergences": divergences,
+            "latency_ms": {
+                "recorded": latency_summary(exp_lat, 1000),
+                "replayed": latency_summary(act_lat, 1000),
+            },
+        }
+
+
+def _latency(t, input_times):
+    """Time from the most recent input at or before t to t."""
+    i = bisect.bisect_right(input_times, t)
+    return t - input_times[i - 1] if i else t
+
+
+def print_report(report):
+    print(f"Inputs: {report['inputs']}  Outputs: expected {report['expected_outputs']}, "
+          f"got {report['actual_outputs']}")
+    lat = report["latency_ms"]
+    for name in ("recorded", "replayed"):
+        s = lat[name]
+        print(f"  {name:9s} latency  p50 {s['p50']}ms  p95 {s['p95']}ms  max {s['max']}ms")
+    if not report["divergences"]:
+        print("No output divergence")
+        return
+    print(f"{len(report['divergences'])} divergence(s):")
+    for d in report["divergences"]:
+        print(f"  [{d['op']}] expected {d['expected']}")
+        print(f"  {' ' * (len(d['op']) + 2)} actual   {d['actual']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a VRCChatbox input capture")
+    parser.add_argument("capture", help="capture file written with app.py --record")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier")
+    parser.add_argument("--settle", type=float, default=3.0,
+                        help="seconds to wait for trailing outputs after the last input")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = Replayer(args.capture, args.speed, args.settle).run()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 1 if report["divergences"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,241 @@
+"""Non-blocking OpenShock action pipeline.
+
+Shock, vibrate, sound and stop commands used to be sent from whichever
+thread asked for them — an OSC handler, a hold timer, Slide's poll loop — and
+an HTTP send can hold that thread for up to 5 s. Callers now ``submit()`` an
+``ActionIntent`` and return at once; a single dispatcher thread sends intents
+in order and reports back through the intent's ``on_done`` callback.
+
+The dispatcher picks the transport per intent:
+
+* the SignalR gateway when it is connected and the gateway can carry the
+  action as asked (it clamps durations to 10 s),
+* otherwise, or if the gateway send fails, the HTTP API.
+
+Stops jump the queue and cancel queued actions for the same shockers.
+Intents submitted with a ``key`` (a continuous ``_CShock`` level, say)
+replace a still-queued intent with the same key, so a slider sweeping
+through thirty values sends the latest one instead of working through all
+of them.
+
+Every intent's queue wait and send time are recorded per action type.
+"""
+
+import itertools
+import random
+import threading
+import time
+from collections import deque
+
+from osc_stats import latency_summary
+
+ACTION_STOP = 0
+ACTION_SHOCK = 1
+ACTION_VIBRATE = 2
+ACTION_SOUND = 3
+
+ACTION_NAMES = {ACTION_STOP: "stop", ACTION_SHOCK: "shock",
+                ACTION_VIBRATE: "vibrate", ACTION_SOUND: "sound"}
+
+SIGNALR_MAX_DURATION = 10.0     # seconds; ControlV2 clamps anything longer
+
+_LATENCY_SAMPLES = 256
+
+# Random intensities, probabilities and cooldowns are drawn from this, not the
+# global random module, so a capture replay can seed it without side effects.
+rng = random.Random()
+
+
+class ActionIntent:
+    __slots__ = ("action_type", "shocker_ids", "intensity", "duration",
+                 "source", "key", "on_done", "queued_at")
+
+    def __init__(self, action_type, shocker_ids, intensity, duration,
+                 source="", key=None, on_done=None):
+        """
+        Args:
+            action_type: ACTION_STOP/SHOCK/VIBRATE/SOUND
+            shocker_ids: OpenShock shocker IDs
+            intensity: 0-100
+            duration: seconds
+            source: who asked, for logs and stats
+            key: intents with the same key replace each other while queued
+            on_done: on_done(intent, ok, transport), called on the dispatcher thread
+        """
+        self.action_type = action_type
+        self.shocker_ids = list(shocker_ids)
+        self.intensity = intensity
+        self.duration = duration
+        self.source = source
+        self.key = key
+        self.on_done = on_done
+        self.queued_at = 0.0
+
+
+class _ActionStats:
+    __slots__ = ("submitted", "sent", "failed", "replaced", "dropped",
+                 "by_transport", "queue_ms", "send_ms")
+
+    def __init__(self):
+        self.submitted = 0
+        self.sent = 0
+        self.failed = 0
+        self.replaced = 0
+        self.dropped = 0
+        self.by_transport = {}
+        self.queue_ms = deque(maxlen=_LATENCY_SAMPLES)
+        self.send_ms = deque(maxlen=_LATENCY_SAMPLES)
+
+
+class ActionPipeline:
+    def __init__(self, controller, max_pending=64):
+        """
+        Args:
+            controller: ShockOSCController (send_signalr_control, send_openshock_command)
+            max_pending: queued intents beyond this are dropped
+        """
+        self.controller = controller
+        self.max_pending = max_pending
+        self._cond = threading.Condition()
+        self._order = deque()       # keys in send order
+        self._pending = {}          # key -> ActionIntent
+        self._unique = itertools.count()
+        self._busy = False
+        self._closed = False
+        self._stats = {t: _ActionStats() for t in ACTION_NAMES}
+        self._thread = threading.Thread(target=self._run, name="shock-actions", daemon=True)
+        self._thread.start()
+
+    # ── submitting ───────────────────────────────────────────────────────────
+
+    def submit(self, intent):
+        """Queue an intent. Returns False if it was dropped (queue full or closed)."""
+        stats = self._stats.get(intent.action_type) or self._stats[ACTION_SHOCK]
+        key = intent.key if intent.key is not None else ("#", next(self._unique))
+        with self._cond:
+            stats.submitted += 1
+            if self._closed:
+                stats.dropped += 1
+                return False
+            intent.queued_at = time.perf_counter()
+            if intent.action_type == ACTION_STOP:
+                self._cancel_for(intent.shocker_ids)
+            if key in self._pending:
+                # Keep the queued slot (and its queue time), send the newer values
+                intent.queued_at = self._pending[key].queued_at
+                self._pending[key] = intent
+                stats.replaced += 1
+                return True
+            if len(self._pending) >= self.max_pending:
+                stats.dropped += 1
+                print(f"Shock action queue full, dropping {ACTION_NAMES.get(intent.action_type)} "
+                      f"from {intent.source or 'unknown'}")
+                return False
+            self._pending[key] = intent
+            if intent.action_type == ACTION_STOP:
+                self._order.appendleft(key)
+            else:
+                self._order.append(key)
+            self._cond.notify()
+        return True
+
+    def _cancel_for(self, shocker_ids):
+        """Drop queued actions a stop for shocker_ids makes pointless (lock held)."""
+        stopping = set(shocker_ids)
+        for key, queued in list(self._pending.items()):
+            if queued.action_type != ACTION_STOP and stopping.issuperset(queued.shocker_ids):
+                del self._pending[key]
+                self._order.remove(key)
+                self._stats[queued.action_type].replaced += 1
+
+    # ── dispatcher ───────────────────────────────────────────────────────────
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._order and not self._closed:
+                    self._cond.wait()
+                if not self._order:
+                    return
+                intent = self._pending.pop(self._order.popleft())
+                self._busy = True
+            try:
+                self._dispatch(intent)
+            except Exception as e:
+                print(f"Shock action error: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _dispatch(self, intent):
+        stats = self._stats.get(intent.action_type) or self._stats[ACTION_SHOCK]
+        started = time.perf_counter()
+        stats.queue_ms.append((started - intent.queued_at) * 1000)
+        ok, transport = self.deliver(intent.action_type, intent.shocker_ids,
+                                     intent.intensity, intent.duration)
+        stats.send_ms.append((time.perf_counter() - started) * 1000)
+        if ok:
+            stats.sent += 1
+            stats.by_transport[transport] = stats.by_transport.get(transport, 0) + 1
+        else:
+            stats.failed += 1
+        if intent.on_done:
+            intent.on_done(intent, ok, transport)
+
+    def deliver(self, action_type, shocker_ids, intensity, duration):
+        """Send one action now on the best transport. Returns (ok, transport)."""
+        sc = self.controller
+        name = ACTION_NAMES.get(action_type, f"type{action_type}")
+        if sc.signalr_connected and duration <= SIGNALR_MAX_DURATION:
+            t0 = time.perf_counter()
+            if sc.send_signalr_control(shocker_ids, intensity, int(duration * 1000), action_type):
+                dt = (time.perf_counter() - t0) * 1000
+                print(f"[TIMING] {name} sent via SignalR gateway in {dt:.0f}ms "
+                      f"({len(shocker_ids)} shocker(s), {intensity}%, {duration}s)")
+                return True, "signalr"
+            print(f"[TIMING] SignalR {name} failed after {(time.perf_counter() - t0) * 1000:.0f}ms, "
+                  f"falling back to HTTP")
+        t0 = time.perf_counter()
+        ok = sc.send_openshock_command(shocker_ids, intensity, duration, action_type)
+        print(f"[TIMING] HTTP {name} returned {ok} in {(time.perf_counter() - t0) * 1000:.0f}ms")
+        return ok, "http"
+
+    # ── inspection / shutdown ────────────────────────────────────────────────
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def get_stats(self):
+        """Per action type: counts, transports used and latency percentiles (ms)."""
+        result = {}
+        for action_type, s in self._stats.items():
+            if not s.submitted:
+                continue
+            result[ACTION_NAMES[action_type]] = {
+                "submitted": s.submitted, "sent": s.sent, "failed": s.failed,
+                "replaced": s.replaced, "dropped": s.dropped,
+                "by_transport": dict(s.by_transport),
+                "queue_ms": latency_summary(list(s.queue_ms)),
+                "send_ms": latency_summary(list(s.send_ms)),
+            }
+        return result
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is queued or being sent. Returns True if idle."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=2.0):
+        """Send what is already queued (up to timeout), then stop the dispatcher."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
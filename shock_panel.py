@@ -1,7 +1,16 @@
-import random
+import copy
 import re
 import threading
-import time
+
+from clock import clock
+from config import diff_config
+from osc_router import CHANGES
+from param_sync import ParamSync
+from shock_actions import ACTION_SHOCK, ACTION_STOP, SIGNALR_MAX_DURATION, rng
+
+PANEL_BASE = "/avatar/parameters/ShockPanel"
+# Sliders report 0..1; ignore moves smaller than about half a percent
+_SLIDER_TOLERANCE = 0.005
 
 
 def osc_safe_name(name):
@@ -26,53 +35,113 @@ class ShockPanelController:
         # Called after state changes via OSC so the host app can persist config.
         self.on_state_change = None
 
+        # Keeps globals and entry Enabled flags in step with the avatar
+        self.sync = ParamSync(osc_client)
+
         self._dispatcher = dispatcher
-        self._registered_paths = set()
+        self._registered = {}  # path -> (entry id or None for globals, handler)
+        self._synced = set()   # paths bound in self.sync
+        self.active_params = None  # addresses on the current avatar, None = all
 
         if dispatcher:
             self._register_all(dispatcher)
 
     def update_config(self, new_config):
-        self.config = new_config
-        with self._lock:
-            self._intensity_min = float(new_config.get("intensity_min", 20.0))
-            self._intensity_max = float(new_config.get("intensity_max", 80.0))
-            self._duration = float(new_config.get("duration", 1.0))
-        if self._dispatcher:
+        """Apply only what changed; returns the diff."""
+        changes = diff_config(self.config, new_config)
+        self.config = copy.deepcopy(new_config)
+        if {"intensity_min", "intensity_max", "duration"} & changes.keys():
+            with self._lock:
+                self._intensity_min = float(new_config.get("intensity_min", 20.0))
+                self._intensity_max = float(new_config.get("intensity_max", 80.0))
+                self._duration = float(new_config.get("duration", 1.0))
+            for path, value in self._global_values().items():
+                self.sync.set_local(path, value)
+        if "entries" in changes and self._dispatcher:
             self._register_all(self._dispatcher)
+        for entry in self.config.get("entries", []):
+            self.sync.set_local(self._entry_path(entry, "Enabled"), bool(entry.get("enabled", True)))
         # NOTE: we deliberately do NOT broadcast here. Pushing our stored values
         # onto the avatar on load fights the avatar's own slider/puppet state and
         # causes an oscillation loop. Broadcasting only happens on explicit UI
-        # changes (see broadcast_all callers).
+        # changes (see broadcast_all callers), through self.sync, which drops
+        # echoes and settles disagreements instead of looping.
+        return changes
+
+    def set_active_params(self, params):
+        """Avatar switched — release any holds the old avatar left running."""
+        self.active_params = params
+        self.sync.forget_remote()
+        with self._lock:
+            held = [eid for eid, active in self._hold_active.items() if active]
+        for eid in held:
+            self._stop_hold(eid)
 
     def set_dispatcher(self, dispatcher):
+        if dispatcher is not self._dispatcher:
+            self._registered = {}
         self._dispatcher = dispatcher
         self._register_all(dispatcher)
 
     def _register_all(self, dispatcher):
+        """Bring the dispatcher in line with the current entries.
+
+        Paths of deleted or renamed entries are unmapped; a path that now
+        belongs to a different entry gets a fresh handler.
+        """
+        wanted = {}  # path -> (owner, handler factory, blocking)
+        synced = {}  # path -> (current value, apply, tolerance) for ParamSync
         # Global parameters (shared by all entries)
-        for suffix, handler in [
-            ("IntensityMin", self._make_global_intensity_min_handler()),
-            ("IntensityMax", self._make_global_intensity_max_handler()),
-            ("Duration",     self._make_global_duration_handler()),
+        values = self._global_values()
+        for suffix, apply in [
+            ("IntensityMin", self._apply_intensity_min),
+            ("IntensityMax", self._apply_intensity_max),
+            ("Duration",     self._apply_duration),
         ]:
-            path = f"/avatar/parameters/ShockPanel/{suffix}"
-            if path not in self._registered_paths:
-                dispatcher.map(path, handler)
-                self._registered_paths.add(path)
+            path = f"{PANEL_BASE}/{suffix}"
+            wanted[path] = (None, self._make_synced_handler, False)
+            synced[path] = (values[path], apply, _SLIDER_TOLERANCE)
 
         # Per-entry parameters
         for entry in self.config.get("entries", []):
             eid = entry["id"]
-            name = osc_safe_name(entry.get("osc_name") or entry.get("name", ""))
-            for suffix, handler in [
-                ("Trigger", self._make_trigger_handler(eid)),
-                ("Enabled", self._make_enabled_handler(eid)),
-            ]:
-                path = f"/avatar/parameters/ShockPanel/{name}/{suffix}"
-                if path not in self._registered_paths:
-                    dispatcher.map(path, handler)
-                    self._registered_paths.add(path)
+            # Triggers call OpenShock, so keep them off the receive loop
+            wanted[self._entry_path(entry, "Trigger")] = (
+                eid, lambda eid=eid: self._make_trigger_handler(eid), True)
+            path = self._entry_path(entry, "Enabled")
+            wanted[path] = (eid, self._make_synced_handler, False)
+            synced[path] = (bool(entry.get("enabled", True)),
+                            lambda value, eid=eid: self._apply_enabled(eid, value), 0.0)
+
+        with dispatcher.batch():
+            for path, (owner, handler) in list(self._registered.items()):
+                if path not in wanted or wanted[path][0] != owner:
+                    dispatcher.unmap(path, handler)
+                    del self._registered[path]
+            for path, (owner, factory, blocking) in wanted.items():
+                if path not in self._registered:
+                    handler = factory()
+                    dispatcher.map(path, handler, blocking=blocking, mode=CHANGES)
+                    self._registered[path] = (owner, handler)
+
+        for path in self._synced - synced.keys():
+            self.sync.unbind(path)
+        for path, (value, apply, tolerance) in synced.items():
+            self.sync.bind(path, value, apply, tolerance)
+        self._synced = set(synced)
+
+    def _entry_path(self, entry, suffix):
+        name = osc_safe_name(entry.get("osc_name") or entry.get("name", ""))
+        return f"{PANEL_BASE}/{name}/{suffix}"
+
+    def _global_values(self):
+        """Current globals as the avatar sees them (0..1 slider values)."""
+        with self._lock:
+            return {
+                f"{PANEL_BASE}/IntensityMin": self._intensity_min / 100.0,
+                f"{PANEL_BASE}/IntensityMax": self._intensity_max / 100.0,
+                f"{PANEL_BASE}/Duration": max(0.0, min(1.0, (self._duration - 0.5) / 9.5)),
+            }
 
     # ── handler factories ─────────────────────────────────────────────────────
 
@@ -92,61 +161,50 @@ class ShockPanelController:
                     self._fire(eid)
         return h
 
-    def _make_global_intensity_min_handler(self):
+    def _make_synced_handler(self):
+        # Globals and Enabled flags go through ParamSync, which calls the
+        # matching _apply_* only for real changes made on the avatar
         def h(address, *args):
-            if not args:
-                return
-            val = max(0.0, min(1.0, float(args[0])))
-            new = val * 100.0
-            with self._lock:
-                if abs(new - self._intensity_min) < 0.5:
-                    return
-                self._intensity_min = new
-            self._persist_globals()
-            print(f"ShockPanel IntensityMin: {new:.0f}%")
+            if args:
+                value = args[0]
+                self.sync.receive(address, value if isinstance(value, bool) else float(value))
         return h
 
-    def _make_global_intensity_max_handler(self):
-        def h(address, *args):
-            if not args:
-                return
-            val = max(0.0, min(1.0, float(args[0])))
-            new = val * 100.0
-            with self._lock:
-                if abs(new - self._intensity_max) < 0.5:
-                    return
-                self._intensity_max = new
-            self._persist_globals()
-            print(f"ShockPanel IntensityMax: {new:.0f}%")
-        return h
+    def _apply_intensity_min(self, value):
+        new = max(0.0, min(1.0, float(value))) * 100.0
+        with self._lock:
+            self._intensity_min = new
+        self._persist_globals()
+        print(f"ShockPanel IntensityMin: {new:.0f}%")
 
-    def _make_global_duration_handler(self):
-        def h(address, *args):
-            if not args:
-                return
-            val = max(0.0, min(1.0, float(args[0])))
-            dur = 0.5 + val * 9.5
-            with self._lock:
-                if abs(dur - self._duration) < 0.05:
-                    return
-                self._duration = dur
-            self._persist_globals()
-            print(f"ShockPanel Duration: {dur:.2f}s")
-        return h
+    def _apply_intensity_max(self, value):
+        new = max(0.0, min(1.0, float(value))) * 100.0
+        with self._lock:
+            self._intensity_max = new
+        self._persist_globals()
+        print(f"ShockPanel IntensityMax: {new:.0f}%")
 
-    def _make_enabled_handler(self, eid):
-        def h(address, *args):
-            if not args:
-                return
-            val = bool(args[0])
-            entry = self._get_entry(eid)
-            if entry is None:
-                return
-            entry["enabled"] = val
-            if self.on_state_change:
-                self.on_state_change()
-            print(f"ShockPanel Enabled [{entry.get('name')}]: {val}")
-        return h
+    def _apply_duration(self, value):
+        dur = 0.5 + max(0.0, min(1.0, float(value))) * 9.5
+        with self._lock:
+            self._duration = dur
+        self._persist_globals()
+        print(f"ShockPanel Duration: {dur:.2f}s")
+
+    def _apply_enabled(self, eid, value):
+        entry = self._get_entry(eid)
+        if entry is None:
+            return
+        with self._lock:
+            entry["enabled"] = bool(value)
+        if self.on_state_change:
+            self.on_state_change()
+        print(f"ShockPanel Enabled [{entry.get('name')}]: {bool(value)}")
+
+    def export_config(self):
+        """Copy of the config, live globals and Enabled flags included, for saving."""
+        with self._lock:
+            return copy.deepcopy(self.config)
 
     def _persist_globals(self):
         """Write live global values back into config and notify the host app."""
@@ -165,49 +223,52 @@ class ShockPanelController:
                 return e
         return None
 
-    def _fire(self, eid):
+    def _fire(self, eid, duration=None):
+        """Queue a shock for the entry's shockers. Returns True if queued."""
         if not self.config.get("enabled", False):
-            return
+            return False
         entry = self._get_entry(eid)
         if not entry or not entry.get("enabled", True):
-            return
+            return False
 
         with self._lock:
             imin = self._intensity_min
             imax = self._intensity_max
-            duration = self._duration
+            if duration is None:
+                duration = self._duration
 
-        intensity = random.randint(int(min(imin, imax)), int(max(imin, imax)))
+        intensity = rng.randint(int(min(imin, imax)), int(max(imin, imax)))
 
         shocker_ids = entry.get("shocker_ids", [])
         if not shocker_ids:
             print(f"ShockPanel: no shockers assigned to '{entry.get('name')}'")
-            return
+            return False
 
         print(f"ShockPanel: firing '{entry.get('name')}' {intensity}% {duration:.2f}s")
-        self.shock_controller.send_openshock_command(
-            shocker_ids, intensity, duration, action_type=1
+        queued = self.shock_controller.queue_action(
+            ACTION_SHOCK, shocker_ids, intensity, duration, source="ShockPanel"
         )
-        if self.shock_controller.shock_callback:
+        if queued and self.shock_controller.shock_callback:
             self.shock_controller.shock_callback(intensity, entry.get("name", "panel"), duration)
+        return queued
 
     def _start_hold(self, eid):
         with self._lock:
             if self._hold_active.get(eid):
                 return
             self._hold_active[eid] = True
-            duration = self._duration
+            duration = min(self._duration, SIGNALR_MAX_DURATION)
         print(f"ShockPanel: hold start [{eid}]")
 
-        if self._fire_live(eid, duration):
-            # Live gateway sent — set failsafe timer to clean up state after duration
-            failsafe = threading.Timer(min(duration, 11.0), self._hold_timeout, args=(eid,))
+        # One shock for the longest the hold may last; releasing sends a stop
+        if not self._fire(eid, duration):
             with self._lock:
-                self._hold_timers[eid] = failsafe
-            failsafe.start()
-        else:
-            # SignalR not connected — fall back to REST-based polling loop
-            threading.Thread(target=self._hold_loop, args=(eid,), daemon=True).start()
+                self._hold_active[eid] = False
+            return
+        failsafe = clock.timer(duration, self._hold_timeout, args=(eid,))
+        with self._lock:
+            self._hold_timers[eid] = failsafe
+        failsafe.start()
 
     def _stop_hold(self, eid):
         with self._lock:
@@ -215,7 +276,14 @@ class ShockPanelController:
             timer = self._hold_timers.pop(eid, None)
         if timer:
             timer.cancel()
-        self._stop_live(eid)
+        entry = self._get_entry(eid)
+        shocker_ids = entry.get("shocker_ids", []) if entry else []
+        if shocker_ids:
+            # Jumps the queue, drops the hold shock if it hasn't gone out yet,
+            # and falls back to HTTP when the gateway is down
+            self.shock_controller.queue_action(
+                ACTION_STOP, shocker_ids, 0, 0.3, source="ShockPanel release"
+            )
         print(f"ShockPanel: hold stop [{eid}]")
 
     def _hold_timeout(self, eid):
@@ -225,60 +293,6 @@ class ShockPanelController:
             self._hold_timers.pop(eid, None)
         print(f"ShockPanel: hold ended — duration limit reached [{eid}]")
 
-    def _hold_loop(self, eid):
-        """Fallback hold loop used when SignalR is not connected."""
-        with self._lock:
-            if not self._hold_active.get(eid):
-                return
-            duration = self._duration
-
-        self._fire(eid)
-
-        deadline = time.time() + min(duration, 11.0)
-        while time.time() < deadline:
-            time.sleep(0.05)
-            with self._lock:
-                if not self._hold_active.get(eid):
-                    return
-
-        with self._lock:
-            self._hold_active[eid] = False
-        print(f"ShockPanel: hold ended — duration limit reached [{eid}]")
-
-    def _fire_live(self, eid, duration):
-        """Send shock via SignalR live gateway. Returns True if sent."""
-        if not self.config.get("enabled", False):
-            return False
-        entry = self._get_entry(eid)
-        if not entry or not entry.get("enabled", True):
-            return False
-        shocker_ids = entry.get("shocker_ids", [])
-        if not shocker_ids:
-            return False
-
-        with self._lock:
-            imin = self._intensity_min
-            imax = self._intensity_max
-
-        intensity = random.randint(int(min(imin, imax)), int(max(imin, imax)))
-        duration_ms = int(min(duration, 10.0) * 1000)
-
-        sent = self.shock_controller.send_signalr_control(shocker_ids, intensity, duration_ms, action_type=1)
-        if sent:
-            print(f"ShockPanel: live hold fire '{entry.get('name')}' {intensity}% {duration:.2f}s")
-            if self.shock_controller.shock_callback:
-                self.shock_controller.shock_callback(intensity, entry.get("name", "panel"), duration)
-        return sent
-
-    def _stop_live(self, eid):
-        """Send stop command via SignalR live gateway."""
-        entry = self._get_entry(eid)
-        if not entry:
-            return
-        shocker_ids = entry.get("shocker_ids", [])
-        if shocker_ids:
-            self.shock_controller.send_signalr_control(shocker_ids, 0, 300, action_type=0)
-
     # ── state / broadcast helpers ──────────────────────────────────────────────
 
     def get_global_state(self):
@@ -291,22 +305,13 @@ class ShockPanelController:
             }
 
     def broadcast_globals(self):
-        """Push the current global IntensityMin/IntensityMax/Duration to VRChat."""
-        base = "/avatar/parameters/ShockPanel"
-        with self._lock:
-            imin = self._intensity_min
-            imax = self._intensity_max
-            duration = self._duration
-        self.client.send_message(f"{base}/IntensityMin", imin / 100.0)
-        self.client.send_message(f"{base}/IntensityMax", imax / 100.0)
-        dur_norm = max(0.0, min(1.0, (duration - 0.5) / 9.5))
-        self.client.send_message(f"{base}/Duration", dur_norm)
+        """Push global IntensityMin/IntensityMax/Duration values that changed to VRChat."""
+        for path, value in self._global_values().items():
+            self.sync.write(path, value)
 
     def broadcast_entry_enabled(self, entry):
-        """Push an entry's Enabled bool to VRChat."""
-        name = osc_safe_name(entry.get("osc_name") or entry.get("name", ""))
-        path = f"/avatar/parameters/ShockPanel/{name}/Enabled"
-        self.client.send_message(path, bool(entry.get("enabled", True)))
+        """Push an entry's Enabled bool to VRChat if it changed."""
+        self.sync.write(self._entry_path(entry, "Enabled"), bool(entry.get("enabled", True)))
 
     def broadcast_all(self):
         self.broadcast_globals()
@@ -316,6 +321,7 @@ class ShockPanelController:
     # ── cleanup ───────────────────────────────────────────────────────────────
 
     def cleanup(self):
+        self.sync.cleanup()
         with self._lock:
             for eid in list(self._hold_active.keys()):
                 self._hold_active[eid] = False
@@ -1,3 +1,4 @@
+import copy
 import random
 import threading
 import time
@@ -6,14 +7,42 @@ import asyncio
 import json
 import websockets
 import requests
+from collections import deque
 from urllib.parse import urlencode
-from pythonosc import udp_client
+from clock import clock
+from config import diff_config, format_changes
+from cooldowns import CooldownManager
+from osc_output import OSCOutput
+from replay import input_recorder, KIND_SIGNALR, record_control
+from shock_actions import (ActionIntent, ActionPipeline, ACTION_STOP, ACTION_SHOCK,
+                           ACTION_VIBRATE, SIGNALR_MAX_DURATION, rng)
+
+# SignalR gateway connection states (see set_connection_state_callback)
+SIGNALR_STOPPED = "stopped"
+SIGNALR_CONNECTING = "connecting"
+SIGNALR_CONNECTED = "connected"
+SIGNALR_RECONNECTING = "reconnecting"
+SIGNALR_UNAUTHORIZED = "unauthorized"   # token rejected; waits for a new one
+
+SIGNALR_HANDSHAKE_TIMEOUT = 10.0   # seconds for the hub to answer the handshake
+SIGNALR_KEEPALIVE = 15.0           # client ping interval (the hub's default)
+SIGNALR_SERVER_TIMEOUT = 30.0      # silence from the hub before the link counts as dead
+SIGNALR_BACKOFF_BASE = 1.0
+SIGNALR_BACKOFF_MAX = 60.0
+
+# The OSC fallback writes the same ShockOsc parameters we listen on; VRChat
+# echoes them back within this many seconds and they must not re-trigger us
+FALLBACK_ECHO_WINDOW = 1.0
 
 
 class ShockOSCController:
-    def __init__(self, ip="127.0.0.1", port=9000, shock_callback=None):
-        """Initialize ShockOSC controller"""
-        self.client = udp_client.SimpleUDPClient(ip, port)
+    def __init__(self, ip="127.0.0.1", port=9000, shock_callback=None, client=None, offline=False):
+        """Initialize ShockOSC controller
+
+        offline: never open the SignalR gateway (used by the replayer).
+        """
+        self.client = client or OSCOutput(ip, port, offline=offline)
+        self.offline = offline
         self.config = {
             "enabled": False,
             "mode": "static",
@@ -31,36 +60,75 @@ class ShockOSCController:
             "show_internet_shocks": True
         }
         self.active_shocks = {}  # Track active shock timers
-        self.cooldown_timers = {}  # Track cooldown timers per group
-        self.cooldown_states = {}  # Track which groups are on cooldown
+        self.continuous = {}  # (group, action_type) -> refresh Timer for running _C* inputs
+        self._continuous_lock = threading.Lock()
+        self._continuous_started = {}  # (group, action_type) -> (monotonic start, first intensity)
+        self._fallback_sent = {}  # address -> (value, monotonic) of our own ShockOsc writes
+        # Group and per-shocker cooldowns; groups also drive the avatar's
+        # _Cooldown/_CooldownPercentage parameters
+        self.cooldowns = CooldownManager(on_progress=self._on_cooldown_progress,
+                                         on_expire=self._end_cooldown)
         self.shock_callback = shock_callback  # Callback to notify about shocks
+        self.group_shockers = {}  # group -> (shocker_id, ...), from config["shockers"]
+        self.shocker_groups = {}  # shocker_id -> group
+        self._index_shockers()
 
         # Reused HTTP session so the REST fallback doesn't re-open a TLS
         # connection on every shock (avoids ~hundreds of ms of handshake latency)
         self.http_session = requests.Session()
 
+        # OpenShock commands are sent from one dispatcher thread, never the caller's
+        self.actions = ActionPipeline(self)
+
         # SignalR connection properties
         self.websocket = None
         self.signalr_thread = None
         self.signalr_loop = None
         self.signalr_connected = False
+        self.signalr_state = SIGNALR_STOPPED
+        self.signalr_last_error = None
         self.internet_shock_callback = None
+        self.connection_state_callback = None
+        self._signalr_stop = threading.Event()
+        # Reconnect jitter, kept off shock_actions.rng so seeded replays stay aligned
+        self._backoff_random = random.Random()
+
+        # SignalR health
+        self.signalr_reconnects = 0
+        self.signalr_reconnect_times = deque(maxlen=20)  # seconds from drop to handshake
+        self._signalr_supervised_since = None
+        self._signalr_supervised_total = 0.0
+        self._signalr_connected_since = None
+        self._signalr_connected_total = 0.0
+        self._signalr_down_since = None
         
     def update_config(self, new_config):
-        """Update ShockOSC configuration"""
-        old_token = self.config.get("openshock_token", "").strip()
-        new_token = new_config.get("openshock_token", "").strip()
-
-        self.config.update(new_config)
-        print(f"ShockOSC config updated: {self.config}")
-
-        # Start or restart SignalR connection only if token changed
-        if new_token and new_token != old_token:
-            self.start_signalr_connection()
+        """Apply only the keys that changed. Returns the diff."""
+        changes = diff_config(self.config, new_config, partial=True)
+        if not changes:
+            return changes
+        for key, (_, value) in changes.items():
+            self.config[key] = copy.deepcopy(value)
+        print(f"ShockOSC config updated: {format_changes(changes)}")
+
+        if "shockers" in changes:
+            self._index_shockers()
+
+        # The gateway only needs reconnecting when its credentials/endpoint move
+        if "openshock_token" in changes or "openshock_url" in changes:
+            if self.config.get("openshock_token", "").strip():
+                self.start_signalr_connection()
+            else:
+                self.stop_signalr_connection()
+        return changes
 
     def set_internet_shock_callback(self, callback):
         """Set callback function for internet shock events"""
         self.internet_shock_callback = callback
+
+    def set_connection_state_callback(self, callback):
+        """Set callback(state) for SignalR gateway state changes (any thread)"""
+        self.connection_state_callback = callback
         
     def get_shock_intensity(self):
         """Get shock intensity based on current mode"""
@@ -69,7 +137,7 @@ class ShockOSCController:
         else:  # random mode
             min_val = self.config["random_min"]
             max_val = self.config["random_max"]
-            return random.randint(min_val, max_val)
+            return rng.randint(min_val, max_val)
     
     def send_openshock_command(self, shocker_ids, intensity, duration, action_type=1):
         """Send command to OpenShock API using v2 endpoint
@@ -111,6 +179,7 @@ class ShockOSCController:
             response = self.http_session.post(url, json=data, headers=headers, timeout=5)
 
             if response.status_code == 200:
+                record_control("http", shocker_ids, action_type, intensity, duration * 1000)
                 print(f"OpenShock command sent successfully: {len(shocker_ids)} shocker(s), {intensity}%, {duration}s")
                 return True
             else:
@@ -121,41 +190,175 @@ class ShockOSCController:
             print(f"Failed to send OpenShock command: {e}")
             return False
 
-    def dispatch_control(self, shocker_ids, intensity, duration, action_type=1):
-        """Send a control command using the fastest available transport.
-
-        Prefers the live SignalR gateway (persistent WebSocket, fire-and-forget,
-        ~tens of ms) which is already open for receiving events. Falls back to
-        the HTTP REST API if the gateway isn't connected or the send fails.
+    def _index_shockers(self):
+        """Rebuild the group/shocker indexes from config["shockers"]"""
+        group_shockers = {}
+        shocker_groups = {}
+        for shocker_id, assignment_info in self.config.get("shockers", {}).items():
+            # Handle both old format (string) and new format (dict)
+            if isinstance(assignment_info, dict):
+                group = assignment_info.get("group", "")
+            else:
+                group = assignment_info
+            shocker_groups[shocker_id] = group
+            group_shockers.setdefault(group, []).append(shocker_id)
+        # Swap whole dicts so lookups from other threads never see a half-built index
+        self.group_shockers = {g: tuple(ids) for g, ids in group_shockers.items()}
+        self.shocker_groups = shocker_groups
+
+    def shocker_ids_for(self, groups):
+        """OpenShock shocker IDs assigned to any of the given groups"""
+        index = self.group_shockers
+        return [shocker_id for group in groups for shocker_id in index.get(group, ())]
+
+    def group_of(self, shocker_id):
+        """Group a shocker is assigned to, or None if it isn't configured"""
+        return self.shocker_groups.get(shocker_id)
+
+    def queue_action(self, action_type, shocker_ids, intensity, duration,
+                     source="", key=None, on_done=None):
+        """Queue an OpenShock action on the pipeline and return immediately
 
-        duration: duration in seconds.
+        action_type: 0=stop, 1=shock, 2=vibrate, 3=sound
+        duration: seconds
+        Returns False if the action was dropped.
         """
         if not shocker_ids:
             print("No shocker IDs provided")
             return False
+        return self.actions.submit(ActionIntent(
+            action_type, shocker_ids, intensity, duration,
+            source=source, key=key, on_done=on_done))
 
-        # Try the low-latency live gateway first
-        if self.signalr_connected:
-            t0 = time.perf_counter()
-            ok = self.send_signalr_control(shocker_ids, intensity, int(duration * 1000), action_type)
-            dt = (time.perf_counter() - t0) * 1000
+    def send_group_action(self, group, action_type, intensity=None, duration=None):
+        """Queue one OpenShock action for every shocker in a group
+
+        Used for the ShockOsc _I* avatar inputs. There is no OSC fallback:
+        it would write the very parameter that triggered us.
+        action_type: 0=stop, 1=shock, 2=vibrate, 3=sound
+        """
+        if not self.config["enabled"]:
+            return False
+        if action_type == ACTION_SHOCK and self.is_group_on_cooldown(group):
+            print(f"Group on cooldown, skipping: {group}")
+            return False
+        if not self.config.get("openshock_token", "").strip():
+            print("OpenShock not configured, ignoring ShockOsc input")
+            return False
+        shocker_ids = self.shocker_ids_for([group])
+        if not shocker_ids:
+            print(f"No shockers assigned to group: {group}")
+            return False
+
+        if intensity is None:
+            intensity = self.get_shock_intensity()
+        if duration is None:
+            duration = self.config["duration"]
+
+        def done(intent, ok, transport):
+            if intent.action_type != ACTION_SHOCK:
+                return
             if ok:
-                print(f"[TIMING] shock sent via SignalR gateway in {dt:.0f}ms ({len(shocker_ids)} shocker(s), {intensity}%, {duration}s)")
-                return True
-            print(f"[TIMING] SignalR send failed after {dt:.0f}ms, falling back to HTTP")
-        else:
-            print("[TIMING] SignalR not connected, using HTTP")
+                if self.shock_callback:
+                    self.shock_callback(intent.intensity, group, intent.duration)
+            else:
+                self._release_cooldown(group)
 
-        # Fall back to the REST API
-        t0 = time.perf_counter()
-        ok = self.send_openshock_command(shocker_ids, intensity, duration, action_type)
-        dt = (time.perf_counter() - t0) * 1000
-        print(f"[TIMING] HTTP control returned {ok} in {dt:.0f}ms")
-        return ok
+        if action_type == ACTION_SHOCK:
+            # Start before queueing so repeats are refused while this one is
+            # pending, and a fast failure can't release it before it starts
+            self.start_cooldown(group)
+        queued = self.queue_action(action_type, shocker_ids, intensity, duration,
+                                   source=f"ShockOsc {group}", on_done=done)
+        if not queued and action_type == ACTION_SHOCK:
+            self._release_cooldown(group)
+        return queued
+
+    def set_continuous(self, group, action_type, level):
+        """Drive a ShockOsc _CShock/_CVibrate input: act while level > 0
+
+        The first non-zero level checks and starts the group cooldown and
+        sends an action of SIGNALR_MAX_DURATION. Later levels only replace
+        that action's intensity; they are neither gated by the cooldown nor
+        restart it. The action is resent before it runs out for as long as
+        the level stays up, and level 0 sends a stop.
+        A shock is reported to shock_callback when it starts (duration 0,
+        still running) and again when it stops, with how long it was held.
+        level: 0.0-1.0
+        """
+        key = (group, action_type)
+        running = key in self.continuous
+        if level <= 0:
+            if running:
+                self._stop_continuous(key)
+            return False
+        if not running:
+            if not self.config["enabled"]:
+                return False
+            if action_type == ACTION_SHOCK and self.is_group_on_cooldown(group):
+                print(f"Group on cooldown, skipping: {group}")
+                return False
+            if not self.config.get("openshock_token", "").strip():
+                print("OpenShock not configured, ignoring ShockOsc input")
+                return False
+        shocker_ids = self.shocker_ids_for([group])
+        if not shocker_ids:
+            print(f"No shockers assigned to group: {group}")
+            return False
+
+        intensity = round(min(level, 1.0) * 100)
+        queued = self._send_continuous(key, shocker_ids, intensity)
+        if queued and not running and action_type == ACTION_SHOCK:
+            self.start_cooldown(group)
+            if self.shock_callback:
+                self.shock_callback(intensity, group, 0)
+        return queued
+
+    def _send_continuous(self, key, shocker_ids, intensity):
+        """(Re)send a continuous action and schedule the resend before it expires"""
+        group, action_type = key
+        queued = self.queue_action(action_type, shocker_ids, intensity, SIGNALR_MAX_DURATION,
+                                   source=f"ShockOsc {group} continuous",
+                                   key=("continuous",) + key)
+        with self._continuous_lock:
+            timer = self.continuous.pop(key, None)
+            if timer:
+                timer.cancel()
+            if queued:
+                self._continuous_started.setdefault(key, (clock.monotonic(), intensity))
+                timer = clock.timer(SIGNALR_MAX_DURATION - 1.0, self._refresh_continuous,
+                                        [key, shocker_ids, intensity])
+                timer.daemon = True
+                self.continuous[key] = timer
+                timer.start()
+            else:
+                self._continuous_started.pop(key, None)
+        return queued
+
+    def _refresh_continuous(self, key, shocker_ids, intensity):
+        with self._continuous_lock:
+            if key not in self.continuous:
+                return
+        self._send_continuous(key, shocker_ids, intensity)
+
+    def _stop_continuous(self, key):
+        group, action_type = key
+        with self._continuous_lock:
+            timer = self.continuous.pop(key, None)
+            started = self._continuous_started.pop(key, None)
+        if timer:
+            timer.cancel()
+        shocker_ids = self.shocker_ids_for([group])
+        if shocker_ids:
+            # Jumps the queue and drops anything still pending for these shockers
+            self.queue_action(ACTION_STOP, shocker_ids, 0, 0.3, source=f"ShockOsc {group} stop")
+        if started and action_type == ACTION_SHOCK and self.shock_callback:
+            since, intensity = started
+            self.shock_callback(intensity, group, round(clock.monotonic() - since, 1))
 
     def is_group_on_cooldown(self, group):
         """Check if a group is currently on cooldown"""
-        return self.cooldown_states.get(group, False)
+        return self.cooldowns.active(("group", group))
 
     def start_cooldown(self, group):
         """Start cooldown for a group"""
@@ -166,231 +369,138 @@ class ShockOSCController:
             return
         
         print(f"Starting {cooldown_delay}s cooldown for group: {group}")
-        
-        # Set cooldown state
-        self.cooldown_states[group] = True
-        
-        # Send OSC parameter to indicate cooldown started
-        cooldown_address = f"/avatar/parameters/ShockOsc/{group}_Cooldown"
-        self.client.send_message(cooldown_address, True)
-        print(f"Sent cooldown start: {cooldown_address} = True")
-        
-        # Cancel any existing cooldown timer for this group
-        if group in self.cooldown_timers:
-            self.cooldown_timers[group].cancel()
-        
-        # Start new cooldown timer
-        timer = threading.Timer(cooldown_delay, self._end_cooldown, [group])
-        self.cooldown_timers[group] = timer
-        timer.start()
-
-    def _end_cooldown(self, group):
-        """End cooldown for a group"""
+        self.cooldowns.start(("group", group), cooldown_delay, report=True)
+        self._send_cooldown(group, True)
+
+    def _send_cooldown(self, group, active):
+        """Set the group's ShockOsc _Cooldown and _CooldownPercentage parameters"""
+        base = f"/avatar/parameters/ShockOsc/{group}"
+        self.client.send_message(f"{base}_Cooldown", active)
+        self.client.send_message(f"{base}_CooldownPercentage", 1.0 if active else 0.0)
+        print(f"Sent cooldown {'start' if active else 'end'}: {base}_Cooldown = {active}")
+
+    def _on_cooldown_progress(self, key, fraction):
+        """Cooldown manager callback: remaining fraction of a group cooldown"""
+        kind, group = key
+        if kind == "group":
+            self.client.send_message(f"/avatar/parameters/ShockOsc/{group}_CooldownPercentage", fraction)
+
+    def _end_cooldown(self, key):
+        """Cooldown manager callback: a cooldown ran out"""
+        kind, group = key
+        if kind != "group":
+            return
         print(f"Cooldown ended for group: {group}")
-        
-        # Clear cooldown state
-        self.cooldown_states[group] = False
-        
-        # Send OSC parameter to indicate cooldown ended
-        cooldown_address = f"/avatar/parameters/ShockOsc/{group}_Cooldown"
-        self.client.send_message(cooldown_address, False)
-        print(f"Sent cooldown end: {cooldown_address} = False")
-        
-        # Clean up timer
-        if group in self.cooldown_timers:
-            del self.cooldown_timers[group]
-    
+        self._send_cooldown(group, False)
+
     def send_shock(self, groups=None):
         """Send shock command to specified groups"""
-        if not self.config["enabled"]:
-            print("ShockOSC is disabled")
-            return
-            
-        if groups is None:
-            groups = self.config["groups"]
-        
-        # Filter out groups that are on cooldown
-        available_groups = [group for group in groups if not self.is_group_on_cooldown(group)]
-        
-        if not available_groups:
-            print(f"All groups are on cooldown: {groups}")
-            return
-        
-        if len(available_groups) < len(groups):
-            on_cooldown = [group for group in groups if self.is_group_on_cooldown(group)]
-            print(f"Some groups on cooldown, skipping: {on_cooldown}")
-        
-        intensity = self.get_shock_intensity()
-        duration = self.config["duration"]
-        
-        print(f"Sending shock - Groups: {available_groups}, Intensity: {intensity}%, Duration: {duration}s")
-        
-        # Check if we have OpenShock integration configured
-        token = self.config.get("openshock_token", "").strip()
-        shockers_config = self.config.get("shockers", {})
-        
-        openshock_sent = False
-        if token and shockers_config:
-            # Get shocker IDs for the available groups
-            shocker_ids = []
-            for group in available_groups:
-                for shocker_id, assignment_info in shockers_config.items():
-                    # Handle both old format (string) and new format (dict)
-                    if isinstance(assignment_info, dict):
-                        assigned_group = assignment_info.get("group", "")
-                    else:
-                        assigned_group = assignment_info
-                    
-                    if assigned_group == group:
-                        shocker_ids.append(shocker_id)
-            
-            if shocker_ids:
-                print(f"Using OpenShock for shockers: {shocker_ids}")
-                openshock_sent = self.dispatch_control(shocker_ids, intensity, duration, action_type=1)
-            else:
-                print(f"No shockers assigned to groups: {available_groups}")
-        
-        # If OpenShock wasn't used or failed, fall back to OSC
-        if not openshock_sent:
-            print("Using OSC fallback method")
-            # Convert intensity from 0-100 to 0.0-1.0 for OSC
-            osc_intensity = intensity / 100.0
-            
-            for group in available_groups:
-                # Use continuous shock parameter for duration control
-                osc_address = f"/avatar/parameters/ShockOsc/{group}_CShock"
-                
-                # Send shock command
-                self.client.send_message(osc_address, osc_intensity)
-                print(f"Sent: {osc_address} = {osc_intensity}")
-                
-                # Schedule stop command after duration
-                self._schedule_shock_stop(group, duration)
+        self._send_to_groups(groups, ACTION_SHOCK, "_CShock", "shock")
 
-        # Handle cooldown and callbacks for all groups
-        for group in available_groups:
-            # Start cooldown for this group
-            self.start_cooldown(group)
-
-            # Notify callback about the shock
-            if self.shock_callback:
-                self.shock_callback(intensity, group, duration)
-    
     def send_immediate_shock(self, groups=None):
         """Send immediate shock (ignores hold time)"""
-        if not self.config["enabled"]:
-            print("ShockOSC is disabled")
-            return
-            
-        if groups is None:
-            groups = self.config["groups"]
-        
-        # Filter out groups that are on cooldown
-        available_groups = [group for group in groups if not self.is_group_on_cooldown(group)]
-        
-        if not available_groups:
-            print(f"All groups are on cooldown: {groups}")
-            return
-        
-        if len(available_groups) < len(groups):
-            on_cooldown = [group for group in groups if self.is_group_on_cooldown(group)]
-            print(f"Some groups on cooldown, skipping: {on_cooldown}")
-        
-        intensity = self.get_shock_intensity()
-        duration = self.config["duration"]
-        print(f"Sending immediate shock - Groups: {available_groups}, Intensity: {intensity}%")
-        
-        # Check if we have OpenShock integration configured
-        token = self.config.get("openshock_token", "").strip()
-        shockers_config = self.config.get("shockers", {})
-        
-        openshock_sent = False
-        if token and shockers_config:
-            # Get shocker IDs for the available groups
-            shocker_ids = []
-            for group in available_groups:
-                for shocker_id, assignment_info in shockers_config.items():
-                    # Handle both old format (string) and new format (dict)
-                    if isinstance(assignment_info, dict):
-                        assigned_group = assignment_info.get("group", "")
-                    else:
-                        assigned_group = assignment_info
-                    
-                    if assigned_group == group:
-                        shocker_ids.append(shocker_id)
-            
-            if shocker_ids:
-                print(f"Using OpenShock for immediate shock: {shocker_ids}")
-                openshock_sent = self.dispatch_control(shocker_ids, intensity, duration, action_type=1)
-        
-        # If OpenShock wasn't used or failed, fall back to OSC
-        if not openshock_sent:
-            print("Using OSC fallback for immediate shock")
-            for group in available_groups:
-                # Use immediate shock parameter
-                osc_address = f"/avatar/parameters/ShockOsc/{group}_IShock"
-                self.client.send_message(osc_address, True)
-                print(f"Sent: {osc_address} = True")
-
-        # Handle cooldown and callbacks for all groups
-        for group in available_groups:
-            # Start cooldown for this group
-            self.start_cooldown(group)
+        self._send_to_groups(groups, ACTION_SHOCK, "_IShock", "immediate shock")
 
-            # Notify callback about the shock
-            if self.shock_callback:
-                self.shock_callback(intensity, group, duration)
-    
     def send_vibrate(self, groups=None):
         """Send vibration command"""
+        self._send_to_groups(groups, ACTION_VIBRATE, "_CVibrate", "vibration")
+
+    def _send_to_groups(self, groups, action_type, osc_suffix, label):
+        """Queue an action for the shockers of some groups, or fall back to OSC
+
+        Shocks skip groups on cooldown and start their cooldowns. If OpenShock
+        isn't set up, or the queued command fails, the ShockOsc parameter
+        {group}{osc_suffix} is written instead.
+        """
         if not self.config["enabled"]:
             print("ShockOSC is disabled")
             return
-            
+
         if groups is None:
             groups = self.config["groups"]
-        
+
+        if action_type == ACTION_SHOCK:
+            # Filter out groups that are on cooldown
+            available_groups = [group for group in groups if not self.is_group_on_cooldown(group)]
+            if not available_groups:
+                print(f"All groups are on cooldown: {groups}")
+                return
+            if len(available_groups) < len(groups):
+                on_cooldown = [group for group in groups if self.is_group_on_cooldown(group)]
+                print(f"Some groups on cooldown, skipping: {on_cooldown}")
+            groups = available_groups
+
         intensity = self.get_shock_intensity()
         duration = self.config["duration"]
-        
-        print(f"Sending vibration - Groups: {groups}, Intensity: {intensity}%, Duration: {duration}s")
-        
+
+        print(f"Sending {label} - Groups: {groups}, Intensity: {intensity}%, Duration: {duration}s")
+
         # Check if we have OpenShock integration configured
         token = self.config.get("openshock_token", "").strip()
-        shockers_config = self.config.get("shockers", {})
-        
-        openshock_sent = False
-        if token and shockers_config:
+
+        queued = False
+        if token and self.shocker_groups:
             # Get shocker IDs for the groups
-            shocker_ids = []
-            for group in groups:
-                for shocker_id, assignment_info in shockers_config.items():
-                    # Handle both old format (string) and new format (dict)
-                    if isinstance(assignment_info, dict):
-                        assigned_group = assignment_info.get("group", "")
-                    else:
-                        assigned_group = assignment_info
-                    
-                    if assigned_group == group:
-                        shocker_ids.append(shocker_id)
-            
+            shocker_ids = self.shocker_ids_for(groups)
+
             if shocker_ids:
-                print(f"Using OpenShock API for vibration: {shocker_ids}")
-                openshock_sent = self.send_openshock_command(shocker_ids, intensity, duration, action_type=2)
-        
-        # If OpenShock wasn't used or failed, fall back to OSC
-        if not openshock_sent:
-            print("Using OSC fallback for vibration")
-            osc_intensity = intensity / 100.0
-            
+                print(f"Queueing OpenShock {label} for shockers: {shocker_ids}")
+
+                def done(intent, ok, transport):
+                    if not ok:
+                        self._send_osc_fallback(groups, osc_suffix, intensity, duration)
+
+                queued = self.queue_action(action_type, shocker_ids, intensity, duration,
+                                           source=label, on_done=done)
+            else:
+                print(f"No shockers assigned to groups: {groups}")
+
+        # If OpenShock isn't used, fall back to OSC now
+        if not queued:
+            self._send_osc_fallback(groups, osc_suffix, intensity, duration)
+
+        if action_type == ACTION_SHOCK:
+            # Handle cooldown and callbacks for all groups
             for group in groups:
-                osc_address = f"/avatar/parameters/ShockOsc/{group}_CVibrate"
-                self.client.send_message(osc_address, osc_intensity)
-                print(f"Sent: {osc_address} = {osc_intensity}")
-                
-                # Schedule stop command after duration
+                self.start_cooldown(group)
+                if self.shock_callback:
+                    self.shock_callback(intensity, group, duration)
+
+    def _write_param(self, address, value):
+        """Write a ShockOsc parameter we also listen on, remembering it as ours"""
+        self._fallback_sent[address] = (value, clock.monotonic())
+        self.client.send_message(address, value)
+
+    def is_own_echo(self, address, value):
+        """True if value on address is our own fallback write coming back"""
+        sent = self._fallback_sent.get(address)
+        if sent is None:
+            return False
+        sent_value, sent_at = sent
+        if clock.monotonic() - sent_at > FALLBACK_ECHO_WINDOW:
+            self._fallback_sent.pop(address, None)
+            return False
+        if abs(float(value) - float(sent_value)) > 1e-3:
+            return False
+        self._fallback_sent.pop(address, None)
+        return True
+
+    def _send_osc_fallback(self, groups, osc_suffix, intensity, duration):
+        """Write the ShockOsc avatar parameter for each group"""
+        print(f"Using OSC fallback for {osc_suffix}")
+        for group in groups:
+            osc_address = f"/avatar/parameters/ShockOsc/{group}{osc_suffix}"
+            # Continuous parameters take 0.0-1.0; the immediate one is a trigger
+            value = True if osc_suffix == "_IShock" else intensity / 100.0
+            self._write_param(osc_address, value)
+            print(f"Sent: {osc_address} = {value}")
+
+            # Schedule stop command after duration
+            if osc_suffix == "_CShock":
+                self._schedule_shock_stop(group, duration)
+            elif osc_suffix == "_CVibrate":
                 self._schedule_vibrate_stop(group, duration)
-    
+
     def stop_shock(self, groups=None):
         """Stop shock for specified groups"""
         if groups is None:
@@ -398,7 +508,7 @@ class ShockOSCController:
             
         for group in groups:
             osc_address = f"/avatar/parameters/ShockOsc/{group}_CShock"
-            self.client.send_message(osc_address, 0.0)
+            self._write_param(osc_address, 0.0)
             print(f"Stopped shock: {osc_address} = 0.0")
             
             # Cancel any pending stop timer
@@ -413,7 +523,7 @@ class ShockOSCController:
             
         for group in groups:
             osc_address = f"/avatar/parameters/ShockOsc/{group}_CVibrate"
-            self.client.send_message(osc_address, 0.0)
+            self._write_param(osc_address, 0.0)
             print(f"Stopped vibration: {osc_address} = 0.0")
     
     def _schedule_shock_stop(self, group, duration):
@@ -423,19 +533,19 @@ class ShockOSCController:
             self.active_shocks[group].cancel()
         
         # Create new timer
-        timer = threading.Timer(duration, self._stop_shock_timer, [group])
+        timer = clock.timer(duration, self._stop_shock_timer, [group])
         self.active_shocks[group] = timer
         timer.start()
     
     def _schedule_vibrate_stop(self, group, duration):
         """Schedule a vibrate stop after specified duration"""
-        timer = threading.Timer(duration, self._stop_vibrate_timer, [group])
+        timer = clock.timer(duration, self._stop_vibrate_timer, [group])
         timer.start()
     
     def _stop_shock_timer(self, group):
         """Timer callback to stop shock"""
         osc_address = f"/avatar/parameters/ShockOsc/{group}_CShock"
-        self.client.send_message(osc_address, 0.0)
+        self._write_param(osc_address, 0.0)
         print(f"Timer stopped shock: {osc_address} = 0.0")
         
         if group in self.active_shocks:
@@ -444,25 +554,23 @@ class ShockOSCController:
     def _stop_vibrate_timer(self, group):
         """Timer callback to stop vibration"""
         osc_address = f"/avatar/parameters/ShockOsc/{group}_CVibrate"
-        self.client.send_message(osc_address, 0.0)
+        self._write_param(osc_address, 0.0)
         print(f"Timer stopped vibration: {osc_address} = 0.0")
     
+    def _release_cooldown(self, group):
+        """End a group cooldown started for a shock that never went out"""
+        if self.cooldowns.clear(("group", group)):
+            self._send_cooldown(group, False)
+
     def clear_cooldown(self, group):
         """Manually clear cooldown for a group"""
-        if group in self.cooldown_timers:
-            self.cooldown_timers[group].cancel()
-            del self.cooldown_timers[group]
-        
-        self.cooldown_states[group] = False
-        
-        # Send OSC parameter to indicate cooldown ended
-        cooldown_address = f"/avatar/parameters/ShockOsc/{group}_Cooldown"
-        self.client.send_message(cooldown_address, False)
+        self.cooldowns.clear(("group", group))
+        self._send_cooldown(group, False)
         print(f"Manually cleared cooldown for {group}")
 
     def clear_all_cooldowns(self):
         """Clear all cooldowns"""
-        for group in list(self.cooldown_timers.keys()):
+        for _, group in self.cooldowns.active_keys("group"):
             self.clear_cooldown(group)
         print("All cooldowns cleared")
 
@@ -474,21 +582,29 @@ class ShockOSCController:
         return status
 
     def start_signalr_connection(self):
-        """Start SignalR connection to receive real-time shock events"""
+        """Start SignalR connection to receive real-time shock events
+
+        The connection is supervised: if it drops it is re-established with
+        jittered exponential backoff until stop_signalr_connection().
+        """
         token = self.config.get("openshock_token", "").strip()
         if not token:
             print("No OpenShock token configured, skipping SignalR connection")
             return
+        if self.offline:
+            return
 
         # Stop existing connection if running
         self.stop_signalr_connection()
 
         print("Starting OpenShock SignalR connection...")
+        self._signalr_stop.clear()
         self.signalr_thread = threading.Thread(target=self._run_signalr_connection, daemon=True)
         self.signalr_thread.start()
 
     def stop_signalr_connection(self):
         """Stop SignalR connection"""
+        self._signalr_stop.set()
         if self.signalr_connected or self.websocket or self.signalr_thread:
             print("Stopping OpenShock SignalR connection...")
 
@@ -497,10 +613,7 @@ class ShockOSCController:
 
             try:
                 # Close the websocket if it exists
-                if self.websocket and self.signalr_loop and not self.signalr_loop.is_closed():
-                    asyncio.run_coroutine_threadsafe(
-                        self.websocket.close(), self.signalr_loop
-                    )
+                self._close_signalr_socket()
 
                 # Wait for thread to finish (with timeout to prevent hanging)
                 if self.signalr_thread and self.signalr_thread.is_alive():
@@ -515,6 +628,13 @@ class ShockOSCController:
         self.websocket = None
         self.signalr_loop = None
         self.signalr_thread = None
+        self._set_signalr_state(SIGNALR_STOPPED)
+
+    def _close_signalr_socket(self):
+        """Close the current WebSocket from any thread; the supervisor reconnects"""
+        websocket, loop = self.websocket, self.signalr_loop
+        if websocket and loop and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(websocket.close(), loop)
 
     def _run_signalr_connection(self):
         """Run SignalR connection in a separate thread"""
@@ -534,7 +654,7 @@ class ShockOSCController:
             asyncio.set_event_loop(self.signalr_loop)
 
             # Run the async connection
-            self.signalr_loop.run_until_complete(self._async_signalr_connection())
+            self.signalr_loop.run_until_complete(self._supervise_signalr())
         except asyncio.CancelledError:
             print("SignalR connection was cancelled")
         except Exception as e:
@@ -570,54 +690,166 @@ class ShockOSCController:
             # Reset the thread-local event loop
             asyncio.set_event_loop(None)
 
-    async def _async_signalr_connection(self):
-        """Async SignalR connection method - based on test_openshock_signalr_fixed.py"""
+    # ── supervision ──────────────────────────────────────────────────────────
+
+    async def _supervise_signalr(self):
+        """Keep the gateway connected until stopped, backing off between attempts"""
+        self._signalr_supervised_since = time.monotonic()
+        attempt = 0
         try:
-            api_url = self.config.get('openshock_url', 'https://api.openshock.app')
-            token = self.config.get("openshock_token", "").strip()
+            while not self._signalr_stop.is_set():
+                self._set_signalr_state(SIGNALR_RECONNECTING if attempt else SIGNALR_CONNECTING)
+                try:
+                    await self._async_signalr_connection()
+                except Exception as e:
+                    self.signalr_last_error = str(e)
+                    print(f"❌ SignalR connection error: {e}")
+                    status = getattr(getattr(e, "response", None), "status_code", None)
+                    if status in (401, 403):
+                        # Retrying can't fix a rejected token; a new one restarts us
+                        print("OpenShock rejected the API token, not reconnecting")
+                        self._on_signalr_down()
+                        self._set_signalr_state(SIGNALR_UNAUTHORIZED)
+                        return
+                was_up = self._on_signalr_down()
+                if self._signalr_stop.is_set():
+                    break
+                # A session that got through the handshake starts the backoff over
+                attempt = 1 if was_up else attempt + 1
+                delay = self._signalr_backoff(attempt)
+                self._set_signalr_state(SIGNALR_RECONNECTING)
+                print(f"SignalR reconnecting in {delay:.1f}s (attempt {attempt})")
+                await self._sleep_unless_stopped(delay)
+            self._set_signalr_state(SIGNALR_STOPPED)
+        finally:
+            self._signalr_supervised_total += time.monotonic() - self._signalr_supervised_since
+            self._signalr_supervised_since = None
+
+    def _signalr_backoff(self, attempt):
+        """Delay before reconnect attempt n: exponential, capped, half of it jittered"""
+        ceiling = min(SIGNALR_BACKOFF_MAX, SIGNALR_BACKOFF_BASE * 2 ** (attempt - 1))
+        return ceiling / 2 + self._backoff_random.uniform(0, ceiling / 2)
+
+    async def _sleep_unless_stopped(self, delay):
+        deadline = time.monotonic() + delay
+        while not self._signalr_stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(0.25, remaining))
 
-            # First, let's try to negotiate with SignalR
-            await self.signalr_negotiate(api_url, token)
+    def _set_signalr_state(self, state):
+        if state == self.signalr_state:
+            return
+        self.signalr_state = state
+        print(f"OpenShock gateway: {state}")
+        if self.connection_state_callback:
+            try:
+                self.connection_state_callback(state)
+            except Exception as e:
+                print(f"Connection state callback error: {e}")
+
+    def _on_signalr_up(self):
+        now = time.monotonic()
+        if self._signalr_down_since is not None:
+            self.signalr_reconnects += 1
+            self.signalr_reconnect_times.append(now - self._signalr_down_since)
+            print(f"SignalR reconnected after {now - self._signalr_down_since:.1f}s")
+            self._signalr_down_since = None
+        self._signalr_connected_since = now
+        self.signalr_connected = True
+        self._set_signalr_state(SIGNALR_CONNECTED)
+
+    def _on_signalr_down(self):
+        """Account for a lost or failed connection. Returns True if it had been up."""
+        self.signalr_connected = False
+        self.websocket = None
+        now = time.monotonic()
+        if self._signalr_connected_since is None:
+            return False
+        self._signalr_connected_total += now - self._signalr_connected_since
+        self._signalr_connected_since = None
+        self._signalr_down_since = now
+        return True
+
+    def get_signalr_health(self):
+        """Gateway state plus reconnect and uptime figures"""
+        now = time.monotonic()
+        supervised = self._signalr_supervised_total
+        if self._signalr_supervised_since is not None:
+            supervised += now - self._signalr_supervised_since
+        connected = self._signalr_connected_total
+        if self._signalr_connected_since is not None:
+            connected += now - self._signalr_connected_since
+        times = list(self.signalr_reconnect_times)
+        return {
+            "state": self.signalr_state,
+            "connected_ratio": round(connected / supervised, 4) if supervised > 0 else 0.0,
+            "connected_seconds": round(connected, 1),
+            "reconnects": self.signalr_reconnects,
+            "last_reconnect_s": round(times[-1], 2) if times else None,
+            "mean_reconnect_s": round(sum(times) / len(times), 2) if times else None,
+            "last_error": self.signalr_last_error,
+        }
 
-            # Build the SignalR connection URL - use API endpoint for SignalR
-            # Convert https://api.shock.sjh.at to wss://api.shock.sjh.at
-            ws_url = api_url.replace('https://', 'wss://').replace('http://', 'ws://')
-            hub_url = f"{ws_url}/1/hubs/user"
+    # ── one connection ───────────────────────────────────────────────────────
 
-            print(f"Connecting to OpenShock SignalR at: {hub_url}")
+    async def _async_signalr_connection(self):
+        """Connect, handshake and listen until the connection ends
 
-            # Connect using websockets with authentication header
-            headers = {
-                'User-Agent': 'VRCChatbox-ShockOSC/1.0',
-                'Open-Shock-Token': token
-            }
+        Raises on connect/handshake failures; returns when an established
+        connection closes. The supervisor decides what happens next.
+        """
+        api_url = self.config.get('openshock_url', 'https://api.openshock.app')
+        token = self.config.get("openshock_token", "").strip()
 
-            # Add token as query parameter as well
-            params = {'access_token': token}
-            full_url = f"{hub_url}?{urlencode(params)}"
+        # First, let's try to negotiate with SignalR
+        await self.signalr_negotiate(api_url, token)
 
-            print(f"Full WebSocket URL: {full_url}")
+        # Build the SignalR connection URL - use API endpoint for SignalR
+        # Convert https://api.shock.sjh.at to wss://api.shock.sjh.at
+        ws_url = api_url.replace('https://', 'wss://').replace('http://', 'ws://')
+        hub_url = f"{ws_url}/1/hubs/user"
 
-            self.websocket = await websockets.connect(
-                full_url,
-                additional_headers=headers,
-                ping_interval=30,
-                ping_timeout=10
-            )
+        print(f"Connecting to OpenShock SignalR at: {hub_url}")
 
-            self.signalr_connected = True
-            print("✅ Connected to OpenShock SignalR!")
-            print("🎯 Listening for real-time shock events...")
+        # Connect using websockets with authentication header
+        headers = {
+            'User-Agent': 'VRCChatbox-ShockOSC/1.0',
+            'Open-Shock-Token': token
+        }
+
+        # Add token as query parameter as well
+        params = {'access_token': token}
+        full_url = f"{hub_url}?{urlencode(params)}"
+
+        self.websocket = await websockets.connect(
+            full_url,
+            additional_headers=headers,
+            open_timeout=SIGNALR_HANDSHAKE_TIMEOUT,
+            ping_interval=30,
+            ping_timeout=10
+        )
+        if self._signalr_stop.is_set():
+            await self.websocket.close()
+            return
 
-            # Send SignalR handshake
+        # Send SignalR handshake and wait for the hub to accept it
+        try:
             await self.send_signalr_handshake()
+        except Exception:
+            await self.websocket.close()
+            raise
 
-            # Listen for messages
-            await self.listen_for_messages()
+        self._on_signalr_up()
+        print("✅ Connected to OpenShock SignalR!")
+        print("🎯 Listening for real-time shock events...")
 
-        except Exception as e:
-            print(f"❌ SignalR connection error: {e}")
-            self.signalr_connected = False
+        keepalive = asyncio.ensure_future(self._signalr_keepalive(self.websocket))
+        try:
+            await self.listen_for_messages()
+        finally:
+            keepalive.cancel()
 
     async def signalr_negotiate(self, api_url, token):
         """Negotiate SignalR connection"""
@@ -631,7 +863,10 @@ class ShockOSCController:
 
             print(f"Negotiating SignalR connection: {negotiate_url}")
 
-            response = requests.post(negotiate_url, headers=headers, timeout=10)
+            # Off the event loop so a slow API can't stall stop()
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                None, lambda: requests.post(negotiate_url, headers=headers, timeout=10))
 
             if response.status_code == 200:
                 negotiate_data = response.json()
@@ -647,36 +882,67 @@ class ShockOSCController:
             return None
 
     async def send_signalr_handshake(self):
-        """Send SignalR handshake message"""
-        try:
-            handshake_message = {
-                "protocol": "json",
-                "version": 1
-            }
+        """Send the SignalR handshake and wait for the hub's answer
+
+        Raises if the hub reports an error or doesn't answer within
+        SIGNALR_HANDSHAKE_TIMEOUT.
+        """
+        handshake_message = {
+            "protocol": "json",
+            "version": 1
+        }
 
-            # SignalR handshake format: message + 0x1E delimiter
-            handshake = json.dumps(handshake_message) + "\x1e"
+        # SignalR handshake format: message + 0x1E delimiter
+        handshake = json.dumps(handshake_message) + "\x1e"
 
-            print(f"Sending SignalR handshake: {handshake}")
-            await self.websocket.send(handshake)
+        print(f"Sending SignalR handshake: {handshake}")
+        await self.websocket.send(handshake)
 
-        except Exception as e:
-            print(f"❌ Error sending handshake: {e}")
+        try:
+            reply = await asyncio.wait_for(self.websocket.recv(), SIGNALR_HANDSHAKE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ConnectionError(f"no handshake reply within {SIGNALR_HANDSHAKE_TIMEOUT:.0f}s")
+        if isinstance(reply, str):
+            answer = json.loads(reply.split("\x1e", 1)[0] or "{}")
+            if answer.get("error"):
+                raise ConnectionError(f"handshake rejected: {answer['error']}")
+        # The same frame may already carry the first messages
+        await self.handle_signalr_message(reply)
+
+    async def _signalr_keepalive(self, websocket):
+        """Send SignalR pings so the hub doesn't time us out"""
+        ping = json.dumps({"type": 6}) + "\x1e"
+        while True:
+            await asyncio.sleep(SIGNALR_KEEPALIVE)
+            try:
+                await websocket.send(ping)
+            except Exception:
+                return
 
     async def listen_for_messages(self):
-        """Listen for incoming SignalR messages"""
+        """Listen for incoming SignalR messages until the connection ends"""
         try:
-            async for message in self.websocket:
+            while True:
+                # The hub pings every 15s; this much silence means a dead link
+                message = await asyncio.wait_for(self.websocket.recv(), SIGNALR_SERVER_TIMEOUT)
                 await self.handle_signalr_message(message)
-        except websockets.exceptions.ConnectionClosed:
+        except asyncio.TimeoutError:
+            self.signalr_last_error = f"no message for {SIGNALR_SERVER_TIMEOUT:.0f}s"
+            print(f"❌ SignalR hub silent for {SIGNALR_SERVER_TIMEOUT:.0f}s, reconnecting")
+            await self.websocket.close()
+        except websockets.exceptions.ConnectionClosed as e:
+            self.signalr_last_error = f"closed ({e})"
             print("❌ WebSocket connection closed")
-            self.signalr_connected = False
         except Exception as e:
+            self.signalr_last_error = str(e)
             print(f"❌ Error listening for messages: {e}")
+        finally:
             self.signalr_connected = False
 
     async def handle_signalr_message(self, message):
         """Handle incoming SignalR messages"""
+        if input_recorder.active and isinstance(message, str):
+            input_recorder.record(KIND_SIGNALR, message)
         try:
             # SignalR messages are delimited by 0x1E
             if isinstance(message, str):
@@ -716,6 +982,10 @@ class ShockOSCController:
                         msg_type = data.get('type')
                         if msg_type == 6:  # Ping message
                             print(f"🏓 SignalR ping")
+                        elif msg_type == 7:  # Close message
+                            print(f"SignalR hub closed the connection: {data.get('error', 'no reason')}")
+                            if self.websocket:
+                                await self.websocket.close()
                         else:
                             print(f"📝 Other SignalR message: {data}")
 
@@ -769,15 +1039,7 @@ class ShockOSCController:
                     continue
 
                 # Find the group name for this shocker ID
-                group_name = None
-                shockers_config = self.config.get("shockers", {})
-                for stored_shocker_id, assignment_info in shockers_config.items():
-                    if stored_shocker_id == shocker_id:
-                        if isinstance(assignment_info, dict):
-                            group_name = assignment_info.get("group", "")
-                        else:
-                            group_name = assignment_info
-                        break
+                group_name = self.group_of(shocker_id)
 
                 # Use group name if found, otherwise fall back to shocker name
                 display_shocker_name = group_name if group_name else shocker_name
@@ -835,9 +1097,12 @@ class ShockOSCController:
             # fast to the HTTP fallback rather than stalling the shock.
             future = asyncio.run_coroutine_threadsafe(_send(), self.signalr_loop)
             future.result(timeout=0.5)
+            record_control("signalr", shocker_ids, action_type, intensity, duration_ms)
             return True
         except Exception as e:
             print(f"SignalR control send error: {e}")
+            # Treat the socket as dead; the supervisor reconnects
+            self._close_signalr_socket()
             return False
 
     def test_openshock_connection(self):
@@ -899,16 +1164,26 @@ class ShockOSCController:
     def cleanup(self):
         """Clean up resources when shutting down"""
         print("Cleaning up ShockOSC controller...")
+        for key in list(self.continuous):
+            self._stop_continuous(key)
+        # Let queued actions go out while the gateway is still up
+        self.actions.close()
+        for name, stats in self.actions.get_stats().items():
+            print(f"OpenShock {name}: {stats['sent']} sent, {stats['failed']} failed, "
+                  f"{stats['replaced']} replaced while queued, send p50 {stats['send_ms']['p50']}ms "
+                  f"p95 {stats['send_ms']['p95']}ms")
         self.stop_signalr_connection()
+        health = self.get_signalr_health()
+        if health["connected_seconds"]:
+            print(f"OpenShock gateway: connected {health['connected_ratio']:.0%} of the time, "
+                  f"{health['reconnects']} reconnect(s), mean {health['mean_reconnect_s'] or 0:.1f}s")
 
         # Cancel all timers
         for timer in list(self.active_shocks.values()):
             timer.cancel()
         self.active_shocks.clear()
 
-        for timer in list(self.cooldown_timers.values()):
-            timer.cancel()
-        self.cooldown_timers.clear()
+        self.cooldowns.shutdown()
 
         # Clear shock hide timer
         if hasattr(self, 'shock_hide_timer') and self.shock_hide_timer:
@@ -1,6 +1,9 @@
-import random
+import copy
 import threading
-import time
+
+from clock import clock
+from config import diff_config, format_changes
+from shock_actions import ACTION_SHOCK, rng
 
 
 class SlideController:
@@ -8,50 +11,65 @@ class SlideController:
         """Initialize Slide controller
 
         Args:
-            dispatcher: pythonosc dispatcher for OSC message routing
+            dispatcher: OSCRouter whose parameter store the variables are read from
             shock_controller: ShockOSCController instance for triggering shocks
         """
         # Threading components
         self.polling_thread = None
         self.polling_active = False
-        self.values_lock = threading.Lock()
 
         # OSC integration
         self.dispatcher = dispatcher
+        self.params = dispatcher.params  # shared latest value of every parameter
         self.shock_controller = shock_controller
-        self.current_values = {}  # {osc_path: float_value}
+        self.active_params = None  # addresses on the current avatar, None = all
 
         # Hold mode tracking
         self.hold_timers = {}  # {osc_path: threading.Timer}
         self.hold_active = {}  # {osc_path: bool}
 
-        # Per-shocker slide cooldown tracking
-        self.shocker_cooldowns = {}  # {shocker_id: end_time}
-
         # Config
         self.config = {}
 
         print("SlideController initialized")
 
     def update_config(self, config):
-        """Update slide configuration and restart polling if needed
+        """Apply a new slide configuration without restarting the poller
+
+        The poll loop re-reads self.config every tick, so thresholds, ranges
+        and intervals take effect on the next poll. Only the variable list and
+        the enabled flag need any extra work.
 
         Args:
             config: Dictionary containing slide configuration
-        """
-        # Stop existing polling
-        self.stop_polling()
-
-        # Update config
-        self.config = config
-        print(f"Slide config updated: {self.config}")
 
-        # Update dispatcher mappings for OSC variables
-        self._update_dispatcher_mappings()
+        Returns:
+            dict: the diff that was applied (see config.diff_config)
+        """
+        changes = diff_config(self.config, config)
+        old_variables = self.config.get("variables", [])
+        self.config = copy.deepcopy(config)
+        if not changes:
+            return changes
+        print(f"Slide config updated: {format_changes(changes)}")
+
+        if "variables" in changes:
+            self._prune_removed_variables(old_variables)
+
+        if "enabled" in changes:
+            if self.config.get("enabled", False):
+                self.start_polling()
+            else:
+                self.stop_polling()
+        return changes
 
-        # Start polling if enabled
-        if config.get("enabled", False):
-            self.start_polling()
+    def _prune_removed_variables(self, old_variables):
+        """Cancel hold timers for paths no longer configured"""
+        current = {v.get("osc_path") for v in self.config.get("variables", [])}
+        for var in old_variables:
+            osc_path = var.get("osc_path")
+            if osc_path and osc_path not in current:
+                self._cancel_hold_timer(osc_path)
 
     def start_polling(self):
         """Start the polling thread"""
@@ -94,16 +112,20 @@ class SlideController:
 
             # Sleep for poll interval
             poll_interval = self.config.get("poll_interval", 1.0)
-            time.sleep(poll_interval)
+            clock.sleep(poll_interval)
 
     def _check_all_variables(self):
         """Check all enabled variables and trigger shocks based on probability"""
         variables = self.config.get("variables", [])
 
+        active = self.active_params
         for var in variables:
             # Skip disabled variables
             if not var.get("enabled", True):
                 continue
+            # Skip variables the current avatar doesn't have
+            if active is not None and var.get("osc_path") not in active:
+                continue
 
             try:
                 self._check_variable(var)
@@ -122,9 +144,8 @@ class SlideController:
         if not osc_path:
             return
 
-        # Get current value from cache (thread-safe)
-        with self.values_lock:
-            current_value = self.current_values.get(osc_path, 0.0)
+        # Latest value from the router's parameter store (never sent = 0.0)
+        current_value = float(self.params.get(osc_path) or 0.0)
 
         # Check threshold
         if current_value < threshold:
@@ -148,7 +169,7 @@ class SlideController:
         # Cubic probability curve for dramatic ramp-up (always active)
         # P = value³ gives: 0.5→12.5%, 0.7→34%, 0.9→73%
         probability = current_value ** 3
-        if random.random() <= probability:
+        if rng.random() <= probability:
             self._trigger_slide_shock(var, current_value, use_value_intensity=True, skip_cooldown=False)
 
     def _trigger_slide_shock(self, var, current_value, use_value_intensity=True, skip_cooldown=False):
@@ -166,11 +187,11 @@ class SlideController:
 
         # Get shocker IDs for this variable
         variable_shockers = var.get("shockers", [])
-        shockers_config = self.shock_controller.config.get("shockers", {})
+        shocker_groups = self.shock_controller.shocker_groups
 
         # If no shockers specified, use all available shockers
         if not variable_shockers:
-            variable_shockers = list(shockers_config.keys())
+            variable_shockers = list(shocker_groups)
 
         if not variable_shockers:
             print(f"Slide shock skipped - no shockers configured")
@@ -180,9 +201,8 @@ class SlideController:
         available_shockers = []
         affected_groups = []
         for shocker_id in variable_shockers:
-            if shocker_id in shockers_config:
-                shocker_info = shockers_config[shocker_id]
-                group = shocker_info.get("group") if isinstance(shocker_info, dict) else shocker_info
+            if shocker_id in shocker_groups:
+                group = shocker_groups[shocker_id]
 
                 if self.shock_controller.is_group_on_cooldown(group):
                     continue
@@ -208,11 +228,12 @@ class SlideController:
             # Use hold mode intensity range
             hold_min = self.config.get("hold_intensity_min", 80)
             hold_max = self.config.get("hold_intensity_max", 90)
-            intensity = random.randint(hold_min, hold_max)
+            intensity = rng.randint(hold_min, hold_max)
             intensity_source = "hold mode"
 
         duration = self.shock_controller.config.get("duration", 1.0)
-        self.shock_controller.send_openshock_command(available_shockers, intensity, duration)
+        self.shock_controller.queue_action(ACTION_SHOCK, available_shockers, intensity, duration,
+                                           source=f"Slide {var.get('name', '')}".rstrip())
 
         # Start cooldown for affected groups and trigger shock callback
         for group in affected_groups:
@@ -230,38 +251,21 @@ class SlideController:
         trigger_type = "hold mode" if skip_cooldown else "probability"
         print(f"Slide shock triggered from '{var_name}' [{trigger_type}] (value: {current_value:.2f}, intensity: {intensity}% [{intensity_source}], shockers: {len(available_shockers)})")
 
-    def _handle_variable_update(self, address, *args):
-        """OSC handler to cache variable values
+    def watched_paths(self):
+        """OSC paths of the enabled variables (read from the store, not routed)"""
+        return {v["osc_path"] for v in self.config.get("variables", [])
+                if v.get("osc_path") and v.get("enabled", True)}
 
-        Args:
-            address: OSC address path
-            *args: OSC arguments (first should be the float value)
-        """
-        # Check if this address is still configured (conditional handler)
-        if not any(v.get("osc_path") == address for v in self.config.get("variables", [])):
-            return
+    def set_active_params(self, params):
+        """Restrict polling to the worn avatar's parameters (None = all)
 
-        # Thread-safe value update
-        with self.values_lock:
-            self.current_values[address] = float(args[0]) if args else 0.0
-
-    def _update_dispatcher_mappings(self):
-        """Add/update dispatcher handlers for all configured OSC variables
-
-        Note: pythonosc doesn't have an unmap method, so we use conditional
-        handlers that check if the path is still configured before processing.
+        The router clears its parameter store on the switch, so values from
+        the previous avatar can't keep firing shocks; pending hold timers are
+        cancelled here.
         """
-        variables = self.config.get("variables", [])
-
-        # Add mappings for all configured variables
-        for var in variables:
-            osc_path = var.get("osc_path")
-            if osc_path:
-                # Map the OSC path to our handler
-                # The handler will check if the path is still configured
-                self.dispatcher.map(osc_path, self._handle_variable_update)
-
-        print(f"Dispatcher mappings updated for {len(variables)} variables")
+        self.active_params = params
+        for osc_path in list(self.hold_timers):
+            self._cancel_hold_timer(osc_path)
 
     def is_group_on_cooldown(self, group):
         """Check if a shock group is on cooldown
@@ -292,7 +296,7 @@ class SlideController:
         self.hold_active[osc_path] = True
 
         # Create timer
-        timer = threading.Timer(hold_time, self._trigger_hold_shock, [var, current_value])
+        timer = clock.timer(hold_time, self._trigger_hold_shock, [var, current_value])
         self.hold_timers[osc_path] = timer
         timer.start()
 
@@ -335,13 +339,12 @@ class SlideController:
 
     def _is_shocker_on_slide_cooldown(self, shocker_id):
         """Check if a shocker is on its individual slide cooldown"""
-        end_time = self.shocker_cooldowns.get(shocker_id)
-        return end_time is not None and time.time() < end_time
+        return self.shock_controller.cooldowns.active(("shocker", shocker_id))
 
     def _start_shocker_slide_cooldown(self, shocker_id):
         """Start a random slide cooldown for a specific shocker"""
         cooldown_min = self.config.get("cooldown_min", 5.0)
         cooldown_max = self.config.get("cooldown_max", 20.0)
-        duration = random.uniform(cooldown_min, cooldown_max)
-        self.shocker_cooldowns[shocker_id] = time.time() + duration
+        duration = rng.uniform(cooldown_min, cooldown_max)
+        self.shock_controller.cooldowns.start(("shocker", shocker_id), duration)
         print(f"Shocker {shocker_id[:8]}... slide cooldown {duration:.1f}s")
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The app is a set of top-level modules, not a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Keep every config and data file the modules touch out of the user's profile
+os.environ["VRCCHATBOX_CONFIG_DIR"] = tempfile.mkdtemp(prefix="vrcchatbox-tests-")
@@ -0,0 +1,179 @@
+import json
+import os
+import time
+
+import pytest
+
+from config import (ConfigStore, ConfigView, diff_config, get_default_app_config,
+                    merge_config, set_config_dir)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A ConfigStore on its own file in tmp_path, with a write delay no test waits out."""
+    set_config_dir(tmp_path)
+    store = ConfigStore(filename="test_config.json", write_delay=60.0)
+    yield store
+    store.pin(None)  # cancels any pending write timer
+    set_config_dir(None)
+
+
+def _on_disk(store):
+    with open(store.path) as f:
+        return json.load(f)
+
+
+# ── merge_config / diff_config ──────────────────────────────────────────────
+
+def test_merge_fills_missing_keys_from_default():
+    default = {"a": 1, "nested": {"x": 1, "y": 2}}
+    merged = merge_config(default, {"nested": {"y": 5}})
+    assert merged == {"a": 1, "nested": {"x": 1, "y": 5}}
+
+
+def test_merge_keeps_unknown_keys_and_replaces_lists():
+    default = {"groups": ["leftleg", "rightleg"]}
+    merged = merge_config(default, {"groups": ["chest"], "extra": True})
+    assert merged == {"groups": ["chest"], "extra": True}
+
+
+def test_merge_does_not_alias_either_input():
+    default = {"nested": {"x": 1}, "items": [1]}
+    user = {"other": {"y": 2}}
+    merged = merge_config(default, user)
+    merged["nested"]["x"] = 99
+    merged["items"].append(2)
+    merged["other"]["y"] = 99
+    assert default == {"nested": {"x": 1}, "items": [1]}
+    assert user == {"other": {"y": 2}}
+
+
+def test_merge_scalar_replaces_dict():
+    assert merge_config({"a": {"x": 1}}, {"a": None}) == {"a": None}
+
+
+def test_diff_reports_changed_added_and_removed():
+    old = {"a": 1, "b": 2, "c": 3}
+    new = {"a": 1, "b": 20, "d": 4}
+    assert diff_config(old, new) == {"b": (2, 20), "c": (3, None), "d": (None, 4)}
+
+
+def test_partial_diff_only_compares_new_keys():
+    old = {"a": 1, "b": 2}
+    assert diff_config(old, {"b": 3}, partial=True) == {"b": (2, 3)}
+    assert diff_config(old, {"a": 1}, partial=True) == {}
+
+
+def test_diff_handles_none():
+    assert diff_config(None, {"a": 1}) == {"a": (None, 1)}
+    assert diff_config({}, None) == {}
+
+
+# ── ConfigStore ─────────────────────────────────────────────────────────────
+
+def test_missing_file_gives_defaults(store):
+    assert store.get() == get_default_app_config()
+
+
+def test_saves_coalesce_into_one_write(store):
+    for i in range(50):
+        config = store.snapshot()
+        config["shockosc"]["static_intensity"] = i
+        store.save(config)
+    assert store.get()["shockosc"]["static_intensity"] == 49
+    assert store.writes == 0
+    store.flush()
+    assert store.writes == 1
+    assert _on_disk(store)["shockosc"]["static_intensity"] == 49
+    assert store.get_stats() == {"saves_requested": 50, "writes": 1,
+                                 "writes_avoided": 49, "pending": False}
+
+
+def test_save_section_merges_only_that_key(store):
+    store.save_section("shockosc", {"duration": 2.5})
+    shockosc = store.get()["shockosc"]
+    assert shockosc["duration"] == 2.5
+    assert shockosc["groups"] == get_default_app_config()["shockosc"]["groups"]
+    store.save_section("show_time", False)
+    store.flush()
+    on_disk = _on_disk(store)
+    assert on_disk["show_time"] is False
+    assert on_disk["shockosc"]["duration"] == 2.5
+
+
+def test_deferred_section_is_read_once(store):
+    reads = []
+    section = {"duration": 4.0}
+
+    def source():
+        reads.append(1)
+        return dict(section)
+
+    for _ in range(100):
+        store.defer_section("shockosc", source)
+    assert reads == []
+    store.flush()
+    assert len(reads) == 1
+    assert _on_disk(store)["shockosc"]["duration"] == 4.0
+
+
+def test_failed_write_stays_pending_and_retries(store):
+    # A directory where the file should be makes the atomic rename fail
+    os.mkdir(store.path)
+    store.save_section("show_time", False)
+    store.flush()
+    assert store.writes == 0
+    assert store.get_stats()["pending"]
+    # The cache keeps the unsaved change
+    assert store.get()["show_time"] is False
+
+    os.rmdir(store.path)
+    store.flush()
+    assert store.writes == 1
+    assert not store.get_stats()["pending"]
+    assert _on_disk(store)["show_time"] is False
+
+
+def test_write_timer_flushes_on_its_own(tmp_path):
+    set_config_dir(tmp_path)
+    try:
+        store = ConfigStore(filename="timed.json", write_delay=0.01)
+        store.save_section("show_music", False)
+        deadline = time.monotonic() + 2.0
+        while not store.writes and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert store.writes == 1
+        assert _on_disk(store)["show_music"] is False
+    finally:
+        set_config_dir(None)
+
+
+def test_pending_save_wins_over_file_on_disk(store):
+    store.save_section("show_time", False)
+    with open(store.path, "w") as f:
+        json.dump({"show_time": True}, f)
+    assert not store.refresh()
+    assert store.get()["show_time"] is False
+
+
+def test_external_edit_reloads_and_notifies(store):
+    store.get()
+    changes = []
+    store.add_listener(lambda old, new: changes.append(diff_config(old, new)))
+    with open(store.path, "w") as f:
+        json.dump({"show_time": False}, f)
+    assert store.refresh()
+    assert store.get()["show_time"] is False
+    assert changes == [{"show_time": (True, False)}]
+
+
+def test_views_track_reloads(store):
+    view = store.view("shockosc")
+    assert isinstance(view, ConfigView)
+    store.save_section("shockosc", {"duration": 3.0})
+    assert view["duration"] == 3.0
+    with pytest.raises(TypeError):
+        view["duration"] = 1.0
+    copy = view.to_dict()
+    copy["duration"] = 9.0
+    assert view["duration"] == 3.0
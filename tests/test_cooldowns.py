@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from cooldowns import CooldownManager
+
+KEY = ("group", "leftleg")
+
+
+class Recorder:
+    """Collects CooldownManager callbacks and lets a test wait for expiries."""
+
+    def __init__(self):
+        self.expired = []
+        self.progress = []
+
+    def on_expire(self, key):
+        self.expired.append((key, time.monotonic()))
+
+    def on_progress(self, key, fraction):
+        self.progress.append((key, fraction))
+
+    def wait_expired(self, count=1, timeout=2.0):
+        """True once count cooldowns have expired, False on timeout."""
+        deadline = time.monotonic() + timeout
+        while len(self.expired) < count:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+
+@pytest.fixture
+def calls():
+    return Recorder()
+
+
+@pytest.fixture
+def manager(calls):
+    manager = CooldownManager(on_progress=calls.on_progress, on_expire=calls.on_expire,
+                              interval=0.02)
+    yield manager
+    manager.shutdown()
+
+
+def test_active_until_expiry(manager, calls):
+    manager.start(KEY, 0.1)
+    assert manager.active(KEY)
+    assert 0.0 < manager.remaining(KEY) <= 0.1
+    assert manager.active_keys("group") == [KEY]
+    assert calls.wait_expired()
+    assert not manager.active(KEY)
+    assert manager.remaining(KEY) == 0.0
+    assert manager.active_keys() == []
+    assert [key for key, _ in calls.expired] == [KEY]
+
+
+def test_clear_ends_without_on_expire(manager, calls):
+    manager.start(KEY, 0.05)
+    assert manager.clear(KEY)
+    assert not manager.active(KEY)
+    assert not calls.wait_expired(timeout=0.2)
+    assert not manager.clear(KEY)
+
+
+def test_restart_replaces_the_old_expiry(manager, calls):
+    started = time.monotonic()
+    manager.start(KEY, 0.05)
+    manager.start(KEY, 0.2)
+    assert calls.wait_expired()
+    (key, at), = calls.expired
+    assert key == KEY
+    assert at - started >= 0.2
+    time.sleep(0.1)
+    assert len(calls.expired) == 1
+
+
+def test_keys_expire_in_end_order(manager, calls):
+    other = ("shocker", "abc")
+    manager.start(KEY, 0.15)
+    manager.start(other, 0.05)
+    assert calls.wait_expired(2)
+    assert [key for key, _ in calls.expired] == [other, KEY]
+
+
+def test_reported_cooldowns_count_down(manager, calls):
+    manager.start(KEY, 0.2, report=True)
+    manager.start(("shocker", "abc"), 0.1)
+    assert calls.wait_expired(2)
+    fractions = [fraction for key, fraction in calls.progress if key == KEY]
+    assert fractions
+    assert fractions == sorted(fractions, reverse=True)
+    assert all(0.0 < f < 1.0 for f in fractions)
+    # Only the reported key gets progress
+    assert {key for key, _ in calls.progress} == {KEY}
+
+
+def test_shutdown_stops_the_thread(calls):
+    manager = CooldownManager(on_expire=calls.on_expire)
+    manager.start(KEY, 0.05)
+    manager.shutdown()
+    assert not calls.wait_expired(timeout=0.2)
@@ -0,0 +1,118 @@
+import pytest
+from pythonosc import dispatcher
+from pythonosc.osc_bundle_builder import OscBundleBuilder, IMMEDIATELY
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.osc_packet import OscPacket
+
+from osc_decode import ScalarDispatcher, decode_scalar
+
+
+def _message(address, *args):
+    builder = OscMessageBuilder(address=address)
+    for arg in args:
+        builder.add_arg(arg)
+    return builder.build().dgram
+
+
+def _parsed(data):
+    """[(address, params), ...] the way pythonosc parses data."""
+    return [(t.message.address, t.message.params) for t in OscPacket(data).messages]
+
+
+# Address lengths around every 4-byte padding boundary, each value type
+SCALARS = [
+    (address, value)
+    for address in ("/a", "/ab", "/abc", "/abcd", "/avatar/parameters/VelocityX",
+                    "/avatar/parameters/ShockOsc/leftleg_CShock", "/avatar/parameters/ü")
+    for value in (0.0, 0.5, -1.25, 1e-30, 0, 1, -7, 2 ** 31 - 1, -2 ** 31 + 1, True, False)
+]
+
+
+@pytest.mark.parametrize("address,value", SCALARS)
+def test_decode_matches_pythonosc(address, value):
+    data = _message(address, value)
+    (expected,) = _parsed(data)
+    decoded = decode_scalar(data)
+    assert decoded == (expected[0], expected[1][0])
+    assert type(decoded[1]) is type(expected[1][0])
+
+
+@pytest.mark.parametrize("data", [
+    _message("/chatbox/input", "hello", True, False),
+    _message("/avatar/parameters/Name", "text"),
+    _message("/avatar/parameters/Pair", 1.0, 2.0),
+    _message("/avatar/parameters/None"),
+    _message("/avatar/parameters/Blob", b"\x00\x01"),
+    _message("/avatar/parameters/Big", 2 ** 40),   # pythonosc sends it as int64
+    b"#bundle\x00" + b"\x00" * 8,
+    b"",
+    b"/no-terminator",
+    b"not an address\x00\x00,f\x00\x00\x00\x00\x00\x00",
+])
+def test_other_layouts_fall_back(data):
+    assert decode_scalar(data) is None
+
+
+def test_invalid_utf8_address_falls_back():
+    data = _message("/avatar/parameters/x", 1.0).replace(b"x", b"\xff", 1)
+    assert decode_scalar(data) is None
+
+
+def _bundle(*messages):
+    builder = OscBundleBuilder(IMMEDIATELY)
+    for address, value in messages:
+        message = OscMessageBuilder(address=address)
+        message.add_arg(value)
+        builder.add_content(message.build())
+    return builder.build().dgram
+
+
+def _routes_like_pythonosc(packets):
+    """Calls a ScalarDispatcher and a plain pythonosc Dispatcher make for packets."""
+    fast, slow = [], []
+    fast_dispatcher = ScalarDispatcher()
+    fast_dispatcher.set_default_handler(lambda address, *args: fast.append((address, args)))
+    slow_dispatcher = dispatcher.Dispatcher()
+    slow_dispatcher.set_default_handler(lambda address, *args: slow.append((address, args)))
+    for data in packets:
+        for handler in fast_dispatcher.call_handlers_for_packet(data, ("127.0.0.1", 9001)):
+            handler.invoke(("127.0.0.1", 9001), [])
+        for handler in slow_dispatcher.call_handlers_for_packet(data, ("127.0.0.1", 9001)):
+            handler.invoke(("127.0.0.1", 9001), [])
+    return fast, slow, fast_dispatcher
+
+
+def test_dispatcher_delivers_what_pythonosc_delivers():
+    packets = [_message(address, value) for address, value in SCALARS]
+    packets += [
+        _message("/chatbox/input", "hello", True, False),
+        _bundle(("/avatar/parameters/A", 1.0), ("/avatar/parameters/B", True)),
+    ]
+    fast, slow, fast_dispatcher = _routes_like_pythonosc(packets)
+    assert fast == slow
+    assert fast_dispatcher.fast_packets == len(SCALARS)
+    assert fast_dispatcher.parsed_packets == 2
+
+
+def test_mapped_handlers_take_the_full_path():
+    calls = []
+    d = ScalarDispatcher()
+    d.set_default_handler(lambda address, *args: calls.append(("default", address)))
+    d.map("/avatar/change", lambda address, *args: calls.append(("mapped", address)))
+    for handler in d.call_handlers_for_packet(_message("/avatar/change", "avtr_x"), None):
+        handler.invoke(None, [])
+    for handler in d.call_handlers_for_packet(_message("/avatar/parameters/A", 1.0), None):
+        handler.invoke(None, [])
+    assert calls == [("mapped", "/avatar/change"), ("default", "/avatar/parameters/A")]
+    assert d.fast_packets == 0
+
+
+def test_capture_sees_every_raw_datagram():
+    captured = []
+    d = ScalarDispatcher()
+    d.set_default_handler(lambda address, *args: None)
+    d.capture = captured.append
+    packets = [_message("/avatar/parameters/A", 1.0), _message("/chatbox/input", "hi", True)]
+    for data in packets:
+        d.call_handlers_for_packet(data, None)
+    assert captured == packets
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from clock import clock
+from osc_output import OSCOutput, OutputDestination
+from replay import input_recorder, KIND_OUT_OSC
+
+
+@pytest.fixture
+def sent():
+    """Messages an offline OSCOutput flushes, as [(address, value), ...]."""
+    messages = []
+
+    def sink(kind, value):
+        if kind == KIND_OUT_OSC:
+            messages.append(tuple(value))
+
+    input_recorder.output_sink = sink
+    yield messages
+    input_recorder.output_sink = None
+
+
+def _wait_for(predicate, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def _idle_output(**kwargs):
+    """Offline output whose tick is too long to flush on its own during a test."""
+    return OSCOutput(offline=True, tick=60.0, **kwargs)
+
+
+def test_writes_in_one_tick_coalesce(sent):
+    out = _idle_output()
+    out.send_message("/avatar/parameters/ShockOsc/leftleg_Cooldown", True)
+    out.send_message("/avatar/parameters/ShockOsc/leftleg_Cooldown", False)
+    out.flush()
+    assert sent == [("/avatar/parameters/ShockOsc/leftleg_Cooldown", False)]
+    assert out.writes == 2
+    assert out.coalesced == 1
+
+
+def test_flush_keeps_first_write_order(sent):
+    out = _idle_output()
+    out.send_message("/a", 1)
+    out.send_message("/b", 2)
+    out.send_message("/a", 3)
+    out.flush()
+    assert sent == [("/a", 3), ("/b", 2)]
+
+
+def test_simultaneous_writes_share_a_bundle(sent):
+    out = _idle_output()
+    for i in range(3):
+        out.send_message(f"/avatar/parameters/P{i}", float(i))
+    out.flush()
+    assert out.datagrams_sent == 1
+    assert out.messages_sent == 3
+
+
+def test_bundles_split_at_max_datagram(sent):
+    out = _idle_output(max_datagram=64)
+    for i in range(6):
+        out.send_message(f"/avatar/parameters/P{i}", float(i))
+    out.flush()
+    assert out.messages_sent == 6
+    assert out.datagrams_sent > 1
+
+
+def test_list_values_are_sent_as_one_message(sent):
+    out = _idle_output()
+    out.send_message("/chatbox/input", ["hello", True, False])
+    out.flush()
+    assert sent == [("/chatbox/input", ["hello", True, False])]
+
+
+def test_token_bucket_starts_full_then_refills(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(clock, "monotonic", lambda: now[0])
+    bucket = OutputDestination("127.0.0.1", 9000, max_packets_per_sec=10)
+    assert bucket.take(25) == 10
+    assert bucket.take(5) == 0
+    now[0] += 0.25
+    assert bucket.take(5) == 2
+    # Refill is capped at one second's worth
+    now[0] += 60.0
+    assert bucket.take(25) == 10
+
+
+def test_rate_limited_writes_are_deferred_not_lost(sent):
+    out = OSCOutput(offline=True, tick=0.001, max_packets_per_sec=2, bundle=False)
+    for i in range(5):
+        out.send_message(f"/p{i}", i)
+    assert _wait_for(lambda: out.datagrams_sent == 2)
+    time.sleep(0.05)
+    assert out.datagrams_sent == 2
+    assert out.deferred >= 3
+    # A newer write to a deferred address replaces the held value
+    out.send_message("/p4", 40)
+    out.flush()
+    assert sorted(sent) == [("/p0", 0), ("/p1", 1), ("/p2", 2), ("/p3", 3), ("/p4", 40)]
+    out.close()
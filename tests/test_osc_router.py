@@ -0,0 +1,91 @@
+from osc_router import OSCRouter, EVERY, CHANGES, RISING
+
+ADDRESS = "/avatar/parameters/Contact"
+
+
+def _route(router, mode, address=ADDRESS):
+    calls = []
+    router.map(address, lambda a, *args: calls.append(args[0]), mode=mode)
+    return calls
+
+
+def _send(router, values, address=ADDRESS):
+    for value in values:
+        router.dispatch(address, value)
+
+
+def test_every_sees_every_sample():
+    router = OSCRouter()
+    calls = _route(router, EVERY)
+    _send(router, [0, 0, 1, 1, 0, 1])
+    assert calls == [0, 0, 1, 1, 0, 1]
+    assert router.skipped_total == 0
+
+
+def test_changes_skips_repeats():
+    router = OSCRouter()
+    calls = _route(router, CHANGES)
+    _send(router, [0, 0, 1, 1, 0, 1])
+    # The first sample of an address counts as a change
+    assert calls == [0, 1, 0, 1]
+    assert router.get_filter_stats()["by_address"] == {ADDRESS: 2}
+
+
+def test_rising_only_on_falsy_to_truthy():
+    router = OSCRouter()
+    calls = _route(router, RISING)
+    _send(router, [False, True, True, False, True, 0.5, 0.0])
+    # 1 → 0.5 is a change but not an edge
+    assert calls == [True, True]
+
+
+def test_rising_on_first_truthy_sample():
+    router = OSCRouter()
+    calls = _route(router, RISING)
+    _send(router, [True, True])
+    assert calls == [True]
+
+
+def test_modes_share_one_store():
+    router = OSCRouter()
+    every = _route(router, EVERY)
+    changes = _route(router, CHANGES)
+    rising = _route(router, RISING)
+    _send(router, [0, 1, 1, 0, 1])
+    assert every == [0, 1, 1, 0, 1]
+    assert changes == [0, 1, 0, 1]
+    assert rising == [1, 1]
+    assert router.params.get(ADDRESS) == 1
+    assert router.delivered == len(every) + len(changes) + len(rising)
+
+
+def test_activate_treats_next_sample_as_change():
+    router = OSCRouter()
+    calls = _route(router, CHANGES)
+    _send(router, [1, 1])
+    router.activate("avtr_other")
+    _send(router, [1])
+    assert calls == [1, 1]
+
+
+def test_pattern_handlers_use_the_mode():
+    router = OSCRouter()
+    calls = _route(router, CHANGES, address="/avatar/parameters/Shock*")
+    _send(router, [1, 1, 0], address="/avatar/parameters/ShockLeft")
+    assert calls == [1, 0]
+
+
+def test_unmap_stops_delivery():
+    router = OSCRouter()
+    calls = []
+
+    def handler(address, *args):
+        calls.append(args[0])
+
+    router.map(ADDRESS, handler, mode=EVERY)
+    _send(router, [1])
+    router.unmap(ADDRESS, handler)
+    _send(router, [0, 1])
+    assert calls == [1]
+    # Unmapped addresses are still stored
+    assert router.params.get(ADDRESS) == 1
@@ -0,0 +1,76 @@
+from param_store import ParamStore, MISSING
+
+ADDRESS = "/avatar/parameters/VelocityX"
+
+
+def _stream(store, start, interval, count, address=ADDRESS):
+    """Feed count samples every interval seconds from start; returns the last time."""
+    t = start
+    for i in range(count):
+        t = start + i * interval
+        store.update(address, float(i), now=t)
+    return t
+
+
+def test_update_returns_previous_value():
+    store = ParamStore()
+    assert store.update(ADDRESS, 1.0, now=0.0) is MISSING
+    assert store.update(ADDRESS, 2.0, now=0.1) == 1.0
+    assert store.get(ADDRESS) == 2.0
+    assert store.changed_at(ADDRESS) == 0.1
+
+
+def test_gap_in_a_steady_stream_is_counted():
+    store = ParamStore()
+    t = _stream(store, 0.0, 0.01, 20)
+    store.update(ADDRESS, 99.0, now=t + 0.2)
+    assert store.gaps_total == 1
+    assert store.gaps() == {ADDRESS: 1}
+    address, gap, at = store.recent_gaps[-1]
+    assert address == ADDRESS
+    assert abs(gap - 0.2) < 1e-9
+    assert at == t + 0.2
+
+
+def test_no_gaps_during_warmup():
+    store = ParamStore()
+    store.update(ADDRESS, 0.0, now=0.0)
+    store.update(ADDRESS, 1.0, now=0.01)
+    store.update(ADDRESS, 2.0, now=0.5)
+    assert store.gaps_total == 0
+
+
+def test_jitter_under_gap_min_is_not_a_gap():
+    store = ParamStore(gap_min=0.05)
+    t = _stream(store, 0.0, 0.01, 20)
+    store.update(ADDRESS, 1.0, now=t + 0.04)
+    assert store.gaps_total == 0
+
+
+def test_long_silence_is_not_a_gap():
+    store = ParamStore(gap_max=1.0)
+    t = _stream(store, 0.0, 0.01, 20)
+    store.update(ADDRESS, 1.0, now=t + 5.0)
+    assert store.gaps_total == 0
+    # The stream picks up again without the silence inflating its interval
+    t = _stream(store, t + 5.0, 0.01, 5)
+    store.update(ADDRESS, 1.0, now=t + 0.2)
+    assert store.gaps_total == 1
+
+
+def test_gaps_are_per_address():
+    store = ParamStore()
+    other = "/avatar/parameters/VelocityY"
+    _stream(store, 0.0, 0.01, 20)
+    t = _stream(store, 0.0, 0.01, 20, address=other)
+    store.update(other, 1.0, now=t + 0.3)
+    assert store.gaps() == {other: 1}
+
+
+def test_clear_keeps_gap_totals():
+    store = ParamStore()
+    t = _stream(store, 0.0, 0.01, 20)
+    store.update(ADDRESS, 1.0, now=t + 0.2)
+    store.clear()
+    assert ADDRESS not in store
+    assert store.gaps_total == 1
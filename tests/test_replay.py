@@ -0,0 +1,87 @@
+import time
+
+import pytest
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+from clock import clock
+from config import config_store
+from replay import (FakeHTTPSession, INPUT_KINDS, KIND_OSC, KIND_OUT_CONTROL, Replayer,
+                    input_recorder, read_capture)
+
+CONTACT = "/avatar/parameters/ShockOsc/leftleg"
+BOOP = "/avatar/parameters/OSCBoop"
+
+# No clock or music lines in the chatbox, so the outputs depend only on the
+# inputs and the seed. Random intensities make the seed matter.
+CONFIG = {
+    "show_time": False,
+    "show_music": False,
+    "shockosc": {
+        "enabled": True,
+        "mode": "random",
+        "random_min": 10,
+        "random_max": 90,
+        "duration": 0.3,
+        "hold_time": 0.2,
+        "cooldown_delay": 0.5,
+        "openshock_token": "secret-token",
+        "shockers": {"shocker-1": "leftleg"},
+    },
+}
+
+
+def _packet(address, value):
+    builder = OscMessageBuilder(address=address)
+    builder.add_arg(value)
+    return builder.build().dgram
+
+
+@pytest.fixture(scope="module")
+def capture(tmp_path_factory):
+    """Record a short live session (boops, two held contacts) to a capture file."""
+    from app import VRChatMessenger
+
+    path = tmp_path_factory.mktemp("replay") / "session.vrcrec"
+    config_store.pin(CONFIG)
+    input_recorder.start(str(path))
+    messenger = None
+    try:
+        messenger = VRChatMessenger(offline=True)
+        messenger.shock_controller.http_session = FakeHTTPSession()
+        inputs = [(BOOP, True, 0.1), (BOOP, False, 0.2),
+                  (CONTACT, True, 0.4), (CONTACT, False, 0.7),
+                  (CONTACT, True, 0.4), (CONTACT, False, 0.1)]
+        for address, value, wait in inputs:
+            messenger.dispatcher.call_handlers_for_packet(_packet(address, value), ("127.0.0.1", 0))
+            time.sleep(wait)
+        # Long enough for the shock info to be hidden again
+        time.sleep(5.5)
+    finally:
+        input_recorder.stop()
+        if messenger is not None:
+            messenger.cleanup()
+        config_store.pin(None)
+    return path
+
+
+def test_capture_header_holds_seed_and_redacted_config(capture):
+    seed, config, records = read_capture(capture)
+    assert isinstance(seed, int)
+    assert config["shockosc"]["mode"] == "random"
+    assert config["shockosc"]["openshock_token"] == "redacted"
+    assert [kind for _, kind, _ in records if kind in INPUT_KINDS] == [KIND_OSC] * 6
+    times = [t for t, _, _ in records]
+    assert times == sorted(times)
+    # Both held contacts went out as OpenShock commands
+    assert sum(1 for _, kind, _ in records if kind == KIND_OUT_CONTROL) >= 2
+
+
+@pytest.mark.parametrize("speed", [1.0, 4.0])
+def test_replay_reproduces_the_recorded_outputs(capture, speed):
+    report = Replayer(str(capture), speed=speed, settle=6.0).run()
+    assert report["inputs"] == 6
+    assert report["divergences"] == []
+    assert report["actual_outputs"] == report["expected_outputs"]
+    # The replayer puts the clock and config back
+    assert clock.speed == 1.0
+    assert config_store.get()["shockosc"]["openshock_token"] != "redacted"
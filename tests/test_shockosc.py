@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from replay import FakeHTTPSession
+from shock_actions import ACTION_SHOCK
+from shockosc import ShockOSCController
+
+GROUP = "leftleg"
+CSHOCK = f"/avatar/parameters/ShockOsc/{GROUP}_CShock"
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def shocks():
+    return []
+
+
+@pytest.fixture
+def controller(shocks):
+    controller = ShockOSCController(offline=True,
+                                    shock_callback=lambda *args: shocks.append(args))
+    controller.http_session = FakeHTTPSession()
+    controller.update_config({"enabled": True, "openshock_token": "token",
+                              "shockers": {"shocker-1": GROUP}, "cooldown_delay": 5.0,
+                              "static_intensity": 40})
+    yield controller
+    controller.cleanup()
+
+
+def test_held_shock_reports_how_long_it_was_held(controller, shocks):
+    assert controller.set_continuous(GROUP, ACTION_SHOCK, 0.5)
+    assert shocks == [(50, GROUP, 0)]
+    time.sleep(0.3)
+    controller.set_continuous(GROUP, ACTION_SHOCK, 0.0)
+    (intensity, group, held), = shocks[1:]
+    assert (intensity, group) == (50, GROUP)
+    assert 0.2 <= held < 1.0
+
+
+def test_group_action_cooldown_starts_before_the_send(controller, shocks):
+    sent = []
+
+    def send(shocker_ids, intensity, duration, action_type):
+        # The cooldown is already running when the command goes out
+        sent.append(controller.is_group_on_cooldown(GROUP))
+        return True
+
+    controller.send_openshock_command = send
+    assert controller.send_group_action(GROUP, ACTION_SHOCK)
+    assert _wait_for(lambda: shocks)
+    assert sent == [True]
+    assert controller.is_group_on_cooldown(GROUP)
+    assert not controller.send_group_action(GROUP, ACTION_SHOCK)
+
+
+def test_failed_group_action_releases_the_cooldown(controller, shocks, capsys):
+    controller.send_openshock_command = lambda *args: False
+    assert controller.send_group_action(GROUP, ACTION_SHOCK)
+    assert _wait_for(lambda: not controller.is_group_on_cooldown(GROUP))
+    assert shocks == []
+    assert "Manually cleared" not in capsys.readouterr().out
+
+
+def test_fallback_writes_are_recognised_as_echoes():
+    controller = ShockOSCController(offline=True)
+    try:
+        controller.update_config({"enabled": True, "cooldown_delay": 0,
+                                  "static_intensity": 40, "duration": 0.1})
+        controller.send_shock([GROUP])
+        assert not controller.is_own_echo(CSHOCK, 0.9)
+        assert controller.is_own_echo(CSHOCK, 0.4)
+        # Only once: the avatar setting it again is a real input
+        assert not controller.is_own_echo(CSHOCK, 0.4)
+        # The timed stop write is ours too
+        assert _wait_for(lambda: controller.is_own_echo(CSHOCK, 0.0))
+    finally:
+        controller.cleanup()
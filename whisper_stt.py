@@ -16,6 +16,8 @@ import threading
 import time
 import traceback
 
+from replay import input_recorder, KIND_STT
+
 
 def _debug_log(msg):
     """Append a line to %APPDATA%\\VRCChatbox\\stt_debug.log.
@@ -459,6 +461,8 @@ class WhisperSTTController:
     # ── Callback dispatch (swallow consumer errors) ──────────────────────────
 
     def _emit_partial(self, text):
+        if input_recorder.active:
+            input_recorder.record_json(KIND_STT, ["partial", text])
         if self.on_partial:
             try:
                 self.on_partial(text)
@@ -466,6 +470,8 @@ class WhisperSTTController:
                 pass
 
     def _emit_final(self, text):
+        if input_recorder.active:
+            input_recorder.record_json(KIND_STT, ["final", text])
         if self.on_final:
             try:
                 self.on_final(text)
@@ -473,6 +479,8 @@ class WhisperSTTController:
                 pass
 
     def _emit_state(self, active):
+        if input_recorder.active:
+            input_recorder.record_json(KIND_STT, ["state", active])
         if self.on_state:
             try:
                 self.on_state(active)